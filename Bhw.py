@@ -1,19 +1,26 @@
+import argparse
 import tkinter as tk
 from tkinter import messagebox, filedialog
 from tkinter import ttk 
-import csv
-import os
 from datetime import datetime, date, timedelta
-from collections import defaultdict 
-import random 
+import multiprocessing
+import os
+import queue
+import threading
+import time
 
-FIELDNAMES = ['ID', 'Name', 'Birthday', 'LMP', 'Sitio', 'Health_Status', 'Records', 'PWD_Type'] 
-SITIO_CHOICES = ["IBABA", "CENTRO", "SILANGAN", "KANLURAN"] 
-DISEASE_CHOICES = ["NORMAL", "Diabetes", "Hypertension", "COPD", "Pneumonia", "TB (Tuberculosis)", "Asthma", "Other"] 
-PWD_CHOICES = ["NOT PWD", "Physical Disability", "Intellectual Disability", "Mental Disability", "Visual Impairment", "Hearing Impairment", "Speech Impairment", "Multiple Disabilities"] 
+from bhw_core import storage
+from bhw_core import (SITIO_CHOICES, DISEASE_CHOICES, PWD_CHOICES, enable_profiling, profiler, instrumented,
+                      patient_registry, calculate_age, derived_cache, get_derived, registry_stats, build_crosstab_report,
+                      write_crosstabs_csv, checkup_calendar, age_index, PatientRecord, search_candidates, iter_search_candidates,
+                      BackgroundLoader, apply_loaded_chunk, default_export_filename, init_storage, detach_storage,
+                      registry_subset, RESIDENT_COLUMNS, format_resident_row, PREGNANT_COLUMNS, format_pregnant_row,
+                      list_index)
+from bhw_core.analytics import columnar_analytics
+from bhw_core.export import BackgroundExport, export_source
+from bhw_core.excel_import import EXCEL_IMPORT_ROOT, excel_import_sources, read_excel_sources, import_excel_rows, excel_import_summary
 
-patient_registry = []
-next_id = 1 
+# All registry, date, report and storage logic lives in the headless bhw_core package; this module is only the Tk client.
 
 THEMES = {
     'Light': {'PRIMARY': '#007BFF', 'SECONDARY': '#495057', 'BACKGROUND': '#F8F9FA', 'CONTENT_BG': '#FFFFFF', 'SIDEBAR_BG': '#E9ECEF', 'SIDEBAR_HOVER': '#CED4DA', 'INPUT_BG': '#F0F3F4', 'WARNING': '#FFC107', 'TEXT_COLOR': '#212529', 'CARD_BG': '#D4E6F1'},
@@ -26,102 +33,257 @@ GLOBAL_FONT_SIZE = 11
 USER_CREDENTIALS = {"bhw": "bhw123"}
 LOGGED_IN_USER = None 
 
-def calculate_age(bday_str):
-    try:
-        bday = datetime.strptime(bday_str, "%Y-%m-%d").date()
-        today = date.today() 
-        return today.year - bday.year - ((today.month, today.day) < (bday.month, bday.day))
-    except ValueError: return -1 
-
-def calculate_edd_and_schedule(lmp_str):
-    if not lmp_str or lmp_str.upper() == "N/A": return "N/A", []
-    try:
-        lmp = datetime.strptime(lmp_str, "%Y-%m-%d").date()
-        edd = lmp + timedelta(days=280) 
-        today = date.today()
-        
-        # New Rule: Check if LMP is too recent (less than 4 weeks)
-        # If LMP is too recent, it means the patient is not yet confirmed pregnant 
-        # based on LMP alone, or the LMP entry is incorrect.
-        if today - lmp < timedelta(weeks=4):
-             return "LMP too recent (Not Pregnant)", [] # Use a clear status for the schedule/EDD
-        
-        if edd < today: return edd.strftime("%Y-%m-%d"), ["Delivered (Post-Partum)"]
-        
-        schedule = []; current_date = lmp + timedelta(weeks=12) 
-        while current_date <= edd:
-            week = (current_date - lmp).days // 7
-            status = "🔜" if current_date >= today else "✅"
-            schedule.append(f"{status} {current_date.strftime('%Y-%m-%d')} (Week {week})")
-            
-            # Scheduling logic
-            if week >= 36: current_date += timedelta(weeks=1) 
-            elif week >= 28: current_date += timedelta(weeks=2) 
-            else: current_date += timedelta(weeks=4) 
-            
-        return edd.strftime("%Y-%m-%d"), [s for s in schedule if s.startswith('🔜')]
-    except ValueError: return "Invalid LMP Date", []
-
-def load_data():
-    global patient_registry, next_id
-    DATA_FILE = 'bhw_patient_registry_auto.csv'
-    patient_registry = []
-    if not os.path.exists(DATA_FILE): return
-    
-    try:
-        with open(DATA_FILE, mode='r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file, fieldnames=FIELDNAMES)
-            header_skipped = False
-            for row in reader:
-                if not header_skipped: header_skipped = True; continue
-                
-                # Data cleanup/migration for older entries
-                if 'PWD_Type' not in row or not row['PWD_Type']: row['PWD_Type'] = 'NOT PWD'
-                if 'LMP' not in row or not row['LMP']: row['LMP'] = 'N/A' 
-                
-                row['Records'] = row['Records'].split(';') if row['Records'] else []
-                row['ID'] = int(row['ID'])
-                patient_registry.append(row)
-                
-            if patient_registry: 
-                next_id = max(p['ID'] for p in patient_registry) + 1
-                
-    except Exception as e: 
-        messagebox.showerror("Data Error", f"ERROR loading data: {e}.")
+LOAD_POLL_MS = 50
+SYNC_POLL_MS = 500
+EXPORT_POLL_MS = 100
+EXPORT_FILE_TYPES = (("CSV files (Excel Compatible)", ".csv"), ("Excel workbook", ".xlsx"), ("JSON Lines", ".jsonl"))
+THEME_COLOR_OPTIONS = ('bg', 'fg', 'activebackground', 'activeforeground', 'highlightbackground', 'highlightcolor',
+                       'insertbackground', 'selectbackground', 'selectforeground', 'selectcolor')
+INPUT_WIDGET_CLASSES = ('Entry', 'Text', 'Listbox') # Their background is INPUT_BG even where it equals another theme color
 
-def save_data():
-    default_filename = f"BHW_Patient_Registry_{datetime.now().strftime('%Y%m%d')}.csv"
-    filename = filedialog.asksaveasfilename(defaultextension=".csv", initialfile=default_filename, filetypes=[("CSV files (Excel Compatible)", "*.csv")])
-    if not filename: return 
-    
-    try:
-        with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=FIELDNAMES); writer.writeheader()
-            for patient in patient_registry:
-                patient_to_save = patient.copy()
-                patient_to_save['Records'] = ';'.join(patient_to_save['Records'])
-                if 'PWD_Type' not in patient_to_save: patient_to_save['PWD_Type'] = 'NOT PWD'
-                writer.writerow(patient_to_save)
-                
-        messagebox.showinfo("Success", f"Data successfully saved to:\n{filename}")
-    except Exception as e: 
-        messagebox.showerror("Save Error", f"ERROR saving data: {e}")
-
-def find_patient_by_id_or_name(search_term):
-    search_term = search_term.strip()
-    if not search_term: return None
-    search_term_upper = search_term.upper()
+# ===============================================
+# 1. GUI WIDGETS (RESIDENT TABLE / LOGIN)
+# ===============================================
+
+def _id_position(rows, patient_id):
+    """Index of patient_id in an ID-sorted resident list, or where it would be inserted."""
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if rows[middle]['ID'] < patient_id: low = middle + 1
+        else: high = middle
+    return low
+
+class VirtualTreeview:
+    """A ttk.Treeview over an indexable data list that only materializes the rows in the viewport.
     
-    try:
-        search_id = int(search_term)
-        for p in patient_registry:
-            if p['ID'] == search_id: return p
-    except ValueError: pass
+    The tree holds one Tcl item per visible row; scrolling moves a window offset and rewrites
+    those items' values, so building or scrolling the table costs O(visible rows), not O(len(data)).
+    """
+    ROW_HEIGHT = 25 # Matches the Treeview rowheight set in BHWApp.apply_styles
+
+    def __init__(self, parent, columns, data, format_row, scrollbar):
+        self.data = data
+        self.format_row = format_row
+        self.scrollbar = scrollbar
+        self.offset = 0
+        self.visible_rows = 20
+        self.selected_index = None
+        
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', selectmode='browse', height=self.visible_rows)
+        scrollbar.config(command=self.yview)
+        
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll_by(-1 * (e.delta // 120 or (1 if e.delta > 0 else -1)) * 3))
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page_up'), ('<Next>', 'page_down'), ('<Home>', 'home'), ('<End>', 'end')):
+            self.tree.bind(key, lambda e, s=step: self._move_selection(s))
+        self.render()
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self.ROW_HEIGHT - 1) # One row is taken by the headings
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def _max_offset(self):
+        return max(0, len(self.data) - self.visible_rows)
+
+    def _scroll_to(self, offset):
+        offset = min(max(0, int(offset)), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _scroll_by(self, rows):
+        self._scroll_to(self.offset + rows)
+        return 'break'
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        if args[0] == 'moveto': self._scroll_to(float(args[1]) * len(self.data))
+        elif args[0] == 'scroll': self._scroll_by(int(args[1]) * (self.visible_rows if args[2] == 'pages' else 1))
+
+    def _move_selection(self, step):
+        last = len(self.data) - 1
+        if last < 0: return 'break'
+        current = self.selected_index if self.selected_index is not None else self.offset - 1
+        if isinstance(step, int): target = current + step
+        else: target = {'page_up': current - self.visible_rows, 'page_down': current + self.visible_rows, 'home': 0, 'end': last}[step]
+        self.selected_index = min(max(0, target), last)
+        
+        # Keep the selected row inside the viewport
+        if self.selected_index < self.offset: self._scroll_to(self.selected_index)
+        elif self.selected_index >= self.offset + self.visible_rows: self._scroll_to(self.selected_index - self.visible_rows + 1)
+        self.render()
+        return 'break'
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection: self.selected_index = self.offset + self.tree.index(selection[0])
+
+    def selected_row(self):
+        return self.data[self.selected_index] if self.selected_index is not None and self.selected_index < len(self.data) else None
+
+    def set_data(self, data):
+        """Swaps in a new row list (e.g. after the registry changed), keeping the scroll position where possible."""
+        selected = self.selected_row()
+        self.data = data
+        # Keep the selection only if the same resident is still at that index
+        if selected is not None and (self.selected_index >= len(data) or data[self.selected_index] is not selected): self.selected_index = None
+        self.render()
+
+    # Single-row edits: the caller changes data, then reports where; only the affected item (or the viewport) is redrawn
+    def row_changed(self, row):
+        """Rewrites the item showing an edited row; nothing to do while it is off screen."""
+        for item, shown in zip(self.tree.get_children(), self.data[self.offset:self.offset + self.visible_rows]):
+            if shown is row: self.tree.item(item, values=self.format_row(row)); return
+
+    def rows_inserted(self, index, count=1):
+        """After `count` rows were inserted into data at `index`: rows scrolled past and the selected row stay put."""
+        if self.selected_index is not None and index <= self.selected_index: self.selected_index += count
+        if index < self.offset: self.offset += count; self._update_scrollbar()
+        elif index < self.offset + self.visible_rows: self.render()
+        else: self._update_scrollbar()
+
+    def row_removed(self, index):
+        """After the row at `index` was deleted from data; deselects it if it was the selected row."""
+        if self.selected_index is not None: self.selected_index = None if self.selected_index == index else self.selected_index - (index < self.selected_index)
+        if index < self.offset: self.offset -= 1; self._update_scrollbar()
+        elif index < self.offset + self.visible_rows: self.render()
+        else: self._update_scrollbar()
+
+    def render(self):
+        self.offset = min(self.offset, self._max_offset())
+        rows = self.data[self.offset:self.offset + self.visible_rows]
+        items = self.tree.get_children()
+        
+        # Reuse existing items; add or drop only the difference in row count
+        for item, row in zip(items, rows): self.tree.item(item, values=self.format_row(row))
+        for row in rows[len(items):]: self.tree.insert('', tk.END, values=self.format_row(row))
+        if len(items) > len(rows): self.tree.delete(*items[len(rows):])
+        
+        items = self.tree.get_children()
+        position = self.selected_index - self.offset if self.selected_index is not None else -1
+        if 0 <= position < len(items):
+            if self.tree.selection() != (items[position],): self.tree.selection_set(items[position])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.data)
+        self.scrollbar.set(self.offset / total if total else 0.0, min(self.offset + self.visible_rows, total) / total if total else 1.0)
+
+class LiveSearch:
+    """Search-as-you-type for a search Entry, with results in a dropdown list under it.
     
-    for p in patient_registry:
-        if p['Name'].upper().startswith(search_term_upper): return p
-        
-    return None
+    Keystrokes are debounced; each query runs on a worker thread and is abandoned as soon as a newer
+    keystroke bumps the generation counter. Partial results (ID/prefix matches, then fuzzy matches)
+    are streamed back through a queue that the Tk thread polls, so typing never waits on a search.
+    """
+    DEBOUNCE_MS = 200
+    POLL_MS = 30
+    MAX_RESULTS = 15
+
+    def __init__(self, entry, dropdown_frame, on_pick, colors):
+        self.entry = entry
+        self.on_pick = on_pick
+        self.generation = 0
+        self.candidates = []
+        self._after_id = None
+        self._dispatched = None
+        self._polling = False
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        
+        self.listbox = tk.Listbox(dropdown_frame, height=8, font=("Segoe UI", 11), bg=colors['INPUT_BG'], fg=colors['TEXT_COLOR'], selectbackground=colors['PRIMARY'], selectforeground='white', relief=tk.FLAT, activestyle='none')
+        self.listbox.bind('<<ListboxSelect>>', self._pick)
+        self.listbox.bind('<Return>', self._pick)
+        self.listbox.bind('<Escape>', lambda e: self.hide())
+        
+        entry.bind('<KeyRelease>', self._on_key, add='+')
+        entry.bind('<Down>', self._focus_list, add='+')
+        entry.bind('<Escape>', lambda e: self.hide(), add='+')
+        entry.bind('<Return>', lambda e: self.hide(), add='+') # The Search button flow takes over
+        entry.bind('<Destroy>', lambda e: self.requests.put(None), add='+') # Stops the worker with the view
+        threading.Thread(target=self._worker, name="live-search", daemon=True).start()
+
+    def _on_key(self, event):
+        if event.keysym in ('Return', 'Up', 'Down', 'Escape', 'Tab', 'Shift_L', 'Shift_R', 'Control_L', 'Control_R'): return
+        self.generation += 1 # Supersedes any query still running
+        if self._after_id: self.entry.after_cancel(self._after_id)
+        self._after_id = self.entry.after(self.DEBOUNCE_MS, self._dispatch)
+
+    def _dispatch(self):
+        self._after_id = None
+        term = self.entry.get().strip()
+        if not term: self.hide(); return
+        patient_registry.ensure_indexes() # Deferred index sorting must not happen on the worker
+        self._dispatched = self.generation
+        self.requests.put((self.generation, term))
+        if not self._polling:
+            self._polling = True
+            self.entry.after(self.POLL_MS, self._poll)
+
+    def _worker(self):
+        while True:
+            request = self.requests.get()
+            if request is None: return
+            while not self.requests.empty(): # Skip straight to the newest query
+                request = self.requests.get()
+                if request is None: return
+            generation, term = request
+            cancelled = lambda: generation != self.generation
+            try:
+                for candidates in iter_search_candidates(term, self.MAX_RESULTS, cancelled):
+                    if cancelled(): break
+                    self.results.put((generation, candidates, False))
+                self.results.put((generation, None, True))
+            except Exception as e:
+                self.results.put((generation, e, True))
+
+    def _poll(self):
+        if not self.entry.winfo_exists(): return
+        while not self.results.empty():
+            generation, payload, final = self.results.get_nowait()
+            if generation != self.generation: continue # Results of a superseded query
+            if isinstance(payload, Exception): self.candidates = []; self._show_lines([f"Search failed: {payload}"])
+            elif payload is not None: self.show(payload)
+            if final: self._dispatched = None
+        if self._dispatched != self.generation: # Nothing in flight for the current text; _dispatch restarts polling
+            self._polling = False
+            return
+        self.entry.after(self.POLL_MS, self._poll)
+
+    def show(self, candidates):
+        self.candidates = candidates
+        self._show_lines([f"ID {p['ID']}  |  {p['Name']}  |  {p['Sitio']}  |  Born {p['Birthday']}" for p in candidates] or ["No matching residents."])
+
+    def _show_lines(self, lines):
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *lines)
+        self.listbox.config(height=min(len(lines), 8))
+        if not self.listbox.winfo_ismapped(): self.listbox.pack(fill='x', padx=5)
+
+    def hide(self):
+        self.generation += 1
+        self.candidates = []
+        self.listbox.pack_forget()
+
+    def _focus_list(self, event):
+        if self.candidates:
+            self.listbox.focus_set(); self.listbox.selection_clear(0, tk.END); self.listbox.selection_set(0); self.listbox.activate(0)
+        return 'break'
+
+    def _pick(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection or selection[0] >= len(self.candidates): return
+        patient = self.candidates[selection[0]]
+        self.hide()
+        self.on_pick(patient)
 
 class LoginScreen:
     def __init__(self, master, on_login_success):
@@ -173,10 +335,14 @@ class LoginScreen:
             self.password_entry.delete(0, tk.END) 
 
 # ===============================================
-# 4. GUI APPLICATION (FRONTEND LOGIC) 
+# 2. GUI APPLICATION (FRONTEND LOGIC) 
 # ===============================================
 
 class BHWApp:
+    # Membership of the filtered list views, so an added or edited resident can be placed without re-running the list query
+    LIST_FILTERS = {'seniors': lambda p: get_derived(p).age >= 60, 'pwd': lambda p: p.get('PWD_Type', 'NOT PWD') != 'NOT PWD',
+                    'pregnant': lambda p: get_derived(p).is_pregnant}
+
     def __init__(self, master, show_login_callback): 
         self.master = master
         self.show_login_callback = show_login_callback
@@ -185,10 +351,32 @@ class BHWApp:
         master.title("BHW Connect: Patient Registry")
         master.geometry("1000x700") 
         
-        load_data() 
+        self.loader = None
+        self.load_failed = False # Set when loading stopped part-way: edits stay blocked until a reload succeeds
+        self.export = None # BackgroundExport while one is running
+        self.home_value_labels = {}
+        self.content_frame = None # The current view's page inside content_host
+        self.current_page = None # cache_key of the current view (None for views rebuilt on every visit)
+        self.pages = {} # cache_key -> page Frame kept alive between visits
+        self.page_stamps = {} # cache_key -> (registry version, date) the page was last drawn for
+        self.resident_tables = {} # cache_key -> VirtualTreeview (None while the list shows its empty message)
+        self.list_sources = {} # cache_key -> rows() of a sortable/filterable resident list
+        self.list_states = {} # cache_key -> {'sort': column or None, 'descending': bool, 'filters': {facet: set of values}}
+        self.list_chip_vars = {} # cache_key -> {(facet, value): BooleanVar of its filter chip}
+        self.list_count_labels = {} # cache_key -> "N residents listed" label
+        patient_registry.subscribe(self._on_registry_change) # Keeps built list pages current row by row
+        self.sync_client = None
+        if os.environ.get('BHW_SYNC_SERVER'): # bhw_core.sync pulls in asyncio, so only syncing terminals import it
+            from bhw_core.sync import SYNC_INTERVAL_S, init_sync
+            self.sync_client, self.sync_interval = init_sync(), SYNC_INTERVAL_S
+        self.sync_status = "Sync: waiting for residents to load"
+        self.next_sync = 0
         self.apply_styles() 
         self._setup_layout() 
+        self._start_background_load()
+        if self.sync_client is not None: self.master.after(SYNC_POLL_MS, self._poll_sync)
         self.show_home_view()
+        if profiler.enabled: master.bind_all('<Control-Alt-p>', self._show_profile_menu) # Hidden: profiling is opt-in
         
         # State variables
         self.current_patient = None
@@ -201,7 +389,7 @@ class BHWApp:
             colors.update({'PRIMARY': '#007BFF', 'SECONDARY': '#5D6D7E', 'TEXT_COLOR': '#333333', 'INPUT_BG': '#FFFFFF', 'SIDEBAR_HOVER': '#E6E6E6', 'HIGHLIGHT_BORDER': '#CED4DA'})
         return colors
 
-    def apply_styles(self):
+    def apply_styles(self, previous_colors=None):
         colors = self.get_colors()
         style = ttk.Style()
         style.theme_use('default') 
@@ -220,15 +408,24 @@ class BHWApp:
         style.configure("Treeview", font=('Segoe UI', GLOBAL_FONT_SIZE), rowheight=25, background=colors['CONTENT_BG'], foreground=colors['TEXT_COLOR'])
         style.map("Treeview", background=[('selected', colors['PRIMARY'])], foreground=[('selected', 'white')])
 
-        # Re-draw UI elements if they exist
-        if hasattr(self, 'sidebar'):
-            current_title = self.master.title().split(': ')[-1].split('/')[0].strip()
-            self.sidebar.destroy(); self.content_frame.destroy(); self._setup_layout()
-            
-            # Re-draw current view 
-            view_map = {'Home': self.show_home_view, 'Add': self.show_add_patient, 'Update': self.show_update_record, 'View All': lambda: self.show_master_list(False), 'Senior': lambda: self.show_master_list(True), 'Pregnant': self.show_pregnant_scheduler, 'PWD': self.show_pwd_list, 'Profile': self.show_view_patient, 'Health': self.generate_report}
-            # Simple check to see if the view exists and re-render it
-            if current_title in view_map: view_map[current_title]()
+        # Existing widgets (sidebar, current and cached pages) are recolored in place rather than rebuilt
+        if previous_colors is not None and hasattr(self, 'sidebar'): self._restyle(self.master, previous_colors, colors)
+
+    def _restyle(self, widget, old, new):
+        """Gives every widget option that holds an old theme color the new color of the same role."""
+        roles = {}
+        for role in reversed(('CONTENT_BG', 'SIDEBAR_BG', 'BACKGROUND', 'PRIMARY', 'SECONDARY', 'TEXT_COLOR', 'SIDEBAR_HOVER', 'CARD_BG', 'WARNING', 'INPUT_BG', 'HIGHLIGHT_BORDER')):
+            if role in old: roles[old[role].upper()] = role # Earlier roles win when two share a color
+        stack = [widget]
+        while stack:
+            current = stack.pop(); stack.extend(current.winfo_children())
+            changes = {}
+            for option in THEME_COLOR_OPTIONS:
+                try: value = str(current.cget(option)).upper()
+                except tk.TclError: continue # ttk widgets and options this widget class does not have
+                role = 'INPUT_BG' if option == 'bg' and current.winfo_class() in INPUT_WIDGET_CLASSES and value == old.get('INPUT_BG', '').upper() else roles.get(value)
+                if role in new: changes[option] = new[role]
+            if changes: current.configure(**changes)
 
 
     def _setup_layout(self):
@@ -236,11 +433,219 @@ class BHWApp:
         self.sidebar = tk.Frame(self.master, width=220, bg=colors['SIDEBAR_BG'])
         self.sidebar.pack(side="left", fill="y")
         
-        self.content_frame = tk.Frame(self.master, bg=colors['CONTENT_BG'])
-        self.content_frame.pack(side="right", fill="both", expand=True, padx=20, pady=20)
+        self.content_host = tk.Frame(self.master, bg=colors['CONTENT_BG'])
+        self.content_host.pack(side="right", fill="both", expand=True, padx=20, pady=20)
         
         self._create_sidebar_buttons()
+        self._create_load_status()
+        
+    def _create_load_status(self):
+        colors = self.get_colors()
+        self.load_status_frame = tk.Frame(self.sidebar, bg=colors['SIDEBAR_BG'])
+        self.load_status_label = tk.Label(self.load_status_frame, text="Loading residents...", font=("Segoe UI", 9), bg=colors['SIDEBAR_BG'], fg=colors['SECONDARY'], anchor='w')
+        self.load_status_label.pack(fill='x')
+        self.load_progress = ttk.Progressbar(self.load_status_frame, orient=tk.HORIZONTAL, mode='determinate', maximum=1.0)
+        self.load_progress.pack(fill='x', pady=(2, 0))
+        if self.loader is not None: self.load_status_frame.pack(side='bottom', fill='x', padx=15, pady=10)
+        
+        # Export progress: shown while a background export runs, whichever view is open
+        self.export_status_frame = tk.Frame(self.sidebar, bg=colors['SIDEBAR_BG'])
+        self.export_status_label = tk.Label(self.export_status_frame, text="Exporting...", font=("Segoe UI", 9), bg=colors['SIDEBAR_BG'], fg=colors['SECONDARY'], anchor='w')
+        self.export_status_label.pack(fill='x')
+        self.export_progress = ttk.Progressbar(self.export_status_frame, orient=tk.HORIZONTAL, mode='determinate', maximum=1.0)
+        self.export_progress.pack(fill='x', pady=(2, 0))
+        tk.Button(self.export_status_frame, text="✖ Cancel Export", command=self._cancel_export, font=("Segoe UI", 9), bg=colors['SIDEBAR_HOVER'], fg=colors['TEXT_COLOR'], relief=tk.FLAT).pack(anchor='e', pady=(2, 0))
+        if self.export is not None: self.export_status_frame.pack(side='bottom', fill='x', padx=15, pady=10)
+        if self.sync_client is not None:
+            self.sync_status_label = tk.Label(self.sidebar, text=self.sync_status, font=("Segoe UI", 9), bg=colors['SIDEBAR_BG'], fg=colors['SECONDARY'], anchor='w', wraplength=190, justify='left')
+            self.sync_status_label.pack(side='bottom', fill='x', padx=15)
+
+    def _set_load_progress(self, fraction):
+        if fraction is None: self.load_status_frame.pack_forget(); return
+        if not self.load_status_frame.winfo_ismapped(): self.load_status_frame.pack(side='bottom', fill='x', padx=15, pady=10)
+        self.load_progress['value'] = fraction
+        self.load_status_label.config(text=f"Loading residents... {len(patient_registry):,} loaded")
+
+    # --- BACKGROUND LOADING ---
+    def _start_background_load(self):
+        patient_registry.clear(); derived_cache.clear()
+        self.load_failed = False
+        try: init_storage()
+        except Exception as e: messagebox.showerror("Data Error", f"ERROR opening database: {e}.")
+        self.loader = BackgroundLoader()
+        self.load_started = time.perf_counter()
+        self.loader.start()
+        self._set_load_progress(0.0)
+        self.master.after(LOAD_POLL_MS, self._poll_loader)
+
+    def _poll_loader(self):
+        loader = self.loader
+        if loader is None or loader.cancelled.is_set(): return
+        
+        # Apply chunks for at most ~30 ms per tick so typing and scrolling stay responsive
+        deadline = time.perf_counter() + 0.03
+        finished = False
+        try:
+            while not finished and time.perf_counter() < deadline:
+                kind, payload, fraction = loader.messages.get_nowait()
+                if kind == 'chunk':
+                    apply_loaded_chunk(payload); self._set_load_progress(fraction)
+                elif kind == 'error':
+                    # Only part of the registry is in memory: stop persisting so nothing overwrites the saved residents
+                    detach_storage(); self.load_failed = True; finished = True
+                    messagebox.showerror("Data Error", f"ERROR loading data: {payload}.\n\nEditing is disabled and nothing will be saved until the residents are reloaded.")
+                else: finished = True
+        except queue.Empty: pass
+        
+        if not finished:
+            self._refresh_home_counts()
+            self.master.after(LOAD_POLL_MS, self._poll_loader)
+            return
         
+        self.loader = None
+        if profiler.enabled: profiler.series('BackgroundLoader.load').append(time.perf_counter() - self.load_started)
+        self._set_load_progress(None)
+        if storage.change_journal is not None and not self.load_failed: storage.change_journal.compact_if_needed()
+        if self.current_page == 'home': self.show_home_view() # Final refresh of the counts
+
+    def _poll_sync(self):
+        """Applies finished sync exchanges and starts a new one every sync_interval seconds once the registry is loaded."""
+        if not self.sidebar.winfo_exists(): return # Logged out; the next BHWApp polls instead
+        if self.loader is None and not self.load_failed:
+            result = self.sync_client.apply_pending()
+            if result is not None:
+                applied, error = result
+                if error: self.sync_status = f"Sync failed at {datetime.now():%H:%M} ({error}); will retry."
+                else: self.sync_status = f"Synced at {datetime.now():%H:%M}" + (f", {applied:,} change(s) received." if applied else ".")
+                self.sync_status_label.config(text=self.sync_status)
+                if applied: self._refresh_home_counts()
+            if time.monotonic() >= self.next_sync and self.sync_client.start_sync(): self.next_sync = time.monotonic() + self.sync_interval
+        self.master.after(SYNC_POLL_MS, self._poll_sync)
+
+    def _when_loaded(self, command, edits=False):
+        """Wraps a sidebar action that needs the full registry so it waits until loading finishes.
+        
+        Actions that change or save residents (edits=True) stay blocked after a failed load until a reload succeeds.
+        """
+        def guarded():
+            if self.loader is not None:
+                messagebox.showinfo("Please Wait", "Resident records are still loading. Please try again in a moment.")
+                return
+            if edits and self.load_failed:
+                if messagebox.askyesno("Load Failed", "Resident records did not load completely, so editing is disabled.\n\nReload the residents now?"): self._start_background_load()
+                return
+            command()
+        return guarded
+
+    def _show_profile_menu(self, event):
+        menu = tk.Menu(self.master, tearoff=0)
+        menu.add_command(label="Dump profile report", command=self._dump_profile_report)
+        menu.add_command(label="Reset profile counters", command=profiler.reset)
+        menu.tk_popup(event.x_root, event.y_root)
+
+    def _dump_profile_report(self):
+        try: txt_path, json_path = profiler.dump()
+        except OSError as e: messagebox.showerror("Profile Error", f"ERROR writing profile report: {e}"); return
+        messagebox.showinfo("Profile Report", f"{profiler.report_text()}\n\nSaved to {txt_path} and {json_path}")
+
+    # --- SAVE / EXPORT (streamed to CSV, Excel or JSON Lines on a worker thread) ---
+    @instrumented
+    def show_export_view(self):
+        colors = self.get_colors()
+        self._switch_view("💾 Save / Export Residents")
+        
+        form = tk.LabelFrame(self.content_frame, text="Export Options", font=("Segoe UI", 12, "bold"), bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], padx=20, pady=15)
+        form.pack(fill='x', padx=20, pady=10)
+        option = lambda text, row: tk.Label(form, text=text, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 11, "bold")).grid(row=row, column=0, sticky='w', pady=6, padx=(0, 10))
+        
+        option("Residents:", 0)
+        self.export_subset = tk.StringVar(value='all')
+        for column, (value, text) in enumerate((('all', "All residents"), ('seniors', "Senior citizens (60+)"), ('pwd', "PWDs"), ('pregnant', "Pregnant")), start=1):
+            tk.Radiobutton(form, text=text, variable=self.export_subset, value=value, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], selectcolor=colors['INPUT_BG'], font=("Segoe UI", 11)).grid(row=0, column=column, sticky='w', padx=5)
+        
+        option("Sitio:", 1)
+        self.export_sitio = ttk.Combobox(form, values=["All Sitios"] + SITIO_CHOICES, state='readonly', font=("Segoe UI", 11), width=18)
+        self.export_sitio.set("All Sitios")
+        self.export_sitio.grid(row=1, column=1, columnspan=2, sticky='w', padx=5)
+        
+        option("Format:", 2)
+        self.export_format = tk.StringVar(value=EXPORT_FILE_TYPES[0][1])
+        for column, (text, extension) in enumerate(EXPORT_FILE_TYPES, start=1):
+            tk.Radiobutton(form, text=text, variable=self.export_format, value=extension, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], selectcolor=colors['INPUT_BG'], font=("Segoe UI", 11)).grid(row=2, column=column, sticky='w', padx=5)
+        
+        tk.Label(self.content_frame, text="Files keep the registry columns, so a CSV export can be loaded back as a registry. Large exports run in the background;\nprogress and a Cancel button are shown in the sidebar.",
+                 bg=colors['CONTENT_BG'], fg=colors['SECONDARY'], font=("Segoe UI", 10, "italic"), justify=tk.LEFT).pack(anchor='w', padx=20)
+        tk.Button(self.content_frame, text="💾 EXPORT...", command=self._start_export, bg='#2ECC71', fg='white', font=("Segoe UI", 14, "bold"), relief=tk.FLAT, pady=12).pack(pady=(15, 20), padx=20, fill='x')
+
+    def _start_export(self):
+        if self.export is not None: messagebox.showinfo("Export", "An export is already running. Cancel it or wait for it to finish."); return
+        extension = self.export_format.get()
+        file_type = next(file_type for file_type in EXPORT_FILE_TYPES if file_type[1] == extension)
+        filename = filedialog.asksaveasfilename(defaultextension=extension, initialfile=default_export_filename(extension), filetypes=[(file_type[0], "*" + extension)])
+        if not filename: return
+        
+        sitio = self.export_sitio.get()
+        candidates, keep = export_source(self.export_subset.get(), None if sitio == "All Sitios" else sitio) # Resolved here, on the Tk thread
+        self.export = BackgroundExport(filename, candidates, keep)
+        self.export.start()
+        self._set_export_progress(0.0, 0)
+        self.master.after(EXPORT_POLL_MS, self._poll_export)
+
+    def _cancel_export(self):
+        if self.export is not None: self.export.cancel()
+
+    def _set_export_progress(self, fraction, rows=None):
+        if fraction is None: self.export_status_frame.pack_forget(); return
+        if not self.export_status_frame.winfo_ismapped(): self.export_status_frame.pack(side='bottom', fill='x', padx=15, pady=10)
+        self.export_progress['value'] = fraction
+        self.export_status_label.config(text=f"Exporting... {rows:,} rows written" if not self.export.cancelled.is_set() else "Cancelling export...")
+
+    def _poll_export(self):
+        export = self.export
+        if export is None: return
+        result = None
+        try:
+            while result is None:
+                kind, rows, fraction = export.messages.get_nowait()
+                if kind == 'progress': self._set_export_progress(fraction, rows)
+                else: result = (kind, rows)
+        except queue.Empty: pass
+        if result is None: self.master.after(EXPORT_POLL_MS, self._poll_export); return
+        
+        self.export = None; self._set_export_progress(None)
+        kind, rows = result
+        if kind == 'done': messagebox.showinfo("Success", f"{rows:,} residents exported to:\n{export.path}")
+        elif kind == 'error': messagebox.showerror("Export Error", f"ERROR exporting data: {rows}")
+
+    # --- BULK EXCEL IMPORT ---
+    def import_excel(self):
+        sources = excel_import_sources()
+        if not sources: messagebox.showinfo("Import Excel", f"No '{EXCEL_IMPORT_ROOT}' folder with workbooks was found."); return
+        if not messagebox.askyesno("Import Excel", f"Import residents from the Excel workbooks in {len(sources)} folder(s)?\nResidents already in the registry are skipped."): return
+        
+        # Workbooks are read by a process pool from a helper thread; new residents are added back on the Tk thread
+        results = queue.Queue()
+        start = time.perf_counter()
+        def read_in_background():
+            try: results.put(('ok', read_excel_sources(sources)))
+            except Exception as e: results.put(('error', e))
+        threading.Thread(target=read_in_background, name="excel-import", daemon=True).start()
+        
+        def poll():
+            try: kind, payload = results.get_nowait()
+            except queue.Empty: self.master.after(LOAD_POLL_MS, poll); return
+            if kind == 'error': messagebox.showerror("Import Error", f"ERROR importing Excel files: {payload}"); return
+            
+            rows, rows_read = payload
+            try: added, duplicates = import_excel_rows(rows)
+            except RuntimeError as e: messagebox.showerror("Import Error", str(e)); return # Out of leased IDs (sync)
+            summary = excel_import_summary(rows, rows_read, added, duplicates, time.perf_counter() - start)
+            messagebox.showinfo("Import Complete", f"Rows read: {summary['rows_read']:,} ({summary['rows_per_second']:,.0f} rows/sec)\n"
+                                                   f"New residents added: {summary['added']:,}\nDuplicates skipped: {summary['duplicates']:,}\n"
+                                                   f"Blank rows skipped: {summary['skipped']:,}")
+            self.show_home_view()
+        self.master.after(LOAD_POLL_MS, poll)
+
     def _add_sidebar_divider(self, label):
         colors = self.get_colors()
         icon_map = {'DATA ENTRY': '✍️ ', 'RECORDS': '🗂️ ', 'ACTIONS': '⚙️ '}
@@ -265,8 +670,16 @@ class BHWApp:
         btn.pack(fill='x')
         
         # Hover effect
-        btn.bind("<Enter>", lambda e, b=btn, bc=bg_color: b.config(bg=colors['SIDEBAR_HOVER'], fg=colors['PRIMARY']))
-        btn.bind("<Leave>", lambda e, b=btn, bc=bg_color: b.config(bg=bc, fg=default_fg))
+        btn.bind("<Enter>", lambda e, b=btn: self._sidebar_hover(b, True))
+        btn.bind("<Leave>", lambda e, b=btn: self._sidebar_hover(b, False))
+
+    def _sidebar_hover(self, button, entering):
+        # Resting colors are read back on enter, so buttons recolored by a theme change restore the right ones
+        if entering:
+            colors = self.get_colors()
+            button.rest_colors = (button.cget('bg'), button.cget('fg'))
+            button.config(bg=colors['SIDEBAR_HOVER'], fg=colors['PRIMARY'])
+        elif hasattr(button, 'rest_colors'): button.config(bg=button.rest_colors[0], fg=button.rest_colors[1])
 
     def _create_sidebar_buttons(self):
         colors = self.get_colors()
@@ -279,17 +692,19 @@ class BHWApp:
         buttons = [
             ("🏠 Home / Dashboard", self.show_home_view, None, None, False),
             ("DATA ENTRY", None, None, None, True), 
-            ("  Add Resident", self.show_add_patient, None, None, False), 
-            ("  Update Record", self.show_update_record, None, None, False),
+            ("  Add Resident", self._when_loaded(self.show_add_patient, edits=True), None, None, False), 
+            ("  Update Record", self._when_loaded(self.show_update_record, edits=True), None, None, False),
             ("RECORDS / REPORTS", None, None, None, True),
-            ("👥 View All Residents", lambda: self.show_master_list(is_senior_view=False), None, None, False), 
-            ("👴 View Senior Citizens", lambda: self.show_master_list(is_senior_view=True), None, None, False), 
-            ("♿ View PWD Master List", self.show_pwd_list, None, None, False), 
-            ("🤰 Pregnant Scheduler", self.show_pregnant_scheduler, None, None, False),
-            ("🔎 View Profile", self.show_view_patient, None, None, False),
-            ("📈 Health Reports", self.generate_report, None, None, False),
+            ("👥 View All Residents", self._when_loaded(lambda: self.show_master_list(is_senior_view=False)), None, None, False), 
+            ("👴 View Senior Citizens", self._when_loaded(lambda: self.show_master_list(is_senior_view=True)), None, None, False), 
+            ("♿ View PWD Master List", self._when_loaded(self.show_pwd_list), None, None, False), 
+            ("🤰 Pregnant Scheduler", self._when_loaded(self.show_pregnant_scheduler), None, None, False),
+            ("📅 Checkup Calendar", self._when_loaded(self.show_checkup_calendar), None, None, False),
+            ("🔎 View Profile", self._when_loaded(self.show_view_patient), None, None, False),
+            ("📈 Health Reports", self._when_loaded(self.generate_report), None, None, False),
             ("SETTINGS / ACTIONS", None, None, None, True),
-            ("💾 SAVE DATA", save_data, colors['WARNING'], 'black', False), 
+            ("📥 Import Excel Files", self._when_loaded(self.import_excel, edits=True), None, None, False),
+            ("💾 SAVE DATA", self._when_loaded(self.show_export_view, edits=True), colors['WARNING'], 'black', False), 
             ("🚪 LOG OUT", self.logout, '#DC3545', 'white', False)
         ]
         
@@ -302,24 +717,58 @@ class BHWApp:
         # Space below Log Out button
         tk.Frame(self.sidebar, height=20, bg=colors['SIDEBAR_BG']).pack(fill='x', padx=10) 
         
-    def _apply_theme_setting(self):
+    def _apply_theme_setting(self, theme_name):
         global CURRENT_THEME_NAME
-        self.apply_styles()
+        previous_colors = dict(self.get_colors())
+        CURRENT_THEME_NAME = theme_name
+        self.apply_styles(previous_colors)
 
     def logout(self): 
         global LOGGED_IN_USER
         if messagebox.askyesno("Confirm Logout", "Are you sure you want to log out?"):
+            if self.loader is not None: self.loader.cancel(); self.loader = None
+            if self.export is not None: self.export.cancel(); self.export = None
+            patient_registry.unsubscribe(self._on_registry_change)
             LOGGED_IN_USER = None
             self.master.withdraw()
             self.show_login_callback() 
 
-    def _switch_view(self, title):
+    def _switch_view(self, title, cache_key=None):
+        """Makes content_frame a page for the view; returns True if the cached page for cache_key was shown again.
+        
+        Pages of cached views are only hidden when another view opens; all other pages are destroyed.
+        """
         colors = self.get_colors()
-        for widget in self.content_frame.winfo_children(): widget.destroy()
+        if self.content_frame is not None:
+            if self.current_page in self.pages: self.content_frame.pack_forget()
+            else: self.content_frame.destroy()
+        self.current_page = cache_key
+        self.master.title(f"BHW Connect: {title.strip()}")
+        if cache_key in self.pages:
+            self.content_frame = self.pages[cache_key]; self.content_frame.pack(fill='both', expand=True)
+            return True
         
+        self.content_frame = tk.Frame(self.content_host, bg=colors['CONTENT_BG'])
+        self.content_frame.pack(fill='both', expand=True)
+        if cache_key is not None: self.pages[cache_key] = self.content_frame
         tk.Label(self.content_frame, text=title, font=("Segoe UI", 20, "bold"), bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], pady=15).pack(fill='x', padx=10)
         tk.Frame(self.content_frame, height=2, bg=colors['SIDEBAR_HOVER']).pack(fill='x', padx=10, pady=(0, 15))
-        self.master.title(f"BHW Connect: {title.strip()}")
+        return False
+
+    def _show_cached_view(self, cache_key, title, build, refresh):
+        """Shows a view whose page is kept between visits: built once, then refreshed in place only when needed.
+        
+        refresh() runs on a revisit if the registry version or the date changed since the page was drawn;
+        it updates the data-bound labels/tables, or returns False to have the page rebuilt.
+        """
+        stamp = (patient_registry.version, date.today())
+        if self._switch_view(title, cache_key):
+            if self.page_stamps.get(cache_key) == stamp: return
+            if refresh() is not False: self.page_stamps[cache_key] = stamp; return
+            self.pages.pop(cache_key).destroy(); self.content_frame = None
+            self._switch_view(title, cache_key)
+        build()
+        self.page_stamps[cache_key] = stamp
         
     # --- Form Helper ---
     def _create_form_field(self, parent, label_text, row_num, column_num, columnspan=1, is_combobox=False, choices=None):
@@ -347,6 +796,7 @@ class BHWApp:
             return entry
     
     # --- SHOW ADD PATIENT VIEW (FIXED ALIGNMENT) ---
+    @instrumented
     def show_add_patient(self):
         colors = self.get_colors(); self._switch_view("✍️ Add New Resident / Household")
         notebook = ttk.Notebook(self.content_frame, padding=10); notebook.pack(pady=10, padx=20, fill='both', expand=True)
@@ -410,7 +860,6 @@ class BHWApp:
         tk.Button(self.content_frame, text="✅ SAVE NEW RESIDENT", command=self._add_patient_action, bg='#2ECC71', fg='white', font=("Segoe UI", 14, "bold"), relief=tk.FLAT, pady=12).pack(pady=(10, 20), padx=20, fill='x')
 
     def _add_patient_action(self):
-        global next_id
         name = self.name_entry.get().strip().upper()
         bday = self.bday_entry.get().strip()
         lmp = self.lmp_entry.get().strip().upper()
@@ -453,23 +902,25 @@ class BHWApp:
         health_status_str = ", ".join(health_statuses) if health_statuses else "N/A"
         
         # Save action
-        new_patient = {
-            'ID': next_id, 
-            'Name': name, 
-            'Birthday': bday, 
-            'LMP': lmp, 
-            'Sitio': sitio, 
-            'Health_Status': health_status_str, 
-            'Records': [f"REGISTRATION: {datetime.now().strftime('%Y-%m-%d')} - Initial Record Created."], 
-            'PWD_Type': pwd_type 
-        }
-        patient_registry.append(new_patient)
-        next_id += 1
+        try: patient_id = patient_registry.allocate_id()
+        except RuntimeError as e: messagebox.showerror("No Resident IDs", str(e)); return
+        new_patient = PatientRecord(
+            ID=patient_id, 
+            Name=name, 
+            Birthday=bday, 
+            LMP=lmp, 
+            Sitio=sitio, 
+            Health_Status=health_status_str, 
+            Records=[f"REGISTRATION: {datetime.now().strftime('%Y-%m-%d')} - Initial Record Created."], 
+            PWD_Type=pwd_type 
+        )
+        patient_registry.add(new_patient)
         
         messagebox.showinfo("Success", f"Resident {name} (ID: {new_patient['ID']}) successfully added!")
         self.show_home_view() 
 
     # --- UPDATE RECORD ---
+    @instrumented
     def show_update_record(self):
         # ... (Same as before) ...
         colors = self.get_colors()
@@ -484,23 +935,50 @@ class BHWApp:
         self.update_search_entry.pack(side=tk.LEFT, fill='x', expand=True, padx=5, ipady=3)
         
         tk.Button(search_frame, text="Search", command=self._search_patient_for_update, bg=colors['PRIMARY'], fg='white', relief=tk.FLAT).pack(side=tk.LEFT, padx=5)
+        self.update_search_entry.bind('<Return>', lambda e: self._search_patient_for_update())
+        
+        dropdown_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
+        dropdown_frame.pack(fill='x', padx=20)
+        LiveSearch(self.update_search_entry, dropdown_frame, self._show_update_form, colors)
         
         self.patient_info_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
         self.patient_info_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
+    def _show_search_candidates(self, parent, candidates, on_pick):
+        """Ranked candidate list (ID, prefix, then fuzzy matches); picking a row opens that resident."""
+        colors = self.get_colors()
+        for widget in parent.winfo_children(): widget.destroy()
+        
+        tk.Label(parent, text=f"{len(candidates)} matching residents (best match first) - select one:", bg=colors['CONTENT_BG'], fg=colors['SECONDARY'], font=("Segoe UI", 10, "bold"), anchor='w').pack(fill='x')
+        listbox = tk.Listbox(parent, height=min(len(candidates), 12), font=("Segoe UI", 11), bg=colors['INPUT_BG'], fg=colors['TEXT_COLOR'], selectbackground=colors['PRIMARY'], selectforeground='white', relief=tk.FLAT, activestyle='none')
+        for p in candidates: listbox.insert(tk.END, f"ID {p['ID']}  |  {p['Name']}  |  {p['Sitio']}  |  Born {p['Birthday']}")
+        listbox.pack(fill='x', pady=(5, 10))
+        
+        def pick(event=None):
+            if listbox.curselection(): on_pick(candidates[listbox.curselection()[0]])
+        listbox.bind('<<ListboxSelect>>', pick)
+        listbox.bind('<Return>', pick)
+
     def _search_patient_for_update(self):
         colors = self.get_colors()
         for widget in self.patient_info_frame.winfo_children(): widget.destroy()
-        search_term = self.update_search_entry.get()
-        self.current_patient = find_patient_by_id_or_name(search_term)
+        candidates = search_candidates(self.update_search_entry.get())
         
-        if not self.current_patient:
+        if not candidates:
+            self.current_patient = None
             tk.Label(self.patient_info_frame, text="Patient Not Found.", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 12, "bold")).pack(pady=20)
             return
+        if len(candidates) == 1: self._show_update_form(candidates[0])
+        else: self._show_search_candidates(self.patient_info_frame, candidates, self._show_update_form)
+
+    def _show_update_form(self, patient):
+        colors = self.get_colors()
+        for widget in self.patient_info_frame.winfo_children(): widget.destroy()
+        self.current_patient = patient
 
         info = self.current_patient
-        age = calculate_age(info.get('Birthday', 'N/A'))
-        edd, _ = calculate_edd_and_schedule(info.get('LMP', 'N/A'))
+        derived = get_derived(info)
+        age, edd = derived.age, derived.edd
         
         tk.Label(self.patient_info_frame, text=f"Patient ID: {info['ID']} | Name: {info['Name']}", bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], font=("Segoe UI", 14, "bold")).pack(pady=(10, 5))
         tk.Label(self.patient_info_frame, text=f"Age: {age} | Sitio: {info['Sitio']} | Health: {info['Health_Status']}", bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 11)).pack(pady=(0, 5))
@@ -568,41 +1046,42 @@ class BHWApp:
                  messagebox.showerror("Validation Error", "Invalid LMP Date format. Use YYYY-MM-DD."); return
 
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-        self.current_patient['Records'].insert(0, f"{timestamp}: {new_record_text}")
-        self.current_patient['Health_Status'] = new_status
-        self.current_patient['PWD_Type'] = new_pwd_type
-        self.current_patient['LMP'] = validated_lmp # Update with validated LMP
+        patient_registry.update(self.current_patient, record=f"{timestamp}: {new_record_text}", 
+                                Health_Status=new_status, PWD_Type=new_pwd_type, LMP=validated_lmp) # Update with validated LMP
 
         messagebox.showinfo("Success", f"Records for {self.current_patient['Name']} successfully updated!")
         self.show_update_record() 
 
     # --- HOME VIEW (Same as before) ---
+    @instrumented
     def show_home_view(self):
+        self._show_cached_view('home', "🏠 Home / Dashboard", self._build_home_view, self._refresh_home_counts)
+
+    def _build_home_view(self):
         colors = self.get_colors()
-        self._switch_view("🏠 Home / Dashboard")
+        self.home_value_labels = {}
         
-        total_patients = len(patient_registry)
-        senior_count = sum(1 for p in patient_registry if calculate_age(p.get('Birthday', '1900-01-01')) >= 60)
-        pregnant_count = sum(1 for p in patient_registry if p.get('LMP') and p['LMP'] != 'N/A' and calculate_edd_and_schedule(p['LMP'])[0] not in ["N/A", "Invalid LMP Date", "Delivered (Post-Partum)", "LMP too recent (Not Pregnant)"])
-        pwd_count = sum(1 for p in patient_registry if p.get('PWD_Type', 'NOT PWD') != 'NOT PWD') 
+        stats = registry_stats.snapshot()
+        total_patients, senior_count, pregnant_count, pwd_count = stats['total'], stats['senior'], stats['pregnant'], stats['pwd']
 
         card_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
         card_frame.pack(pady=20, fill='x')
         
-        def create_card(parent, label_text, value, bg_color, value_fg_color):
+        def create_card(parent, label_text, value, bg_color, value_fg_color, stat_key):
             card = tk.Frame(parent, bg=bg_color, relief=tk.RAISED, bd=2, padx=15, pady=15)
             card.pack(side=tk.LEFT, padx=15, expand=True, fill='x')
             tk.Label(card, text=label_text, font=("Segoe UI", 12, "bold"), bg=bg_color, fg=colors['SECONDARY'], anchor='w').pack(pady=(0, 5), fill='x')
-            tk.Label(card, text=value, font=("Segoe UI", 36, "bold"), bg=bg_color, fg=value_fg_color).pack(pady=(5, 0))
-        
-        create_card(card_frame, "TOTAL RESIDENTS", total_patients, colors['CARD_BG'], colors['PRIMARY']) 
-        create_card(card_frame, "SENIOR CITIZENS", senior_count, '#FCF3CF', '#F39C12')     
-        create_card(card_frame, "ACTIVE PREGNANT", pregnant_count, '#FADBD8', '#E74C3C')    
-        create_card(card_frame, "REGISTERED PWD", pwd_count, '#EBEDEF', '#5D6D7E') 
+            value_label = tk.Label(card, text=value, font=("Segoe UI", 36, "bold"), bg=bg_color, fg=value_fg_color)
+            value_label.pack(pady=(5, 0))
+            self.home_value_labels[stat_key] = value_label
+        
+        create_card(card_frame, "TOTAL RESIDENTS", total_patients, colors['CARD_BG'], colors['PRIMARY'], 'total') 
+        create_card(card_frame, "SENIOR CITIZENS", senior_count, '#FCF3CF', '#F39C12', 'senior')     
+        create_card(card_frame, "ACTIVE PREGNANT", pregnant_count, '#FADBD8', '#E74C3C', 'pregnant')    
+        create_card(card_frame, "REGISTERED PWD", pwd_count, '#EBEDEF', '#5D6D7E', 'pwd') 
 
         # Sitio Breakdown Layout 
-        sitio_counts = defaultdict(int)
-        for p in patient_registry: sitio_counts[p.get('Sitio', 'N/A')] += 1
+        sitio_counts = stats['sitio']
         
         sitio_frame = tk.LabelFrame(self.content_frame, text="📍 RESIDENTS PER SITIO BREAKDOWN", font=("Segoe UI", 12, "bold"), bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], padx=20, pady=15)
         sitio_frame.pack(pady=(40, 20), padx=20, fill='x', anchor='w')
@@ -617,111 +1096,255 @@ class BHWApp:
         for i, sitio in enumerate(sorted_sitios):
             count = sitio_counts[sitio]
             tk.Label(sitio_list_frame, text=f"• {sitio.capitalize()}:", bg=colors['CONTENT_BG'], fg=colors['SECONDARY'], font=("Segoe UI", 11, "bold"), anchor='w', padx=5).grid(row=i, column=0, sticky='w', pady=3)
-            tk.Label(sitio_list_frame, text=f"{count} Residents", bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], font=("Segoe UI", 11), anchor='w', padx=5).grid(row=i, column=1, sticky='w', pady=3)
-        
-        # Display N/A or Undefined
-        if sitio_counts['N/A'] > 0:
-              tk.Label(sitio_list_frame, text=f"• N/A or Undefined Sitio:", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 11, "bold"), anchor='w', padx=5).grid(row=len(sorted_sitios), column=0, sticky='w', pady=3)
-              tk.Label(sitio_list_frame, text=f"{sitio_counts['N/A']} Residents", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 11, "italic"), anchor='w', padx=5).grid(row=len(sorted_sitios), column=1, sticky='w', pady=3)
+            count_label = tk.Label(sitio_list_frame, text=f"{count} Residents", bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], font=("Segoe UI", 11), anchor='w', padx=5)
+            count_label.grid(row=i, column=1, sticky='w', pady=3)
+            self.home_value_labels[('sitio', sitio)] = count_label
+        
+        # Display N/A or Undefined (kept on the cached page and only shown while there are any)
+        self.home_na_row = (tk.Label(sitio_list_frame, text="• N/A or Undefined Sitio:", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 11, "bold"), anchor='w', padx=5),
+                            tk.Label(sitio_list_frame, text=f"{sitio_counts['N/A']} Residents", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 11, "italic"), anchor='w', padx=5))
+        for column, label in enumerate(self.home_na_row): label.grid(row=len(sorted_sitios), column=column, sticky='w', pady=3)
+        self.home_value_labels[('sitio', 'N/A')] = self.home_na_row[1]
+        if sitio_counts['N/A'] == 0:
+            for label in self.home_na_row: label.grid_remove()
+
+    def _refresh_home_counts(self):
+        """Updates the dashboard numbers in place (while residents load, and when the cached Home page is shown again)."""
+        if self.current_page != 'home' or not self.home_value_labels: return
+        stats = registry_stats.snapshot()
+        for key, label in self.home_value_labels.items():
+            label.config(text=f"{stats['sitio'][key[1]]} Residents" if isinstance(key, tuple) else stats[key])
+        for label in self.home_na_row: label.grid() if stats['sitio']['N/A'] else label.grid_remove()
 
     # --- LIST VIEWS (Same as before, updated to handle 'LMP too recent') ---
-    def _create_resident_table(self, data, title):
-        self._switch_view(title)
-        
+    def _create_resident_table(self, data, cache_key):
         table_frame = tk.Frame(self.content_frame, bg=self.get_colors()['CONTENT_BG'])
         table_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
         scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        columns = ('ID', 'Name', 'Age', 'Sitio', 'Health_Status', 'LMP', 'EDD', 'PWD_Type') 
-        tree = ttk.Treeview(table_frame, columns=columns, show='headings', yscrollcommand=scrollbar.set)
+        # Virtual table: only the rows in the viewport exist as Tcl items, formatted on demand
+        table = VirtualTreeview(table_frame, RESIDENT_COLUMNS, data, format_resident_row, scrollbar)
         
         # Configure Columns
         col_widths = {'ID': 50, 'Name': 200, 'Age': 60, 'Sitio': 100, 'Health_Status': 150, 'LMP': 100, 'EDD': 100, 'PWD_Type': 150}
         
-        for col in columns: 
-            tree.column(col, width=col_widths.get(col, 100), anchor='center' if col not in ['Name', 'Health_Status', 'PWD_Type'] else 'w')
-            tree.heading(col, text=col.replace('_', ' ').upper())
+        for col in RESIDENT_COLUMNS: 
+            table.tree.column(col, width=col_widths.get(col, 100), anchor='center' if col not in ['Name', 'Health_Status', 'PWD_Type'] else 'w')
+            table.tree.heading(col, command=lambda c=col: self._sort_list(cache_key, c)) # Click to sort, again to reverse
+        self._update_sort_headings(cache_key, table)
+
+        table.tree.pack(fill='both', expand=True)
+        return table
+
+    def _update_sort_headings(self, cache_key, table):
+        state = self.list_states[cache_key]
+        for col in RESIDENT_COLUMNS:
+            arrow = (" ▼" if state['descending'] else " ▲") if col == state['sort'] else ""
+            table.tree.heading(col, text=col.replace('_', ' ').upper() + arrow)
+
+    def _create_filter_chips(self, cache_key):
+        """Toggle chips per Sitio, illness and PWD type above a resident table: chips in one row are OR-ed, rows are AND-ed."""
+        colors, filters = self.get_colors(), self.list_states[cache_key]['filters']
+        chips_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
+        chips_frame.pack(fill='x', padx=20)
+        
+        chip_vars = self.list_chip_vars[cache_key] = {} # Kept here: a BooleanVar with no Python reference loses its value
+        for row, (facet, label, choices) in enumerate((('Sitio', "Sitio:", SITIO_CHOICES), ('Health_Status', "Health:", DISEASE_CHOICES), ('PWD_Type', "PWD:", PWD_CHOICES))):
+            tk.Label(chips_frame, text=label, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 10, "bold")).grid(row=row, column=0, sticky='w', padx=(0, 6), pady=2)
+            for column, value in enumerate(choices, start=1):
+                var = chip_vars[(facet, value)] = tk.BooleanVar(value=value in filters.get(facet, ()))
+                tk.Checkbutton(chips_frame, text=value, variable=var, indicatoron=False, command=lambda f=facet, v=value: self._toggle_list_filter(cache_key, f, v),
+                               bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], selectcolor=colors['SIDEBAR_HOVER'], font=("Segoe UI", 9), relief=tk.GROOVE, padx=8, pady=1).grid(row=row, column=column, sticky='w', padx=2, pady=2)
+        
+        status_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
+        status_frame.pack(fill='x', padx=20, pady=(4, 0))
+        self.list_count_labels[cache_key] = tk.Label(status_frame, bg=colors['CONTENT_BG'], fg=colors['SECONDARY'], font=("Segoe UI", 10, "italic"))
+        self.list_count_labels[cache_key].pack(side=tk.LEFT)
+        tk.Button(status_frame, text="✖ Clear Filters", command=lambda: self._clear_list_filters(cache_key), bg=colors['SECONDARY'], fg='white', font=("Segoe UI", 9, "bold"), relief=tk.FLAT, padx=8).pack(side=tk.RIGHT)
+
+    def _query_list(self, cache_key, data):
+        """The list's rows under its sort and filters (data itself when neither is set), sorted and filtered by list_index."""
+        state = self.list_states[cache_key]
+        if state['sort'] is None and not any(state['filters'].values()): return data
+        return list_index.select(None if data is patient_registry else [p['ID'] for p in data], state['filters'], state['sort'], state['descending'])
+
+    def _list_is_queried(self, cache_key):
+        state = self.list_states.get(cache_key)
+        return state is not None and (state['sort'] is not None or any(state['filters'].values()))
+
+    def _update_list_count(self, cache_key):
+        label = self.list_count_labels.get(cache_key)
+        if label is not None: label.config(text=f"{len(self.resident_tables[cache_key].data):,} residents listed")
+
+    def _requery_list(self, cache_key, to_top=False):
+        """Re-runs the list's query into its table; the scroll position is kept unless to_top."""
+        table = self.resident_tables[cache_key]
+        if to_top: table.offset = 0
+        table.set_data(self._query_list(cache_key, self.list_sources[cache_key]()))
+        self._update_list_count(cache_key)
+        self.page_stamps[cache_key] = (patient_registry.version, date.today())
+
+    def _sort_list(self, cache_key, column):
+        state = self.list_states[cache_key]
+        state['descending'] = state['sort'] == column and not state['descending']
+        state['sort'] = column
+        self._requery_list(cache_key, to_top=True)
+        self._update_sort_headings(cache_key, self.resident_tables[cache_key])
+
+    def _toggle_list_filter(self, cache_key, facet, value):
+        values = self.list_states[cache_key]['filters'].setdefault(facet, set())
+        (values.add if self.list_chip_vars[cache_key][(facet, value)].get() else values.discard)(value)
+        self._requery_list(cache_key, to_top=True)
+
+    def _clear_list_filters(self, cache_key):
+        self.list_states[cache_key]['filters'].clear()
+        for var in self.list_chip_vars[cache_key].values(): var.set(False)
+        self._requery_list(cache_key, to_top=True)
+
+    def _create_pregnant_table(self, data):
+        table_frame = tk.Frame(self.content_frame, bg=self.get_colors()['CONTENT_BG'])
+        table_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        table = VirtualTreeview(table_frame, PREGNANT_COLUMNS, data, format_pregnant_row, scrollbar)
         
-        # Insert Data
-        for p in data:
-            age = calculate_age(p['Birthday'])
-            edd, _ = calculate_edd_and_schedule(p.get('LMP', 'N/A'))
-            
-            # Display logic for LMP too recent
-            edd_display = edd
-            if edd == "LMP too recent (Not Pregnant)":
-                edd_display = "N/A (LMP too recent)"
-            
-            tree.insert('', tk.END, values=(
-                p['ID'], 
-                p['Name'], 
-                age if age != -1 else 'N/A', 
-                p['Sitio'], 
-                p['Health_Status'], 
-                p.get('LMP', 'N/A'), 
-                edd_display, 
-                p.get('PWD_Type', 'NOT PWD')
-            ))
+        col_widths = {'ID': 50, 'Name': 180, 'LMP': 120, 'EDD': 120, 'Sitio': 80, 'Next_Checkup': 300}
+        col_headings = {'LMP': "LAST MENSTRUAL", 'EDD': "EDD (EXPECTED)", 'Next_Checkup': "SCHEDULES/NEXT CHECK-UP"}
+        
+        for col in PREGNANT_COLUMNS: 
+            table.tree.column(col, width=col_widths.get(col, 100), anchor='center' if col not in ['Name', 'Next_Checkup'] else 'w')
+            table.tree.heading(col, text=col_headings.get(col, col.upper()))
 
-        tree.pack(fill='both', expand=True)
-        scrollbar.config(command=tree.yview)
+        table.tree.pack(fill='both', expand=True)
+        return table
 
+    def _show_resident_list(self, cache_key, title, rows, empty_text=None, create_table=None):
+        """Cached resident table; rows() returns the current residents, re-read only when the registry changed.
+        
+        Filtered lists (LIST_FILTERS) must come back ID-sorted: adds and edits are then patched in by _on_registry_change.
+        """
+        def build():
+            data = rows()
+            if not data and empty_text:
+                tk.Label(self.content_frame, text=empty_text, bg=self.get_colors()['CONTENT_BG'], fg=self.get_colors()['TEXT_COLOR'], font=("Segoe UI", 14, "bold")).pack(pady=50)
+                self.resident_tables[cache_key] = None
+            elif create_table: self.resident_tables[cache_key] = create_table(data)
+            else: # Resident lists get sortable headings and filter chips; their sort and filters outlive rebuilds
+                self.list_sources[cache_key] = rows
+                self.list_states.setdefault(cache_key, {'sort': None, 'descending': False, 'filters': {}})
+                self._create_filter_chips(cache_key)
+                self.resident_tables[cache_key] = self._create_resident_table(self._query_list(cache_key, data), cache_key)
+                self._update_list_count(cache_key)
+        
+        def refresh():
+            table, data = self.resident_tables.get(cache_key), rows()
+            if (table is None) != (not data and bool(empty_text)): return False # Switches between the table and the empty message
+            if table is not None: table.set_data(data if create_table else self._query_list(cache_key, data)); self._update_list_count(cache_key)
+        
+        self._show_cached_view(cache_key, title, build, refresh)
+
+    @instrumented
     def show_master_list(self, is_senior_view=False):
-        title = "👴 Senior Citizens List (60+ Y.O.)" if is_senior_view else "👥 Master Resident List (All Residents)"
-        data = [p for p in patient_registry if calculate_age(p.get('Birthday', '1900-01-01')) >= 60] if is_senior_view else patient_registry 
-        self._create_resident_table(data, title)
+        if is_senior_view: # Seniors come from the birth-date index (a range query) instead of computing every resident's age
+            self._show_resident_list('seniors', "👴 Senior Citizens List (60+ Y.O.)", lambda: [patient_registry.get(patient_id) for patient_id in sorted(age_index.cohort_ids(60))])
+        else: self._show_resident_list('residents', "👥 Master Resident List (All Residents)", lambda: patient_registry)
         
-    def show_pwd_list(self): 
-        colors = self.get_colors()
-        self._switch_view("♿ PWD Master List (Persons with Disability)")
-        pwd_data = [p for p in patient_registry if p.get('PWD_Type', 'NOT PWD') != 'NOT PWD']
+    def _on_registry_change(self, event, patients, changes):
+        """Applies added and edited residents to the built list pages row by row, so showing them again costs no repopulation.
         
-        if not pwd_data: 
-            tk.Label(self.content_frame, text="No registered PWDs in the system.", bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 14, "bold")).pack(pady=50)
-            return
-            
-        self._create_resident_table(pwd_data, "♿ PWD Master List (Persons with Disability)") 
+        Only pages that were current up to this change are patched; bulk loads, clears and pages that are
+        already stale are left to the full refresh in _show_cached_view.
+        """
+        if event not in ('add', 'update'): return
+        today = date.today()
+        for cache_key, table in self.resident_tables.items():
+            if table is None or self.page_stamps.get(cache_key) != (patient_registry.version - 1, today): continue
+            if self._patch_list_page(cache_key, table, event, patients): self.page_stamps[cache_key] = (patient_registry.version, today)
+
+    def _patch_list_page(self, cache_key, table, event, patients):
+        """Inserts, removes or rewrites the changed residents' rows; False if the page needs a full refresh instead."""
+        if self._list_is_queried(cache_key): # Rows are placed by sort key and chips: the indexed query is re-run instead
+            if cache_key != self.current_page: return False
+            self._requery_list(cache_key); return True
+        if cache_key == 'residents': # The registry itself, where new residents are appended
+            if event == 'add': table.rows_inserted(len(patient_registry) - len(patients), len(patients))
+            else: table.row_changed(patients[0])
+        else:
+            rows, belongs = table.data, self.LIST_FILTERS[cache_key]
+            for p in patients:
+                index = _id_position(rows, p['ID']); present = index < len(rows) and rows[index] is p
+                if belongs(p) and not present: rows.insert(index, p); table.rows_inserted(index)
+                elif present and not belongs(p): del rows[index]; table.row_removed(index)
+                elif present: table.row_changed(p)
+        self._update_list_count(cache_key)
+        return cache_key == 'residents' or bool(table.data) # An emptied list is redrawn with its empty message on the next visit
+
+    @instrumented
+    def show_pwd_list(self): 
+        self._show_resident_list('pwd', "♿ PWD Master List (Persons with Disability)", 
+                                 lambda: sorted(registry_subset('pwd_ids', self.LIST_FILTERS['pwd']), key=lambda p: p['ID']), "No registered PWDs in the system.")
         
+    @instrumented
     def show_pregnant_scheduler(self):
-        self._switch_view("🤰 Pregnant: EDD and Midwife Scheduler")
-        
-        pregnant_patients = [
-            p for p in patient_registry 
-            if p.get('LMP') and p['LMP'] != 'N/A' and 
-            calculate_edd_and_schedule(p['LMP'])[0] not in ["N/A", "Invalid LMP Date", "Delivered (Post-Partum)", "LMP too recent (Not Pregnant)"]
-        ]
+        self._show_resident_list('pregnant', "🤰 Pregnant: EDD and Midwife Scheduler", 
+                                 lambda: sorted(registry_subset('pregnant_ids', self.LIST_FILTERS['pregnant']), key=lambda p: p['ID']),
+                                 "No active pregnant patients in the list.", self._create_pregnant_table)
+
+    # --- CHECKUP CALENDAR (Prenatal checkups due per day/week, grouped by Sitio) ---
+    @instrumented
+    def show_checkup_calendar(self, anchor_day=None, mode=None):
+        colors = self.get_colors()
+        self._switch_view("📅 Prenatal Checkup Calendar")
+        self.calendar_day = anchor_day or getattr(self, 'calendar_day', None) or date.today()
+        self.calendar_mode = mode or getattr(self, 'calendar_mode', 'week')
         
-        if not pregnant_patients: 
-            tk.Label(self.content_frame, text="No active pregnant patients in the list.", bg=self.get_colors()['CONTENT_BG'], fg=self.get_colors()['TEXT_COLOR'], font=("Segoe UI", 14, "bold")).pack(pady=50)
+        if self.calendar_mode == 'week': # Monday-to-Sunday week containing the anchor day
+            start = self.calendar_day - timedelta(days=self.calendar_day.weekday()); end = start + timedelta(days=6)
+            step, period = timedelta(weeks=1), f"{start.strftime('%b %d')} – {end.strftime('%b %d, %Y')}"
+        else:
+            start = end = self.calendar_day
+            step, period = timedelta(days=1), start.strftime('%A, %b %d, %Y')
+        
+        nav = tk.Frame(self.content_frame, bg=colors['CONTENT_BG']); nav.pack(fill='x', padx=20)
+        nav_button = lambda text, command: tk.Button(nav, text=text, command=command, bg=colors['PRIMARY'], fg='white', font=("Segoe UI", 10, "bold"), relief=tk.FLAT, padx=10).pack(side=tk.LEFT, padx=3)
+        nav_button("◀", lambda: self.show_checkup_calendar(self.calendar_day - step))
+        nav_button("Today", lambda: self.show_checkup_calendar(date.today()))
+        nav_button("▶", lambda: self.show_checkup_calendar(self.calendar_day + step))
+        other_mode = 'day' if self.calendar_mode == 'week' else 'week'
+        nav_button(f"{other_mode.title()} View", lambda: self.show_checkup_calendar(mode=other_mode))
+        tk.Label(nav, text=period, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 13, "bold")).pack(side=tk.LEFT, padx=15)
+        
+        due_by_sitio = checkup_calendar.due_between_by_sitio(start, end)
+        if not due_by_sitio:
+            tk.Label(self.content_frame, text="No prenatal checkups due in this period.", bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 14, "bold")).pack(pady=50)
             return
 
-        table_frame = tk.Frame(self.content_frame, bg=self.get_colors()['CONTENT_BG'])
+        table_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
         table_frame.pack(fill='both', expand=True, padx=20, pady=10)
-        
         scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        columns = ('ID', 'Name', 'LMP', 'EDD', 'Sitio', 'Next_Checkup')
-        tree = ttk.Treeview(table_frame, columns=columns, show='headings', yscrollcommand=scrollbar.set)
-        
-        col_widths = {'ID': 50, 'Name': 180, 'LMP': 120, 'EDD': 120, 'Sitio': 80, 'Next_Checkup': 300}
-        col_headings = {'LMP': "LAST MENSTRUAL", 'EDD': "EDD (EXPECTED)", 'Next_Checkup': "SCHEDULES/NEXT CHECK-UP"}
-        
-        for col in columns: 
-            tree.column(col, width=col_widths.get(col, 100), anchor='center' if col not in ['Name', 'Next_Checkup'] else 'w')
-            tree.heading(col, text=col_headings.get(col, col.upper()))
-
-        for p in pregnant_patients:
-            edd, schedule = calculate_edd_and_schedule(p['LMP'])
-            next_checkup_display = schedule[0] if schedule else "No upcoming checkups."
-            tree.insert('', tk.END, values=(p['ID'], p['Name'], p['LMP'], edd, p['Sitio'], next_checkup_display))
+        # Sitio rows with the residents due under them
+        columns = ('Date', 'ID', 'Name', 'Week', 'EDD')
+        tree = ttk.Treeview(table_frame, columns=columns, show='tree headings', yscrollcommand=scrollbar.set)
+        tree.heading('#0', text='SITIO'); tree.column('#0', width=160)
+        for col, width in zip(columns, (130, 60, 200, 80, 120)):
+            tree.column(col, width=width, anchor='w' if col == 'Name' else 'center')
+            tree.heading(col, text=col.upper())
+        
+        for sitio, entries in due_by_sitio.items():
+            parent = tree.insert('', tk.END, text=f"{sitio} ({len(entries)})", open=True)
+            for day, p, week in entries:
+                tree.insert(parent, tk.END, values=(day.strftime('%a %Y-%m-%d'), p['ID'], p['Name'], f"Week {week}", get_derived(p).edd))
 
         tree.pack(fill='both', expand=True)
         scrollbar.config(command=tree.yview)
 
     # --- PROFILE VIEW (Same as before, updated to handle 'LMP too recent') ---
+    @instrumented
     def show_view_patient(self):
         colors = self.get_colors()
         self._switch_view("🔎 View Resident Profile / History")
@@ -735,6 +1358,11 @@ class BHWApp:
         self.profile_search_entry.pack(side=tk.LEFT, fill='x', expand=True, padx=5, ipady=3)
         
         tk.Button(search_frame, text="Search", command=self._search_patient_for_profile, bg=colors['PRIMARY'], fg='white', relief=tk.FLAT).pack(side=tk.LEFT, padx=5)
+        self.profile_search_entry.bind('<Return>', lambda e: self._search_patient_for_profile())
+        
+        dropdown_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
+        dropdown_frame.pack(fill='x', padx=20)
+        LiveSearch(self.profile_search_entry, dropdown_frame, self._show_profile, colors)
         
         self.profile_display_frame = tk.Frame(self.content_frame, bg=colors['CONTENT_BG'])
         self.profile_display_frame.pack(fill='both', expand=True, padx=20, pady=10)
@@ -742,16 +1370,23 @@ class BHWApp:
     def _search_patient_for_profile(self):
         colors = self.get_colors()
         for widget in self.profile_display_frame.winfo_children(): widget.destroy()
+        candidates = search_candidates(self.profile_search_entry.get())
         
-        self.current_patient_profile = find_patient_by_id_or_name(self.profile_search_entry.get())
-        
-        if not self.current_patient_profile: 
+        if not candidates: 
+            self.current_patient_profile = None
             tk.Label(self.profile_display_frame, text="Patient Not Found.", bg=colors['CONTENT_BG'], fg='#DC3545', font=("Segoe UI", 12, "bold")).pack(pady=20)
             return
+        if len(candidates) == 1: self._show_profile(candidates[0])
+        else: self._show_search_candidates(self.profile_display_frame, candidates, self._show_profile)
+
+    def _show_profile(self, patient):
+        colors = self.get_colors()
+        for widget in self.profile_display_frame.winfo_children(): widget.destroy()
+        self.current_patient_profile = patient
 
         info = self.current_patient_profile
-        age = calculate_age(info.get('Birthday', 'N/A'))
-        edd, schedule = calculate_edd_and_schedule(info.get('LMP', 'N/A'))
+        derived = get_derived(info)
+        age, edd, schedule = derived.age, derived.edd, derived.schedule
         
         # Profile Card
         card = tk.Frame(self.profile_display_frame, bg=colors['CARD_BG'], padx=20, pady=15, relief=tk.RIDGE, bd=2)
@@ -787,25 +1422,39 @@ class BHWApp:
         history_text.config(state=tk.DISABLED) 
         
     # --- REPORTS VIEW (Same as before) ---
+    @instrumented
     def generate_report(self):
+        self._show_cached_view('report', "📈 Health Reports & Summary", self._build_report_view, self._refresh_report_view)
+
+    def _build_report_view(self):
         colors = self.get_colors()
-        self._switch_view("📈 Health Reports & Summary")
-        total = len(patient_registry)
-        
-        illness_counts = defaultdict(int)
-        pwd_counts = defaultdict(int)
-        
-        for p in patient_registry:
-            # Count Illnesses
-            for status in p['Health_Status'].split(', '):
-                if status and status != 'N/A': illness_counts[status] += 1
-            # Count PWD Types
-            pwd_counts[p.get('PWD_Type', 'NOT PWD')] += 1
+        tk.Button(self.content_frame, text="📤 Export Cross-Tabs (CSV)", command=self._export_crosstabs, bg=colors['PRIMARY'], fg='white', font=("Segoe UI", 11, "bold"), relief=tk.FLAT, padx=12, pady=6).pack(anchor='e', padx=20)
+        notebook = ttk.Notebook(self.content_frame, padding=10); notebook.pack(pady=10, padx=20, fill='both', expand=True)
+        summary_tab = ttk.Frame(notebook, style='Custom.TFrame'); notebook.add(summary_tab, text='📋 Summary')
 
-        def create_report_frame(title, counts_dict):
-            frame = tk.LabelFrame(self.content_frame, text=title, font=("Segoe UI", 12, "bold"), bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], padx=20, pady=15)
+        self.report_summary_labels = {}
+        for title in ("Primary Illnesses Breakdown (Excluding Normal)", "PWD Category Breakdown"):
+            frame = tk.LabelFrame(summary_tab, text=title, font=("Segoe UI", 12, "bold"), bg=colors['CONTENT_BG'], fg=colors['PRIMARY'], padx=20, pady=15)
             frame.pack(pady=10, padx=20, fill='x', anchor='w')
-            
+            self.report_summary_labels[title] = tk.Label(frame, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 11), justify=tk.LEFT)
+            self.report_summary_labels[title].pack(fill='x', padx=5, pady=5)
+        
+        # One tab per DOH cross-tab, all built in one go (column-wise with numpy, else a single pass over the registry)
+        self.report_crosstabs = self._crosstab_report()
+        self.report_tables = []
+        for tab in self.report_crosstabs:
+            frame = ttk.Frame(notebook, style='Custom.TFrame', padding=10); notebook.add(frame, text=tab.title)
+            self.report_tables.append(self._create_crosstab_table(frame))
+        self._refresh_report_view(self.report_crosstabs)
+
+    def _refresh_report_view(self, crosstabs=None):
+        """Recomputes the report numbers and rewrites the summary labels and cross-tab rows of the cached page."""
+        # With numpy the report is recomputed column-wise; otherwise the incremental counters are used
+        stats = columnar_analytics.dashboard() if columnar_analytics is not None and columnar_analytics.complete else registry_stats.snapshot()
+        total = stats['total']
+        
+        # Counters are maintained incrementally; drop categories that fell back to zero
+        for title, counts_dict in zip(self.report_summary_labels, (+stats['illness'], +stats['pwd_types'])):
             report_text = ""
             if counts_dict:
                 # Sort by count descending
@@ -816,11 +1465,41 @@ class BHWApp:
                     report_text += f"• {item}: {count} Residents ({percentage:.1f}%)\n"
             else: 
                 report_text = "No data recorded."
-                
-            tk.Label(frame, text=report_text, bg=colors['CONTENT_BG'], fg=colors['TEXT_COLOR'], font=("Segoe UI", 11), justify=tk.LEFT).pack(fill='x', padx=5, pady=5)
+            self.report_summary_labels[title].config(text=report_text)
+        
+        self.report_crosstabs = crosstabs or self._crosstab_report()
+        for tree, tab in zip(self.report_tables, self.report_crosstabs): self._fill_crosstab_table(tree, tab.table())
+
+    def _crosstab_report(self):
+        if columnar_analytics is not None and columnar_analytics.complete: return columnar_analytics.crosstab_report()
+        return build_crosstab_report(patient_registry)
+
+    def _create_crosstab_table(self, parent):
+        tree = ttk.Treeview(parent, show='headings')
+        tree.pack(fill='both', expand=True)
+        return tree
+
+    def _fill_crosstab_table(self, tree, rows):
+        header, body = rows[0], rows[1:]
+        columns = tuple(f"c{i}" for i in range(len(header)))
+        if tuple(tree['columns']) != columns: tree.configure(columns=columns) # A new category adds a column
+        for column, heading in zip(columns, header):
+            tree.heading(column, text=heading)
+            tree.column(column, width=170 if column == 'c0' else 90, anchor=tk.W if column == 'c0' else tk.CENTER, stretch=True)
+        tree.configure(height=len(body))
+        tree.delete(*tree.get_children())
+        for row in body: tree.insert('', tk.END, values=row)
 
-        create_report_frame("Primary Illnesses Breakdown (Excluding Normal)", illness_counts)
-        create_report_frame("PWD Category Breakdown", pwd_counts)
+    def _export_crosstabs(self):
+        default_filename = f"BHW_Health_Report_{datetime.now().strftime('%Y%m%d')}.csv"
+        filename = filedialog.asksaveasfilename(defaultextension=".csv", initialfile=default_filename, filetypes=[("CSV files (Excel Compatible)", "*.csv")])
+        if not filename: return
+        
+        try:
+            write_crosstabs_csv(filename, self.report_crosstabs)
+            messagebox.showinfo("Success", f"Health report tables saved to:\n{filename}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"ERROR exporting report: {e}")
 
 def run_app():
     """Starts the main BHWApp interface after successful login."""
@@ -850,6 +1529,11 @@ def start_login_screen():
     LoginScreen(root, run_app)
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # Shard workers (BHW_STORAGE=sharded) re-launch the frozen executable
+    parser = argparse.ArgumentParser(description="BHW Connect resident registry (Tk client).")
+    parser.add_argument('--profile', action='store_true', help="time the instrumented steps; bhw_profile.txt/.json are written at exit")
+    args, _ = parser.parse_known_args() # Leaves arguments meant for Tk or a frozen executable alone
+    if args.profile: enable_profiling()
     root = tk.Tk()
     start_login_screen()
     root.mainloop()
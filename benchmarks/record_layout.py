@@ -0,0 +1,59 @@
+"""Compares memory per resident and load time of the compact PatientRecord loader against
+the original dict-of-strings layout (csv.DictReader + eager Records split).
+
+Usage: python benchmarks/record_layout.py [registry.csv]
+"""
+import csv
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bhw_core
+
+
+def load_as_dicts(path):
+    """The pre-PatientRecord loader: one dict per row and every visit history split eagerly."""
+    patients = []
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file, fieldnames=bhw_core.FIELDNAMES)
+        next(reader, None)
+        for row in reader:
+            if 'PWD_Type' not in row or not row['PWD_Type']: row['PWD_Type'] = 'NOT PWD'
+            if 'LMP' not in row or not row['LMP']: row['LMP'] = 'N/A'
+            row['Records'] = row['Records'].split(';') if row['Records'] else []
+            row['ID'] = int(row['ID'])
+            patients.append(row)
+    return patients
+
+
+def load_as_records(path):
+    patients = []
+    for chunk, _ in bhw_core.iter_registry_chunks(path): patients.extend(chunk)
+    return patients
+
+
+def measure(loader, path):
+    # Time and memory are taken in separate passes; tracemalloc slows allocation-heavy code a lot
+    start = time.perf_counter()
+    loader(path)
+    seconds = time.perf_counter() - start
+    
+    tracemalloc.start()
+    patients = loader(path)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'residents': len(patients), 'seconds': round(seconds, 4), 'bytes_per_resident': round(current / max(len(patients), 1))}
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else bhw_core.DATA_FILE
+    results = {'dict_of_strings': measure(load_as_dicts, path), 'patient_record': measure(load_as_records, path)}
+    for layout, result in results.items():
+        print(f"{layout:16} {result['residents']:>9,} residents  {result['seconds']:>8.3f} s  {result['bytes_per_resident']:>6,} B/resident")
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,163 @@
+"""Headless benchmark suite: load, save, search, dashboard, reports, table rows and list sorting on synthetic registries.
+
+Each size gets a fresh registry generated from the seed and a fixed reference date (see synthetic.py),
+so every run benchmarks the same data. Results are written as JSON; pass --baseline to compare against
+an earlier run and flag timings that got slower (its seed and reference date are reused by default).
+
+Usage:
+    python benchmarks/suite.py [--sizes 1000,10000,100000] [--output results.json] [--seed N]
+                               [--reference-date YYYY-MM-DD] [--baseline baseline.json] [--tolerance 1.25]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bhw_core
+from bhw_core.analytics import columnar_analytics
+from synthetic import DEFAULT_SEED, write_synthetic_csv
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_REFERENCE_DATE = date(2025, 1, 1) # Birthdays, LMPs and visits are generated relative to this day
+ALL_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SEARCH_QUERIES = 50
+TABLE_PAGE_ROWS = 30 # Roughly one screen of the resident table
+NOISE_FLOOR_S = 0.002 # Slowdowns smaller than this (absolute) are not reported as regressions
+
+
+def timed(func, repeat=1):
+    """Median wall time of `repeat` calls, in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def reset_registry():
+    bhw_core.patient_registry.clear(); bhw_core.derived_cache.clear()
+
+
+def load_registry(path):
+    """The app's load pipeline: chunked CSV parse, worker-side warm-up, then registry insert."""
+    reset_registry()
+    for chunk, _ in bhw_core.iter_registry_chunks(path):
+        bhw_core.prepare_loaded_chunk(chunk)
+        bhw_core.apply_loaded_chunk(chunk)
+
+
+def search_terms(rng):
+    """Exact names, name prefixes, IDs and one-typo names, drawn from the loaded registry."""
+    patients, terms = bhw_core.patient_registry, []
+    for _ in range(SEARCH_QUERIES):
+        p = patients[rng.randrange(len(patients))]
+        name = p['Name']
+        i = rng.randrange(1, len(name) - 1)
+        terms.extend((name, name[:4], str(p['ID']), name[:i] + name[i + 1:]))
+    return terms
+
+
+def run_size(residents, seed, today, workdir):
+    rng = random.Random(seed)
+    csv_path = os.path.join(workdir, f"registry_{residents}.csv")
+    results = {'generate_s': timed(lambda: write_synthetic_csv(csv_path, residents, seed, today))}
+    results['load_s'] = timed(lambda: load_registry(csv_path))
+    # The report metrics below are for the reference day: derive it up front, as the app has its current day derived after loading
+    bhw_core.derived_cache.fill(bhw_core.patient_registry, today)
+
+    save_path = os.path.join(workdir, f"saved_{residents}.csv")
+    results['save_s'] = timed(lambda: bhw_core.write_registry_csv(save_path, bhw_core.patient_registry), repeat=3 if residents <= 100_000 else 1)
+
+    terms = search_terms(rng)
+    lookups = [timed(lambda term=term: bhw_core.find_patient_by_id_or_name(term)) for term in terms]
+    candidates = [timed(lambda term=term: bhw_core.search_candidates(term)) for term in terms]
+    results['search_lookup_median_ms'] = statistics.median(lookups) * 1000
+    results['search_candidates_median_ms'] = statistics.median(candidates) * 1000
+    results['search_candidates_p95_ms'] = sorted(candidates)[int(len(candidates) * 0.95)] * 1000
+
+    results['dashboard_incremental_ms'] = timed(bhw_core.registry_stats.snapshot, repeat=5) * 1000
+    results['dashboard_full_scan_s'] = timed(lambda: bhw_core.compute_stats_full_scan(bhw_core.patient_registry, today))
+    if columnar_analytics is not None: results['dashboard_columnar_ms'] = timed(lambda: columnar_analytics.dashboard(today), repeat=3) * 1000
+    results['crosstab_report_s'] = timed(lambda: bhw_core.build_crosstab_report(bhw_core.patient_registry, today))
+    if columnar_analytics is not None: results['crosstab_report_columnar_s'] = timed(lambda: columnar_analytics.crosstab_report(today))
+
+    # Table population: the virtual table only formats the rows on screen; a full table formats every row
+    page = range(0, min(TABLE_PAGE_ROWS, residents))
+    results['table_page_ms'] = timed(lambda: [bhw_core.format_resident_row(bhw_core.patient_registry[i]) for i in page], repeat=5) * 1000
+    results['table_all_rows_s'] = timed(lambda: [bhw_core.format_resident_row(p) for p in bhw_core.patient_registry], repeat=3 if residents <= 100_000 else 1)
+    results['senior_list_ms'] = timed(lambda: bhw_core.age_index.cohort_ids(60), repeat=5) * 1000
+
+    # List view sorting and filter chips; the first call builds the order / facet sets, the median reflects reuse
+    chips = {'Sitio': set(bhw_core.SITIO_CHOICES[:2]), 'Health_Status': {'Hypertension'}}
+    results['list_sort_age_s'] = timed(lambda: bhw_core.list_index.select(sort='Age'), repeat=3)
+    results['list_filter_sort_lmp_s'] = timed(lambda: bhw_core.list_index.select(filters=chips, sort='LMP', descending=True), repeat=3)
+
+    for path in (csv_path, save_path): os.remove(path)
+    return {metric: round(value, 4) for metric, value in results.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Prints current/baseline ratios; returns the (size, metric, ratio) entries slower than `tolerance`."""
+    regressions = []
+    for size, metrics in results['results'].items():
+        base_metrics = baseline.get('results', {}).get(size)
+        if not base_metrics: print(f"{size:>9}: no baseline"); continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not base: continue
+            ratio = value / base
+            to_seconds = 0.001 if metric.endswith('_ms') else 1
+            flag = "  <-- slower" if ratio > tolerance and (value - base) * to_seconds > NOISE_FLOOR_S else ""
+            print(f"{size:>9} {metric:<30} {base:>12.4f} -> {value:>12.4f}  x{ratio:.2f}{flag}")
+            if flag: regressions.append((size, metric, ratio))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run the headless BHW Connect benchmarks.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help=f"comma-separated resident counts, or 'all' for {ALL_SIZES}")
+    parser.add_argument('--seed', type=int, help=f"registry generator seed (default: the baseline's, else {DEFAULT_SEED})")
+    parser.add_argument('--reference-date', type=date.fromisoformat, help=f"day the registry is generated around (default: the baseline's, else {DEFAULT_REFERENCE_DATE})")
+    parser.add_argument('--output', default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="ratio above which a timing counts as a regression")
+    args = parser.parse_args(argv[1:])
+    sizes = ALL_SIZES if args.sizes == 'all' else tuple(int(size) for size in args.sizes.split(','))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f: baseline = json.load(f)
+    # Same seed and reference date as the baseline, so both runs time an identical registry
+    base_meta = baseline.get('meta', {}) if baseline else {}
+    seed = args.seed if args.seed is not None else base_meta.get('seed', DEFAULT_SEED)
+    today = args.reference_date or (date.fromisoformat(base_meta['reference_date']) if 'reference_date' in base_meta else DEFAULT_REFERENCE_DATE)
+
+    results = {'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'seed': seed, 'reference_date': today.isoformat(),
+                        'python': platform.python_version(), 'platform': platform.platform(), 'numpy': columnar_analytics is not None},
+               'results': {}}
+    with tempfile.TemporaryDirectory(prefix="bhw_bench_") as workdir:
+        for residents in sizes:
+            print(f"Benchmarking {residents:,} residents...", flush=True)
+            results['results'][str(residents)] = run_size(residents, seed, today, workdir)
+            for metric, value in results['results'][str(residents)].items(): print(f"  {metric:<30} {value:>12.4f}")
+    reset_registry()
+
+    with open(args.output, 'w', encoding='utf-8') as f: json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions: print(f"{len(regressions)} timing(s) slower than x{args.tolerance} of the baseline."); return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,89 @@
+"""Seeded synthetic barangay registry generator for benchmarks.
+
+Distributions are rough barangay-level shapes: a young population pyramid, most adults
+NORMAL with chronic illness rising with age, a few percent PWD, women of reproductive age
+with recent (and stale) LMPs, and a handful of visit records per resident.
+
+Usage: python benchmarks/synthetic.py <residents> <out.csv> [--seed N] [--reference-date YYYY-MM-DD]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bhw_core
+
+DEFAULT_SEED = 2024
+
+FIRST_NAMES = ("Maria", "Jose", "Juan", "Ana", "Mark", "Angelica", "John", "Kristine", "Michael", "Jasmine", "Paolo", "Camille",
+               "Rodel", "Mary Grace", "Jericho", "Lorna", "Ramon", "Nenita", "Carlo", "Rowena", "Jun", "Liza", "Ernesto", "Joy")
+LAST_NAMES = ("Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Tomas", "Andrada", "Castillo",
+              "Flores", "Villanueva", "Ramos", "Castro", "Rivera", "Aquino", "Navarro", "Salazar", "Mercado", "Dela Cruz", "Del Rosario")
+SITIO_WEIGHTS = (0.34, 0.27, 0.21, 0.18) # Same order as bhw_core.SITIO_CHOICES
+AGE_PYRAMID = ((0, 5, 0.12), (6, 17, 0.23), (18, 59, 0.55), (60, 95, 0.10)) # (min age, max age, share)
+ILLNESS_WEIGHTS = {"Hypertension": 0.34, "Diabetes": 0.20, "Asthma": 0.14, "COPD": 0.08, "Pneumonia": 0.08, "TB (Tuberculosis)": 0.06, "Other": 0.10}
+VISIT_NOTES = ("Routine checkup", "BP monitoring", "Prenatal checkup", "Immunization", "Medicine refill", "Follow-up", "Consultation")
+
+
+def _age(rng):
+    low, high, _ = rng.choices(AGE_PYRAMID, weights=[share for _, _, share in AGE_PYRAMID])[0]
+    return rng.randint(low, high)
+
+
+def _health_status(rng, age):
+    chronic_chance = 0.08 if age < 18 else 0.25 if age < 60 else 0.55
+    if rng.random() >= chronic_chance: return "NORMAL"
+    count = 1 if rng.random() < 0.8 else 2
+    illnesses = []
+    while len(illnesses) < count:
+        illness = rng.choices(list(ILLNESS_WEIGHTS), weights=list(ILLNESS_WEIGHTS.values()))[0]
+        if illness not in illnesses: illnesses.append(illness)
+    return ", ".join(illnesses)
+
+
+def _lmp(rng, age, today):
+    # Roughly half the 15-49 group are women; ~10% of them currently pregnant, some with an old LMP on file
+    if not 15 <= age <= 49 or rng.random() < 0.5: return 'N/A'
+    roll = rng.random()
+    if roll < 0.10: return (today - timedelta(days=rng.randint(28, 280))).isoformat()
+    if roll < 0.25: return (today - timedelta(days=rng.randint(281, 1500))).isoformat()
+    return 'N/A'
+
+
+def _records(rng, today):
+    visits = min(int(rng.expovariate(1 / 2.5)), 20)
+    stamps = sorted((today - timedelta(days=rng.randint(0, 730)) for _ in range(visits)), reverse=True)
+    return ";".join(f"{stamp.isoformat()} {rng.randint(8, 16):02d}:{rng.choice((0, 15, 30, 45)):02d}: {rng.choice(VISIT_NOTES)}" for stamp in stamps)
+
+
+def generate_registry(residents, seed=DEFAULT_SEED, today=None):
+    """Yields `residents` PatientRecords; the same seed and reference date give the same registry."""
+    rng, today = random.Random(seed), today or date.today()
+    for patient_id in range(1, residents + 1):
+        age = _age(rng)
+        birthday = 'N/A' if rng.random() < 0.01 else (today - timedelta(days=age * 365 + rng.randint(0, 364))).isoformat()
+        pwd_type = rng.choice(bhw_core.PWD_CHOICES[1:]) if rng.random() < 0.03 else 'NOT PWD'
+        yield bhw_core.PatientRecord(patient_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}", birthday,
+                                     _lmp(rng, age, today), rng.choices(bhw_core.SITIO_CHOICES, weights=SITIO_WEIGHTS)[0], _health_status(rng, age),
+                                     PWD_Type=pwd_type, records_raw=_records(rng, today))
+
+
+def write_synthetic_csv(path, residents, seed=DEFAULT_SEED, today=None):
+    bhw_core.write_registry_csv(path, generate_registry(residents, seed, today))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Write a synthetic barangay registry CSV.")
+    parser.add_argument('residents', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--reference-date', type=date.fromisoformat, help="day the dates are generated around (default: today)")
+    args = parser.parse_args(argv[1:])
+    write_synthetic_csv(args.output, args.residents, args.seed, args.reference_date)
+    print(f"Wrote {args.residents:,} residents to {args.output}")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
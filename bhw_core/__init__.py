@@ -0,0 +1,22 @@
+"""Headless core of BHW Connect: the resident registry, date rules, indexes, reports and storage.
+
+Never imports tkinter, so batch jobs, benchmarks and worker processes can use the same code as
+the GUI (Bhw.py). NumPy analytics (bhw_core.analytics), the Excel importer
+(bhw_core.excel_import), the exporter (bhw_core.export, optional openpyxl), the sharded
+registry (bhw_core.shards, process pools) and terminal sync (bhw_core.sync, asyncio) are
+separate modules, imported where they are used, so importing the core stays fast.
+"""
+from .config import FIELDNAMES, SITIO_CHOICES, DISEASE_CHOICES, PWD_CHOICES
+from .profiling import enable_profiling, profiler, instrumented
+from .registry import PatientRegistry, patient_registry
+from .dates import NOT_PREGNANT_EDD, CHECKUP_WEEKS, calculate_age, calculate_edd_and_schedule, checkup_dates
+from .derived import DerivedFields, DerivedCache, derived_cache, get_derived
+from .stats import (AGE_BANDS, TRIMESTERS, UNKNOWN_LABEL, CrossTab, RegistryStats, age_band, build_crosstab_report,
+                    compute_stats_full_scan, merge_stats, registry_stats, trimester, write_crosstabs_csv)
+from .indexes import AgeIndex, CheckupCalendar, DateKeyedIndex, age_index, checkup_calendar
+from .listing import FACETS, SORT_KEYS, ListIndex, list_index
+from .records import DATA_FILE, LOAD_CHUNK_SIZE, PatientRecord, iter_registry_chunks, write_registry_csv, write_registry_rows
+from .search import TrigramIndex, find_patient_by_id_or_name, iter_search_candidates, name_trigram_index, search_candidates, search_patients
+from .storage import (STORAGE_BACKEND, BackgroundLoader, apply_loaded_chunk, default_export_filename, detach_storage, init_storage, load_data,
+                      open_registry_chunks, prepare_loaded_chunk, registry_subset, save_data)
+from .views import PREGNANT_COLUMNS, RESIDENT_COLUMNS, format_pregnant_row, format_resident_row
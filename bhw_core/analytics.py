@@ -0,0 +1,175 @@
+"""Column arrays (NumPy) kept in step with the registry for vectorized dashboards and cross-tabs.
+
+Optional: imported only by callers that want it, so the core does not pay NumPy's import time.
+"""
+from collections import Counter
+from datetime import date
+
+from .config import SITIO_CHOICES, DISEASE_CHOICES, PWD_CHOICES
+from .derived import derived_cache
+from .registry import patient_registry
+from .profiling import instrumented
+from .stats import AGE_BANDS, TRIMESTERS, UNKNOWN_LABEL, empty_crosstabs
+
+try: import numpy as np # Optional: vectorized report/dashboard math; the incremental counters work without it
+except ImportError: np = None
+
+class _Codebook:
+    """Stable small-int codes for a categorical column, seeded with the known choices."""
+    def __init__(self, names=()):
+        self.names = []; self._codes = {}
+        for name in names: self.code(name)
+
+    def code(self, name):
+        code = self._codes.get(name)
+        if code is None: code = self._codes[name] = len(self.names); self.names.append(name)
+        return code
+
+class ColumnarAnalytics:
+    """Column arrays (one row per resident) kept in step with the registry for vectorized reports.
+    
+    Columns: birth date as a YYYYMMDD int (age = (ref - birth) // 10000), LMP as a date ordinal,
+    Sitio and PWD codes, and an illness bitmask. Rows are appended on add/load and overwritten
+    in place on update; any reference date can be used without re-parsing a single date.
+    """
+    MISSING = -1
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.sitios = _Codebook(SITIO_CHOICES)
+        self.pwd_types = _Codebook(PWD_CHOICES)
+        self.illnesses = _Codebook(DISEASE_CHOICES) # Bit i of the mask is illnesses.names[i]
+        self._reset()
+        registry.subscribe(self.on_change)
+
+    def _reset(self, capacity=1024):
+        self.size = 0
+        self.complete = True
+        self._rows = {} # ID -> row
+        self.birth_ymd = np.full(capacity, self.MISSING, dtype=np.int32)
+        self.lmp_ordinal = np.full(capacity, self.MISSING, dtype=np.int32)
+        self.sitio_code = np.zeros(capacity, dtype=np.int16)
+        self.pwd_code = np.zeros(capacity, dtype=np.int16)
+        self.illness_mask = np.zeros(capacity, dtype=np.uint64)
+
+    def _grow(self, needed):
+        capacity = len(self.birth_ymd)
+        if needed <= capacity: return
+        while capacity < needed: capacity *= 2
+        for column in ('birth_ymd', 'lmp_ordinal', 'sitio_code', 'pwd_code', 'illness_mask'):
+            old = getattr(self, column)
+            new = np.full(capacity, self.MISSING, dtype=old.dtype) if old.dtype == np.int32 else np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def _encode(self, p, today):
+        derived = derived_cache.get(p, today) # Reuses the dates the loader already parsed
+        bday, lmp = derived.birthday, derived.lmp
+        mask = 0
+        for status in p['Health_Status'].split(', '):
+            if not status or status == 'N/A': continue
+            bit = self.illnesses.code(status)
+            if bit < 64: mask |= 1 << bit
+            else: self.complete = False # Bitmask is full; callers fall back to the incremental counters
+        return (bday.year * 10000 + bday.month * 100 + bday.day if bday else self.MISSING, lmp.toordinal() if lmp else self.MISSING,
+                self.sitios.code(p.get('Sitio', 'N/A')), self.pwd_types.code(p.get('PWD_Type', 'NOT PWD')), mask)
+
+    def on_change(self, event, patients, changes):
+        if event == 'clear': self._reset(); return
+        today = date.today()
+        encoded = [self._encode(p, today) for p in patients]
+        if event == 'update':
+            for p, values in zip(patients, encoded): self._write(self._rows[p['ID']], values)
+            return
+        
+        start = self.size
+        self._grow(start + len(encoded))
+        if encoded:
+            birth, lmp, sitio, pwd, mask = zip(*encoded)
+            end = start + len(encoded)
+            self.birth_ymd[start:end] = birth; self.lmp_ordinal[start:end] = lmp
+            self.sitio_code[start:end] = sitio; self.pwd_code[start:end] = pwd
+            self.illness_mask[start:end] = np.array(mask, dtype=np.uint64)
+        for i, p in enumerate(patients): self._rows[p['ID']] = start + i
+        self.size = start + len(encoded)
+
+    def _write(self, row, values):
+        self.birth_ymd[row], self.lmp_ordinal[row], self.sitio_code[row], self.pwd_code[row], self.illness_mask[row] = values
+
+    # --- Vectorized queries ---
+    def ages(self, today=None):
+        """Age per row on the reference date (-1 where the birthday is missing/invalid)."""
+        today = today or date.today()
+        birth = self.birth_ymd[:self.size]
+        ref = today.year * 10000 + today.month * 100 + today.day
+        return np.where(birth == self.MISSING, -1, (ref - birth) // 10000)
+
+    def pregnant_mask(self, today=None):
+        # Same rule as DerivedFields: LMP at least 4 weeks ago and EDD (LMP + 280 days) not yet passed
+        days = (today or date.today()).toordinal() - self.lmp_ordinal[:self.size]
+        return (self.lmp_ordinal[:self.size] != self.MISSING) & (days >= 28) & (days <= 280)
+
+    def illness_matrix(self):
+        """Boolean [rows, illnesses] matrix unpacked from the bitmask column."""
+        bits = np.arange(min(len(self.illnesses.names), 64), dtype=np.uint64)
+        return ((self.illness_mask[:self.size, None] >> bits) & np.uint64(1)).astype(bool)
+
+    def age_band_codes(self, today=None):
+        """AGE_BANDS index per row; len(AGE_BANDS) marks an unknown/negative age."""
+        ages = self.ages(today)
+        lower_bounds = np.array([low for _, low, _ in AGE_BANDS])
+        bands = np.searchsorted(lower_bounds, ages, side='right') - 1
+        return np.where(ages < 0, len(AGE_BANDS), bands)
+
+    def dashboard(self, today=None):
+        """Same numbers and layout as RegistryStats.snapshot(), computed column-wise."""
+        n = self.size
+        ages = self.ages(today)
+        illness_counts = self.illness_matrix().sum(axis=0)
+        sitio_counts = np.bincount(self.sitio_code[:n], minlength=len(self.sitios.names))
+        pwd_counts = np.bincount(self.pwd_code[:n], minlength=len(self.pwd_types.names))
+        return {'total': n, 'senior': int((ages >= 60).sum()), 'pregnant': int(self.pregnant_mask(today).sum()),
+                'pwd': int(n - pwd_counts[self.pwd_types.code('NOT PWD')]),
+                'sitio': Counter({name: int(c) for name, c in zip(self.sitios.names, sitio_counts) if c}),
+                'illness': Counter({name: int(c) for name, c in zip(self.illnesses.names, illness_counts) if c}),
+                'pwd_types': Counter({name: int(c) for name, c in zip(self.pwd_types.names, pwd_counts) if c})}
+
+    def illness_by_sitio_by_age_band(self, today=None):
+        """Counts array [illness, sitio, age band (+ unknown)] with its axis labels."""
+        n = self.size
+        n_sitio, n_band = len(self.sitios.names), len(AGE_BANDS) + 1
+        cell = self.sitio_code[:n].astype(np.int64) * n_band + self.age_band_codes(today)
+        matrix = self.illness_matrix()
+        counts = np.zeros((matrix.shape[1], n_sitio * n_band), dtype=np.int64)
+        for i in range(matrix.shape[1]): counts[i] = np.bincount(cell[matrix[:, i]], minlength=n_sitio * n_band)
+        return {'illnesses': self.illnesses.names[:matrix.shape[1]], 'sitios': list(self.sitios.names), 'bands': [label for label, _, _ in AGE_BANDS] + [UNKNOWN_LABEL],
+                'counts': counts.reshape(matrix.shape[1], n_sitio, n_band)}
+
+    @instrumented
+    def crosstab_report(self, today=None):
+        """The build_crosstab_report() tables computed column-wise (same counts, no per-resident loop)."""
+        today = today or date.today()
+        n, sitios = self.size, list(self.sitios.names)
+        sitio = self.sitio_code[:n].astype(np.int64)
+        illness_by_sitio, illness_by_age, trimester_by_sitio, pwd_by_sitio = tables = empty_crosstabs()
+        
+        cube = self.illness_by_sitio_by_age_band(today)
+        _fill_crosstab(illness_by_sitio, cube['illnesses'], sitios, cube['counts'].sum(axis=2))
+        _fill_crosstab(illness_by_age, cube['illnesses'], cube['bands'], cube['counts'].sum(axis=1))
+        
+        pregnant = self.pregnant_mask(today)
+        weeks = (today.toordinal() - self.lmp_ordinal[:n][pregnant]) // 7
+        trimester = np.searchsorted(np.array([start for _, start, _ in TRIMESTERS]), weeks, side='right') - 1
+        counts = np.bincount(trimester * len(sitios) + sitio[pregnant], minlength=len(TRIMESTERS) * len(sitios))
+        _fill_crosstab(trimester_by_sitio, [label for label, _, _ in TRIMESTERS], sitios, counts.reshape(len(TRIMESTERS), len(sitios)))
+        
+        pwd_types = list(self.pwd_types.names)
+        counts = np.bincount(self.pwd_code[:n].astype(np.int64) * len(sitios) + sitio, minlength=len(pwd_types) * len(sitios))
+        _fill_crosstab(pwd_by_sitio, pwd_types, sitios, counts.reshape(len(pwd_types), len(sitios)))
+        return [tab.finalize() for tab in tables]
+
+def _fill_crosstab(tab, rows, columns, counts):
+    """Copies the non-zero cells of a [row, column] counts array into a CrossTab."""
+    for i, j in zip(*np.nonzero(counts)): tab.counts[rows[i], columns[j]] = int(counts[i, j])
+
+columnar_analytics = ColumnarAnalytics(patient_registry) if np is not None else None
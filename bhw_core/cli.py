@@ -0,0 +1,206 @@
+"""Batch mode: load the registry and write the dashboard, reports and resident lists as CSV/JSON, without the GUI.
+
+Usage:
+    python -m bhw_core report --out reports/ [--format csv|json] [--registry registry.csv]
+                              [--sections dashboard,crosstabs,pregnant,seniors,pwd]
+    python -m bhw_core dashboard [--registry registry.csv]
+    python -m bhw_core export --out residents.xlsx [--subset all|seniors|pwd|pregnant] [--sitio NAME] [--registry registry.csv]
+    python -m bhw_core shard --registry registry.csv --barangay NAME [--root shards/]
+    python -m bhw_core municipality [--out reports/] [--barangays A,B] [--workers N] [--root shards/]
+    python -m bhw_core sync-server [--host 0.0.0.0] [--port 8765] [--log bhw_sync_log.jsonl]
+
+Every command also takes --profile (same as BHW_PROFILE=1).
+
+Lists are streamed row by row to <name>.tmp and renamed when complete, so a nightly job never
+leaves a half-written file behind and memory use does not grow with the output.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from .derived import get_derived
+from .export import EXPORT_SUBSETS, export_format, export_source, write_export
+from .profiling import enable_profiling
+from .indexes import age_index
+from .records import iter_registry_chunks
+from .registry import patient_registry
+from .search import name_trigram_index
+from .shards import SHARD_ROOT, ShardSet, aggregate_shards, migrate_csv_to_shards
+from .stats import build_crosstab_report, registry_stats, write_crosstabs_csv
+from .storage import STORAGE_BACKEND, load_data, open_registry_chunks
+from .sync import SYNC_HOST, SYNC_LOG_FILE, SYNC_PORT, SyncServer
+from .views import RESIDENT_COLUMNS, format_resident_row
+
+SECTIONS = ('dashboard', 'crosstabs', 'pregnant', 'seniors', 'pwd')
+PREGNANT_COLUMNS = ('ID', 'Name', 'Sitio', 'LMP', 'EDD', 'Next_Checkup', 'Upcoming_Checkups')
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+@contextmanager
+def atomic_output(path):
+    """Opens path.tmp for writing and moves it over path only if the block finishes without an error."""
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w', newline='', encoding='utf-8') as file: yield file
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path): os.remove(temp_path)
+
+def write_rows(path, columns, rows, fmt):
+    """Streams rows (tuples in `columns` order) as CSV or JSON Lines; returns the row count."""
+    count = 0
+    with atomic_output(path) as file:
+        if fmt == 'csv':
+            writer = csv.writer(file); writer.writerow(columns)
+            for row in rows: writer.writerow(row); count += 1
+        else:
+            for row in rows: file.write(json.dumps(dict(zip(columns, row))) + '\n'); count += 1
+    return count
+
+def dashboard_totals(stats=None):
+    """The Home dashboard and generate_report breakdowns (of the loaded registry by default) as plain JSON-ready data."""
+    stats = stats or registry_stats.snapshot()
+    return {'total': stats['total'], 'senior': stats['senior'], 'pregnant': stats['pregnant'], 'pwd': stats['pwd'],
+            'sitio': dict(+stats['sitio']), 'illness': dict(+stats['illness']), 'pwd_types': dict(+stats['pwd_types'])}
+
+def pregnant_rows():
+    for p in patient_registry:
+        derived = get_derived(p)
+        if not derived.is_pregnant: continue
+        schedule = derived.schedule
+        yield (p['ID'], p['Name'], p['Sitio'], p['LMP'], derived.edd, schedule[0] if schedule else "No upcoming checkups.", "; ".join(schedule))
+
+def senior_rows():
+    for patient_id in sorted(age_index.cohort_ids(60)): yield format_resident_row(patient_registry.get(patient_id))
+
+def pwd_rows():
+    for p in patient_registry:
+        if p.get('PWD_Type', 'NOT PWD') != 'NOT PWD': yield format_resident_row(p)
+
+def write_report(out_dir, fmt, sections):
+    os.makedirs(out_dir, exist_ok=True)
+    extension = 'csv' if fmt == 'csv' else 'jsonl'
+    written = []
+    if 'dashboard' in sections:
+        path = os.path.join(out_dir, 'dashboard.json')
+        with atomic_output(path) as file: json.dump(dashboard_totals(), file, indent=2)
+        written.append((path, None))
+    if 'crosstabs' in sections:
+        crosstabs = build_crosstab_report(patient_registry)
+        path = os.path.join(out_dir, 'crosstabs.csv' if fmt == 'csv' else 'crosstabs.json')
+        if fmt == 'csv': write_crosstabs_csv(path, crosstabs) # Same layout as the Health Reports export
+        else:
+            with atomic_output(path) as file: json.dump({tab.title: tab.table() for tab in crosstabs}, file, indent=2)
+        written.append((path, None))
+    lists = {'pregnant': (PREGNANT_COLUMNS, pregnant_rows), 'seniors': (RESIDENT_COLUMNS, senior_rows), 'pwd': (RESIDENT_COLUMNS, pwd_rows)}
+    for name, (columns, rows) in lists.items():
+        if name not in sections: continue
+        path = os.path.join(out_dir, f"{name}.{extension}")
+        written.append((path, write_rows(path, columns, rows(), fmt)))
+    return written
+
+def write_municipality_report(root, barangays, out_dir, workers):
+    """Counts every barangay's shards in parallel; returns the merged dashboard with a per-barangay breakdown."""
+    shard_set = ShardSet(root)
+    unknown = set(barangays or ()) - set(shard_set.numbers)
+    if unknown: raise ValueError(f"unknown barangay(s): {', '.join(sorted(unknown))}")
+    start = time.perf_counter()
+    stats, crosstabs, by_barangay = aggregate_shards(shard_set, barangays, max_workers=workers)
+    log(f"Counted {stats['total']:,} residents in {len(by_barangay)} barangay(s) in {time.perf_counter() - start:.2f} s")
+    totals = dict(dashboard_totals(stats), barangays={barangay: dashboard_totals(counts) for barangay, counts in by_barangay.items()})
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        with atomic_output(os.path.join(out_dir, 'dashboard.json')) as file: json.dump(totals, file, indent=2)
+        write_crosstabs_csv(os.path.join(out_dir, 'crosstabs.csv'), crosstabs)
+    return totals
+
+def load_registry(registry_path=None):
+    # Batch runs never search by name; skip building the trigram index during the load
+    patient_registry.unsubscribe(name_trigram_index.on_change)
+    open_chunks = (lambda: iter_registry_chunks(registry_path)) if registry_path else open_registry_chunks
+    start = time.perf_counter()
+    residents = load_data(open_chunks, attach_storage=False)
+    log(f"Loaded {residents:,} residents from {registry_path or STORAGE_BACKEND + ' storage'} in {time.perf_counter() - start:.2f} s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bhw_core', description="BHW Connect batch reports and exports (no GUI).")
+    commands = parser.add_subparsers(dest='command', required=True)
+    report = commands.add_parser('report', help="write the dashboard, cross-tab report and resident lists")
+    report.add_argument('--out', required=True, help="output directory")
+    report.add_argument('--format', choices=('csv', 'json'), default='csv', help="lists as CSV or JSON Lines (default: csv)")
+    report.add_argument('--sections', default=','.join(SECTIONS), help=f"comma-separated subset of {','.join(SECTIONS)}")
+    dashboard = commands.add_parser('dashboard', help="print the dashboard totals as JSON")
+    export = commands.add_parser('export', help="stream residents (registry columns) to a .csv, .xlsx or .jsonl file")
+    export.add_argument('--out', required=True, help="output file; the format follows its extension")
+    export.add_argument('--subset', choices=EXPORT_SUBSETS, default='all')
+    export.add_argument('--sitio', help="only residents of this Sitio")
+    for command in (report, dashboard, export):
+        command.add_argument('--registry', help="read this registry CSV instead of the configured storage")
+    shard = commands.add_parser('shard', help="split a registry CSV into one barangay's Sitio shards")
+    shard.add_argument('--registry', required=True, help="registry CSV to split")
+    shard.add_argument('--barangay', required=True, help="barangay the residents belong to")
+    municipality = commands.add_parser('municipality', help="dashboard and cross-tabs over all barangays, counted per shard in parallel")
+    municipality.add_argument('--out', help="write dashboard.json and crosstabs.csv here instead of printing the dashboard")
+    municipality.add_argument('--barangays', help="comma-separated subset of barangays (default: all)")
+    municipality.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    for command in (shard, municipality):
+        command.add_argument('--root', default=SHARD_ROOT, help=f"shard directory (default: {SHARD_ROOT})")
+    sync_server = commands.add_parser('sync-server', help="run the server BHW terminals push edits to and pull edits from")
+    sync_server.add_argument('--host', default=SYNC_HOST, help=f"address to listen on; 0.0.0.0 for the LAN (default: {SYNC_HOST})")
+    sync_server.add_argument('--port', type=int, default=SYNC_PORT)
+    sync_server.add_argument('--log', default=SYNC_LOG_FILE, help=f"change log file (default: {SYNC_LOG_FILE})")
+    for command in commands.choices.values():
+        command.add_argument('--profile', action='store_true', help="time the instrumented steps; bhw_profile.txt/.json are written at exit")
+    args = parser.parse_args(argv)
+    if args.profile: enable_profiling()
+
+    if args.command == 'sync-server':
+        server = SyncServer(args.log)
+        log(f"Sync server on {args.host}:{args.port}, {len(server.changes):,} changes in {args.log}")
+        try: asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt: pass
+        except OSError as e: log(f"ERROR: {e}"); return 1
+        return 0
+
+    try:
+        if args.command == 'shard':
+            residents = migrate_csv_to_shards(args.registry, ShardSet(args.root), args.barangay)
+            log(f"Wrote {residents:,} residents to the {args.barangay} shards in {args.root}")
+            return 0
+        if args.command == 'municipality':
+            barangays = [name.strip() for name in args.barangays.split(',') if name.strip()] if args.barangays else None
+            totals = write_municipality_report(args.root, barangays, args.out, args.workers)
+            if args.out: log(f"Wrote {os.path.join(args.out, 'dashboard.json')} and {os.path.join(args.out, 'crosstabs.csv')}")
+            else: json.dump(totals, sys.stdout, indent=2); print()
+            return 0
+    except (OSError, ValueError) as e: log(f"ERROR: {e}"); return 1
+
+    if args.command == 'report':
+        sections = [section.strip() for section in args.sections.split(',') if section.strip()]
+        unknown = set(sections) - set(SECTIONS)
+        if unknown: parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+    if args.command == 'export':
+        try: export_format(args.out)
+        except ValueError as e: parser.error(str(e))
+
+    try: load_registry(args.registry)
+    except (OSError, ValueError) as e: log(f"ERROR loading data: {e}"); return 1
+
+    if args.command == 'dashboard':
+        json.dump(dashboard_totals(), sys.stdout, indent=2); print()
+        return 0
+    if args.command == 'export':
+        try: rows = write_export(args.out, *export_source(args.subset, args.sitio))
+        except (OSError, RuntimeError) as e: log(f"ERROR: {e}"); return 1
+        log(f"Wrote {args.out} ({rows:,} rows)")
+        return 0
+    
+    for path, rows in write_report(args.out, args.format, sections):
+        log(f"Wrote {path}" + (f" ({rows:,} rows)" if rows is not None else ""))
+    return 0
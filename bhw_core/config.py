@@ -0,0 +1,6 @@
+"""Registry columns and the fixed choice lists shared by the core and the GUI."""
+
+FIELDNAMES = ['ID', 'Name', 'Birthday', 'LMP', 'Sitio', 'Health_Status', 'Records', 'PWD_Type'] 
+SITIO_CHOICES = ["IBABA", "CENTRO", "SILANGAN", "KANLURAN"] 
+DISEASE_CHOICES = ["NORMAL", "Diabetes", "Hypertension", "COPD", "Pneumonia", "TB (Tuberculosis)", "Asthma", "Other"] 
+PWD_CHOICES = ["NOT PWD", "Physical Disability", "Intellectual Disability", "Mental Disability", "Visual Impairment", "Hearing Impairment", "Speech Impairment", "Multiple Disabilities"] 
@@ -0,0 +1,63 @@
+"""Date parsing, age and prenatal EDD/checkup schedule rules."""
+from datetime import datetime, date, timedelta
+
+from .profiling import instrumented
+
+NOT_PREGNANT_EDD = ("N/A", "Invalid LMP Date", "Delivered (Post-Partum)", "LMP too recent (Not Pregnant)")
+
+def _parse_date(date_str):
+    if not date_str or not date_str[:1].isdigit(): return None # 'N/A', blanks: skip the costly strptime failure
+    try:
+        if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-': # Fast path for zero-padded YYYY-MM-DD
+            return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:]))
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except (TypeError, ValueError): return None
+
+def _age_on(bday, today):
+    return today.year - bday.year - ((today.month, today.day) < (bday.month, bday.day))
+
+@instrumented
+def calculate_age(bday_str):
+    bday = _parse_date(bday_str)
+    return _age_on(bday, date.today()) if bday else -1 
+
+def _edd_and_schedule_on(lmp, today):
+    edd = lmp + timedelta(days=280) 
+    
+    # New Rule: Check if LMP is too recent (less than 4 weeks)
+    # If LMP is too recent, it means the patient is not yet confirmed pregnant 
+    # based on LMP alone, or the LMP entry is incorrect.
+    if today - lmp < timedelta(weeks=4):
+         return "LMP too recent (Not Pregnant)", [] # Use a clear status for the schedule/EDD
+    
+    if edd < today: return edd.strftime("%Y-%m-%d"), ["Delivered (Post-Partum)"]
+    
+    schedule = []
+    for current_date, week in checkup_dates(lmp):
+        status = "🔜" if current_date >= today else "✅"
+        schedule.append(f"{status} {current_date.strftime('%Y-%m-%d')} (Week {week})")
+        
+    return edd.strftime("%Y-%m-%d"), [s for s in schedule if s.startswith('🔜')]
+
+def _checkup_weeks():
+    weeks, week = [], 12
+    while week * 7 <= 280:
+        weeks.append(week)
+        # Scheduling logic
+        if week >= 36: week += 1 
+        elif week >= 28: week += 2 
+        else: week += 4 
+    return tuple(weeks)
+
+CHECKUP_WEEKS = _checkup_weeks() # Pregnancy weeks of the prenatal checkups, week 12 through the EDD
+
+def checkup_dates(lmp):
+    """(date, week) for every prenatal checkup from week 12 up to the EDD."""
+    return [(lmp + timedelta(weeks=week), week) for week in CHECKUP_WEEKS]
+
+@instrumented
+def calculate_edd_and_schedule(lmp_str):
+    if not lmp_str or lmp_str.upper() == "N/A": return "N/A", []
+    lmp = _parse_date(lmp_str)
+    if not lmp: return "Invalid LMP Date", []
+    return _edd_and_schedule_on(lmp, date.today())
@@ -0,0 +1,55 @@
+"""Per-resident cache of parsed dates and the age/EDD/schedule derived from them."""
+from datetime import date
+
+from .dates import NOT_PREGNANT_EDD, _parse_date, _age_on, _edd_and_schedule_on
+from .profiling import instrumented
+
+class DerivedFields:
+    """Parsed dates plus age, EDD and prenatal schedule for one resident, valid for a single day."""
+    __slots__ = ('key', 'day', 'birthday', 'lmp', 'age', 'edd', 'schedule', 'is_pregnant')
+
+    def __init__(self, key, birthday, lmp):
+        self.key = key; self.birthday = birthday; self.lmp = lmp
+        self.day = None
+
+    def refresh(self, today):
+        self.day = today
+        self.age = _age_on(self.birthday, today) if self.birthday else -1
+        lmp_str = self.key[1]
+        if not lmp_str or lmp_str.upper() == "N/A": self.edd, self.schedule = "N/A", []
+        elif not self.lmp: self.edd, self.schedule = "Invalid LMP Date", []
+        else: self.edd, self.schedule = _edd_and_schedule_on(self.lmp, today)
+        # Delivered residents still get an EDD date back, so check the schedule marker too
+        self.is_pregnant = self.edd not in NOT_PREGNANT_EDD and self.schedule != ["Delivered (Post-Partum)"]
+
+class DerivedCache:
+    """Per-resident DerivedFields keyed by ID and (Birthday, LMP).
+    
+    Dates are parsed only when a record's Birthday/LMP changes; age and schedule are
+    recomputed from the parsed dates once per day when date.today() rolls over.
+    """
+    def __init__(self):
+        self._entries = {}
+
+    def clear(self): self._entries = {}
+
+    def get(self, patient, today=None):
+        today = today or date.today()
+        key = (patient.get('Birthday', 'N/A'), patient.get('LMP', 'N/A'))
+        entry = self._entries.get(patient['ID'])
+        if entry is None or entry.key != key:
+            entry = DerivedFields(key, _parse_date(key[0]), _parse_date(key[1]))
+            self._entries[patient['ID']] = entry
+        if entry.day != today: entry.refresh(today)
+        return entry
+
+    @instrumented
+    def fill(self, patients, today=None):
+        """Derives many residents at once (loader chunks, the first count after midnight); the profiled bulk of the date work."""
+        today = today or date.today()
+        for p in patients: self.get(p, today)
+
+derived_cache = DerivedCache()
+
+def get_derived(patient):
+    return derived_cache.get(patient)
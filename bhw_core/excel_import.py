@@ -0,0 +1,116 @@
+"""Bulk import of the per-Sitio Excel workbooks (data/<Sitio>/*.xlsx), read in parallel by a process pool."""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
+
+from .config import SITIO_CHOICES, DISEASE_CHOICES
+from .dates import _parse_date
+from .records import PatientRecord
+from .registry import patient_registry
+
+try: import openpyxl # Optional: only needed for the Excel importer
+except ImportError: openpyxl = None
+
+EXCEL_IMPORT_ROOT = 'data'
+EXCEL_EXTRA_SOURCES = ('BarangayData', '.') # Workbooks outside the per-Sitio folders
+EXCEL_HEADER_MAP = {
+    'name': 'Name', 'full name': 'Name',
+    'birthday': 'Birthday', 'birth date': 'Birthday', 'date of birth': 'Birthday',
+    'sitio': 'Sitio', 'zone': 'Sitio', 'sitio/zone': 'Sitio',
+    'health condition': 'Health', 'health issues': 'Health', 'health status': 'Health',
+    'vaccination status': 'Vaccination', 'date of record': 'Record_Date', 'date': 'Record_Date',
+}
+
+def _excel_text(value):
+    return value.strip() if isinstance(value, str) else ('' if value is None else str(value))
+
+def _excel_date(value):
+    if isinstance(value, datetime): value = value.date()
+    if isinstance(value, date): return value.isoformat()
+    parsed = _parse_date(_excel_text(value))
+    return parsed.isoformat() if parsed else 'N/A'
+
+def _excel_health(value):
+    text = _excel_text(value)
+    if not text or text.upper() in ('N/A', 'NONE'): return 'N/A'
+    if text.upper() in ('HEALTHY', 'NORMAL'): return 'NORMAL'
+    for disease in DISEASE_CHOICES:
+        if text.upper() == disease.upper() or text.upper() == disease.split(' (')[0].upper(): return disease
+    return 'Other'
+
+def _read_excel_folder(folder, default_sitio):
+    """Process-pool worker: streams every .xlsx in one folder (read-only mode) into plain row tuples.
+    
+    Returns (rows, rows_read) where rows are (Name, Birthday, Sitio, Health_Status, note) tuples.
+    """
+    rows, rows_read = [], 0
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith('.xlsx') or filename.startswith('~$'): continue
+        path = os.path.join(folder, filename)
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                cells = sheet.iter_rows(values_only=True)
+                header = next(cells, None)
+                if not header: continue
+                columns = {EXCEL_HEADER_MAP[_excel_text(h).lower()]: i for i, h in enumerate(header) if _excel_text(h).lower() in EXCEL_HEADER_MAP}
+                if 'Name' not in columns: continue
+                cell = lambda row, key: row[columns[key]] if key in columns and columns[key] < len(row) else None
+                
+                for row in cells:
+                    rows_read += 1
+                    name = _excel_text(cell(row, 'Name')).upper()
+                    if not name: continue
+                    sitio = _excel_text(cell(row, 'Sitio')).upper() or default_sitio
+                    note = f"IMPORTED: {date.today().isoformat()} - From {os.path.relpath(path)}"
+                    for key, label in (('Vaccination', 'Vaccination'), ('Record_Date', 'Date of Record')):
+                        if _excel_text(cell(row, key)): note += f" | {label}: {_excel_text(cell(row, key))}"
+                    rows.append((name, _excel_date(cell(row, 'Birthday')), sitio if sitio in SITIO_CHOICES else 'N/A', _excel_health(cell(row, 'Health')), note))
+        finally: workbook.close()
+    return rows, rows_read
+
+def excel_import_sources(root=EXCEL_IMPORT_ROOT, extra=EXCEL_EXTRA_SOURCES):
+    """(folder, default Sitio) pairs: one per data/<Sitio> folder, plus the loose workbook folders."""
+    sources = []
+    if os.path.isdir(root):
+        sources.append((root, 'N/A'))
+        for name in sorted(os.listdir(root)):
+            if os.path.isdir(os.path.join(root, name)): sources.append((os.path.join(root, name), name.upper()))
+    sources.extend((folder, 'N/A') for folder in extra if os.path.isdir(folder))
+    return sources
+
+def read_excel_sources(sources, max_workers=None):
+    """Reads all sources in parallel (one process per folder); returns (rows, rows_read)."""
+    if openpyxl is None: raise RuntimeError("Excel import needs the openpyxl package (pip install openpyxl).")
+    rows, rows_read = [], 0
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(sources), os.cpu_count() or 1) or 1) as pool:
+        for folder_rows, folder_read in pool.map(_read_excel_folder, *zip(*sources)):
+            rows.extend(folder_rows); rows_read += folder_read
+    return rows, rows_read
+
+def import_excel_rows(rows):
+    """Adds imported rows not already in the registry, with IDs from patient_registry.allocate_id(); returns (added, duplicates).
+    
+    A row is a duplicate when its Name and Birthday match a resident; rows without a birthday match on Name alone.
+    """
+    known = {(p['Name'].upper(), p['Birthday']) for p in patient_registry}
+    known_names = {name for name, _ in known}
+    new_patients, duplicates = [], 0
+    for name, bday, sitio, health, note in rows:
+        if (name, bday) in known or (bday == 'N/A' and name in known_names): duplicates += 1; continue
+        known.add((name, bday)); known_names.add(name)
+        new_patients.append(PatientRecord(ID=patient_registry.allocate_id(), Name=name, Birthday=bday, LMP='N/A', Sitio=sitio, Health_Status=health, Records=[note], PWD_Type='NOT PWD'))
+    if new_patients: patient_registry.extend(new_patients, event='add') # Persisted as new residents, one batch
+    return len(new_patients), duplicates
+
+def excel_import_summary(rows, rows_read, added, duplicates, seconds):
+    return {'rows_read': rows_read, 'added': added, 'duplicates': duplicates, 'skipped': rows_read - len(rows),
+            'seconds': seconds, 'rows_per_second': rows_read / seconds if seconds else 0.0}
+
+def import_excel_workbooks(root=EXCEL_IMPORT_ROOT, extra=EXCEL_EXTRA_SOURCES, max_workers=None):
+    """Bulk import entry point; returns a summary dict including rows per second."""
+    start = time.perf_counter()
+    rows, rows_read = read_excel_sources(excel_import_sources(root, extra), max_workers)
+    added, duplicates = import_excel_rows(rows)
+    return excel_import_summary(rows, rows_read, added, duplicates, time.perf_counter() - start)
@@ -0,0 +1,124 @@
+"""Streaming exports of the registry, or a subset of it, to CSV, Excel (.xlsx) or JSON Lines.
+
+Rows are generated one resident at a time and written in EXPORT_CHUNK_ROWS batches through a large
+buffer, so memory stays flat whatever the registry size. Output goes to <path>.tmp, which replaces
+the target only when complete: a cancelled or failed export leaves no partial file behind.
+"""
+import csv
+import json
+import os
+import queue
+import threading
+
+from .config import FIELDNAMES
+from .derived import get_derived
+from .indexes import age_index
+from .registry import patient_registry
+from .storage import registry_subset
+
+try: import openpyxl # Optional: only needed for .xlsx exports
+except ImportError: openpyxl = None
+
+EXPORT_FORMATS = {'.csv': 'csv', '.xlsx': 'xlsx', '.jsonl': 'jsonl'} # File extension -> format
+EXPORT_SUBSETS = ('all', 'seniors', 'pwd', 'pregnant')
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_BUFFER_BYTES = 1 << 20
+XLSX_SHEET_ROWS = 1_000_000 # Residents per worksheet; Excel stops at 1,048,576 rows
+
+class ExportCancelled(Exception):
+    """Raised by write_export when its cancel event is set."""
+
+def export_format(path):
+    """'csv', 'xlsx' or 'jsonl' from the file extension; ValueError for anything else."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS: raise ValueError(f"cannot export to '{extension or path}' files (use {', '.join(EXPORT_FORMATS)})")
+    return EXPORT_FORMATS[extension]
+
+def export_source(subset='all', sitio=None):
+    """(candidates, keep) for a subset: the residents to scan and a filter for them (None keeps every one).
+
+    Call on the thread that owns the registry. Candidates are a snapshot of references, not copies,
+    so residents added while the export runs are left out and the scan length is fixed for progress.
+    """
+    if subset not in EXPORT_SUBSETS: raise ValueError(f"unknown subset '{subset}' (use {', '.join(EXPORT_SUBSETS)})")
+    # Seniors are a range query on the birth-date index, one Sitio an indexed query on the SQLite backend;
+    # the other subsets are filtered while writing
+    in_subset = {'pwd': lambda p: p.PWD_Type != 'NOT PWD', 'pregnant': lambda p: get_derived(p).is_pregnant}.get(subset)
+    if subset == 'seniors':
+        candidates = patient_registry.get_many(sorted(age_index.cohort_ids(60)))
+        return candidates, (lambda p: p.Sitio == sitio) if sitio else None
+    if sitio: return registry_subset('sitio_ids', lambda p: p.Sitio == sitio, sitio), in_subset
+    return patient_registry[:], in_subset
+
+def _registry_row(p):
+    return (p.ID, p.Name, p.Birthday, p.LMP, p.Sitio, p.Health_Status, p.records_text(), p.PWD_Type)
+
+def _write_csv(path, chunks):
+    with open(path, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_BYTES) as file:
+        writer = csv.writer(file); writer.writerow(FIELDNAMES)
+        for chunk in chunks: writer.writerows(chunk)
+
+def _write_jsonl(path, chunks):
+    with open(path, mode='w', encoding='utf-8', buffering=EXPORT_BUFFER_BYTES) as file:
+        for chunk in chunks: file.write(''.join(json.dumps(dict(zip(FIELDNAMES, row)), ensure_ascii=False) + '\n' for row in chunk))
+
+def _write_xlsx(path, chunks):
+    if openpyxl is None: raise RuntimeError("Excel export needs the openpyxl package (pip install openpyxl).")
+    workbook = openpyxl.Workbook(write_only=True) # Write-only mode streams rows out instead of keeping every cell
+    sheet, sheet_rows = None, XLSX_SHEET_ROWS
+    for chunk in chunks:
+        for row in chunk:
+            if sheet_rows == XLSX_SHEET_ROWS: # Continue on a new worksheet past Excel's row limit
+                sheet = workbook.create_sheet(f"Residents {len(workbook.worksheets) + 1}" if workbook.worksheets else "Residents")
+                sheet.append(FIELDNAMES); sheet_rows = 0
+            sheet.append(row); sheet_rows += 1
+    if sheet is None: workbook.create_sheet("Residents").append(FIELDNAMES)
+    workbook.save(path)
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'jsonl': _write_jsonl}
+
+def write_export(path, candidates, keep=None, fmt=None, progress=None, cancelled=None):
+    """Streams the registry rows (FIELDNAMES columns) of the kept candidates to path; returns the row count.
+
+    The format defaults to the one of path's extension. progress(rows, fraction) is called after every
+    chunk; setting `cancelled` (a threading.Event) stops the export with ExportCancelled.
+    """
+    write, written = WRITERS[fmt or export_format(path)], 0
+
+    def chunks():
+        nonlocal written
+        for start in range(0, len(candidates), EXPORT_CHUNK_ROWS):
+            if cancelled is not None and cancelled.is_set(): raise ExportCancelled()
+            rows = [_registry_row(p) for p in candidates[start:start + EXPORT_CHUNK_ROWS] if keep is None or keep(p)]
+            yield rows
+            written += len(rows)
+            if progress is not None: progress(written, min(1.0, (start + EXPORT_CHUNK_ROWS) / len(candidates)))
+
+    temp_path = path + '.tmp'
+    try:
+        write(temp_path, chunks())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path): os.remove(temp_path)
+    return written
+
+class BackgroundExport:
+    """Runs write_export on a worker thread; the owner polls `messages` for (kind, rows, fraction).
+
+    kind is 'progress' while writing, then one of 'done', 'cancelled' or 'error' (rows is the exception).
+    """
+    def __init__(self, path, candidates, keep=None, fmt=None):
+        self.path, self.candidates, self.keep, self.fmt = path, candidates, keep, fmt
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="registry-export", daemon=True)
+
+    def start(self): self.thread.start()
+    def cancel(self): self.cancelled.set()
+
+    def _run(self):
+        try:
+            rows = write_export(self.path, self.candidates, self.keep, self.fmt, lambda rows, fraction: self.messages.put(('progress', rows, fraction)), self.cancelled)
+            self.messages.put(('done', rows, 1.0))
+        except ExportCancelled: self.messages.put(('cancelled', None, 1.0))
+        except Exception as e: self.messages.put(('error', e, 1.0))
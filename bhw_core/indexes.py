@@ -0,0 +1,154 @@
+"""Sorted date-keyed indexes: the prenatal checkup calendar and birth-date age cohorts."""
+import bisect
+from abc import ABC, abstractmethod
+from array import array
+from datetime import date, timedelta
+
+from .config import SITIO_CHOICES
+from .dates import CHECKUP_WEEKS
+from .derived import derived_cache
+from .registry import patient_registry
+
+DATE_KEY_ID_BITS = 32 # Keys pack (date ordinal << 32 | resident ID) into one int
+
+class DateKeyedIndex(ABC):
+    """Residents in one sorted array of (date ordinal << 32 | ID) keys, so a date range is two bisects plus a slice.
+    
+    Subclasses pick the date (and optional day offsets) per resident; a resident is re-indexed
+    when the source field changes in a registry update.
+    """
+    FIELD = None
+    OFFSETS = (0,) # Per-resident keys, added to the key of the indexed date
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._keys = array('q')
+        self._sorted = True
+        self._dates = {} # ID -> date currently indexed
+        registry.subscribe(self.on_change)
+
+    @abstractmethod
+    def _indexed_date(self, patient, today):
+        """The date a resident is filed under (None leaves the resident out), from their cached derived fields."""
+
+    def on_change(self, event, patients, changes):
+        if event == 'clear': self._keys = array('q'); self._sorted = True; self._dates = {}; return
+        if event == 'update':
+            if changes and self.FIELD not in changes: return
+            for p in patients: self._reindex(p)
+            return
+        
+        today = date.today()
+        for p in patients: # Bulk add/load: append now, sort once on the next query
+            day = self._indexed_date(p, today)
+            if day is None: continue
+            self._dates[p['ID']] = day
+            base = self._key(day, p['ID'])
+            self._keys.extend(base + offset for offset in self.OFFSETS)
+            self._sorted = False
+
+    def _key(self, day, patient_id):
+        return (day.toordinal() << DATE_KEY_ID_BITS) | patient_id
+
+    def _sorted_keys(self):
+        if not self._sorted: self._keys = array('q', sorted(self._keys)); self._sorted = True
+        return self._keys
+
+    def _reindex(self, patient):
+        keys = self._sorted_keys()
+        old_day, new_day = self._dates.pop(patient['ID'], None), self._indexed_date(patient, date.today())
+        if old_day == new_day and old_day is not None: self._dates[patient['ID']] = old_day; return
+        if old_day:
+            base = self._key(old_day, patient['ID'])
+            for offset in self.OFFSETS:
+                i = bisect.bisect_left(keys, base + offset)
+                if i < len(keys) and keys[i] == base + offset: del keys[i]
+        if new_day:
+            self._dates[patient['ID']] = new_day
+            base = self._key(new_day, patient['ID'])
+            for offset in self.OFFSETS: bisect.insort(keys, base + offset)
+
+    def _between(self, start, end):
+        """(date, ID) pairs for keys with start <= date <= end, in date order."""
+        keys = self._sorted_keys()
+        lo = bisect.bisect_left(keys, start.toordinal() << DATE_KEY_ID_BITS)
+        hi = bisect.bisect_left(keys, (end.toordinal() + 1) << DATE_KEY_ID_BITS)
+        id_mask = (1 << DATE_KEY_ID_BITS) - 1
+        return [(key >> DATE_KEY_ID_BITS, key & id_mask) for key in keys[lo:hi]]
+
+class CheckupCalendar(DateKeyedIndex):
+    """Every upcoming prenatal checkup, keyed by due date, for "who is due between A and B" queries.
+    
+    Pregnancies whose EDD had already passed when they were indexed are left out.
+    """
+    FIELD = 'LMP'
+    OFFSETS = tuple((7 * week) << DATE_KEY_ID_BITS for week in CHECKUP_WEEKS) # Checkup dates relative to the LMP
+
+    def _indexed_date(self, patient, today):
+        lmp = derived_cache.get(patient, today).lmp
+        return lmp if lmp and lmp + timedelta(days=280) >= today else None
+
+    def due_between(self, start, end, today=None):
+        """(date, resident, week) for every checkup with start <= date <= end, in date order.
+        
+        Only confirmed pregnancies are listed (LMP at least 4 weeks before today), matching the scheduler.
+        """
+        today = today or date.today()
+        due = []
+        for ordinal, patient_id in self._between(start, end):
+            lmp = self._dates[patient_id]
+            if today - lmp < timedelta(weeks=4): continue
+            day = date.fromordinal(ordinal)
+            due.append((day, self.registry.get(patient_id), (day - lmp).days // 7))
+        return due
+
+    def due_between_by_sitio(self, start, end, today=None):
+        """due_between() grouped by Sitio (known Sitios first, in SITIO_CHOICES order)."""
+        groups = {sitio: [] for sitio in SITIO_CHOICES}
+        for entry in self.due_between(start, end, today): groups.setdefault(entry[1].get('Sitio', 'N/A'), []).append(entry)
+        return {sitio: entries for sitio, entries in groups.items() if entries}
+
+def _years_before(day, years):
+    """The latest birth date that is at least `years` old on `day` (Feb 29 falls back to Feb 28)."""
+    try: return day.replace(year=day.year - years)
+    except ValueError: return date(day.year - years, 2, 28)
+
+class AgeIndex(DateKeyedIndex):
+    """Residents keyed by birth date: any age cohort on any reference date is a single range query."""
+    FIELD = 'Birthday'
+
+    def _indexed_date(self, patient, today):
+        return derived_cache.get(patient, today).birthday
+
+    def ids_youngest_first(self):
+        """IDs of every resident with a valid birth date, youngest first and same-day births by ID (the list order for sorting by age)."""
+        id_mask, keys, ids = (1 << DATE_KEY_ID_BITS) - 1, self._sorted_keys(), []
+        end = len(keys)
+        while end: # Birth dates newest first, each date's run of keys taken in ascending ID order
+            start = bisect.bisect_left(keys, keys[end - 1] & ~id_mask, 0, end)
+            ids.extend(key & id_mask for key in keys[start:end]); end = start
+        return ids
+
+    def cohort_ids(self, min_age=0, max_age=None, today=None):
+        """IDs of residents aged min_age..max_age (inclusive) on `today`, oldest first."""
+        today = today or date.today()
+        latest = _years_before(today, min_age) # Born on or before this date: at least min_age
+        earliest = _years_before(today, max_age + 1) + timedelta(days=1) if max_age is not None else date.min
+        return [patient_id for _, patient_id in self._between(earliest, latest)]
+
+    def cohort(self, min_age=0, max_age=None, today=None):
+        return [self.registry.get(patient_id) for patient_id in self.cohort_ids(min_age, max_age, today)]
+
+    def turning_ids(self, age, start, end):
+        """IDs of residents who reach `age` on a day between start and end (inclusive)."""
+        earliest = _years_before(start - timedelta(days=1), age) + timedelta(days=1) # Still younger the day before start
+        return [patient_id for _, patient_id in self._between(earliest, _years_before(end, age))]
+
+    def turning_this_month(self, age, today=None):
+        today = today or date.today()
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return [self.registry.get(patient_id) for patient_id in self.turning_ids(age, start, end)]
+
+checkup_calendar = CheckupCalendar(patient_registry)
+age_index = AgeIndex(patient_registry)
@@ -0,0 +1,126 @@
+"""Append-only JSON-lines change journal for the CSV and sharded backends, compacted into a fresh snapshot in the background."""
+import json
+import os
+import threading
+from collections import defaultdict
+
+from .config import FIELDNAMES
+from .records import DATA_FILE, LOAD_CHUNK_SIZE, PatientRecord, iter_registry_chunks, write_registry_rows
+from .registry import patient_registry
+
+JOURNAL_FILE = os.environ.get('BHW_JOURNAL_FILE', 'bhw_patient_registry_auto.journal')
+COMPACT_AFTER_ENTRIES = 2000 # Fold the journal into a fresh snapshot after this many edits
+
+def _apply_journal_update(patient, entry):
+    patient.update(entry['fields'])
+    record = entry.get('record')
+    # Replaying an entry already folded into the snapshot (crash during compaction) must not duplicate the visit
+    if record and (not patient['Records'] or patient['Records'][0] != record): patient['Records'].insert(0, record)
+
+def _read_journal(paths):
+    """Collapses journal files into (added rows by ID, pending update entries by ID), in write order."""
+    added, updates = {}, defaultdict(list)
+    for path in paths:
+        if not os.path.exists(path): continue
+        with open(path, mode='r', encoding='utf-8') as file:
+            for line in file:
+                try: entry = json.loads(line)
+                except ValueError: break # Torn final write from a crash; everything before it is intact
+                if entry['op'] == 'add':
+                    added[entry['row']['ID']] = entry['row']; updates.pop(entry['row']['ID'], None)
+                else: updates[entry['id']].append(entry)
+    return added, updates
+
+def iter_journaled_chunks(snapshot_path, journal_path, chunk_size=LOAD_CHUNK_SIZE, snapshot_chunks=None):
+    """Streams the last snapshot with the journal replayed over it, as (chunk, fraction) pairs.
+    
+    The journal is read first (it is small), so each snapshot row gets its pending edits applied
+    before it is handed out; residents added since the snapshot follow as a final chunk.
+    snapshot_chunks replaces reading snapshot_path (e.g. the shard files of a barangay).
+    """
+    added, updates = _read_journal([journal_path + '.compacting', journal_path])
+    
+    if snapshot_chunks is None and snapshot_path and os.path.exists(snapshot_path): snapshot_chunks = iter_registry_chunks(snapshot_path, chunk_size)
+    if snapshot_chunks is not None:
+        for chunk, fraction in snapshot_chunks:
+            chunk = [p for p in chunk if p.ID not in added] # Re-added rows are replaced by their journal version
+            for p in chunk:
+                for entry in updates.pop(p.ID, ()): _apply_journal_update(p, entry)
+            if chunk: yield chunk, fraction
+    
+    new_rows = []
+    for row in added.values():
+        p = PatientRecord(**{key: row[key] for key in FIELDNAMES if key != 'Records'}, Records=list(row['Records']))
+        for entry in updates.pop(p.ID, ()): _apply_journal_update(p, entry)
+        new_rows.append(p)
+    if new_rows: yield new_rows, 1.0
+
+class ChangeJournal:
+    """Append-only JSON-lines log of registry edits, fsynced per entry, folded into the CSV snapshot in the background.
+    
+    Each add, status/PWD/LMP change and new visit record costs one small append; on startup
+    iter_journaled_chunks() replays the log over the snapshot. Compaction rotates the log to
+    <journal>.compacting, writes a new snapshot on a worker thread and then deletes the rotated log.
+    """
+    def __init__(self, journal_path=JOURNAL_FILE, snapshot_path=DATA_FILE, compact_after=COMPACT_AFTER_ENTRIES, write_snapshot=None):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.write_snapshot = write_snapshot or self._write_csv_snapshot # write_snapshot(rows) must be durable when it returns
+        self.compact_after = compact_after
+        self.compaction = None
+        self.entries = 0
+        if os.path.exists(journal_path):
+            with open(journal_path, mode='r', encoding='utf-8') as file: self.entries = sum(1 for _ in file)
+        self.file = open(journal_path, mode='a', encoding='utf-8')
+
+    def on_change(self, event, patients, changes):
+        if event == 'add':
+            self.append([{'op': 'add', 'row': dict(p.to_row(), Records=list(p['Records']))} for p in patients])
+        elif event == 'update':
+            fields = {key: value for key, value in changes.items() if key != 'Records'}
+            self.append([{'op': 'update', 'id': p['ID'], 'fields': fields, 'record': changes.get('Records')} for p in patients])
+        else: return # 'load' came from the snapshot/journal; 'clear' is not a data change
+        if self.entries >= self.compact_after: self.compact()
+
+    def append(self, entries):
+        """Writes one event's entries and fsyncs once, so a bulk import is not one fsync per row."""
+        self.file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        self.file.flush(); os.fsync(self.file.fileno())
+        self.entries += len(entries)
+
+    def compact_if_needed(self):
+        """Called once loading finishes: folds edits replayed from a previous session into a new snapshot."""
+        if self.entries or os.path.exists(self.journal_path + '.compacting'): self.compact()
+
+    def compact(self, patients=None):
+        """Starts a background snapshot of the registry; edits made meanwhile go to a fresh journal."""
+        if self.compaction is not None and self.compaction.is_alive(): return
+        rotated = self.journal_path + '.compacting'
+        
+        self.file.close()
+        if os.path.exists(rotated): # Left over from an interrupted compaction: keep both logs until the snapshot lands
+            with open(rotated, mode='a', encoding='utf-8') as target, open(self.journal_path, mode='r', encoding='utf-8') as source: 
+                target.write(source.read())
+            os.remove(self.journal_path)
+        else: os.replace(self.journal_path, rotated)
+        self.file = open(self.journal_path, mode='a', encoding='utf-8')
+        self.entries = 0
+        
+        # Row tuples copied on the owning thread: the worker writes the registry as of the rotation, not later edits
+        snapshot = [p.row() for p in (patients if patients is not None else patient_registry)]
+        self.compaction = threading.Thread(target=self._write_snapshot, args=(snapshot, rotated), name="journal-compaction", daemon=True)
+        self.compaction.start()
+
+    def _write_snapshot(self, snapshot, rotated):
+        self.write_snapshot(snapshot)
+        os.remove(rotated)
+
+    def _write_csv_snapshot(self, snapshot):
+        temp_path = self.snapshot_path + '.tmp'
+        write_registry_rows(temp_path, snapshot)
+        with open(temp_path, mode='rb+') as file: os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+    def close(self):
+        if self.compaction is not None: self.compaction.join()
+        self.file.close()
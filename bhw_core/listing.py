@@ -0,0 +1,140 @@
+"""Sort orders and filter facets for the resident list views, kept in step with the registry."""
+import bisect
+from collections import defaultdict
+from datetime import date
+
+from .derived import derived_cache
+from . import storage
+from .indexes import age_index
+from .registry import patient_registry
+
+MISSING_KEY = date.max.toordinal() + 1 # Residents without the date sort after everyone else
+FACETS = ('Sitio', 'Health_Status', 'PWD_Type')
+
+def _date_key(day):
+    return day.toordinal() if day else MISSING_KEY
+
+# Typed sort key per list column, from the record and its cached parsed dates
+SORT_KEYS = {
+    'ID': lambda p, derived: p.ID,
+    'Name': lambda p, derived: p.Name.upper(),
+    'Age': lambda p, derived: -derived.birthday.toordinal() if derived.birthday else MISSING_KEY, # Youngest first
+    'Sitio': lambda p, derived: p.Sitio,
+    'Health_Status': lambda p, derived: p.Health_Status,
+    'LMP': lambda p, derived: _date_key(derived.lmp),
+    'EDD': lambda p, derived: _date_key(derived.lmp), # EDD is LMP + 280 days: same order
+    'PWD_Type': lambda p, derived: p.PWD_Type,
+}
+SORT_SOURCES = {'Sitio': 'Sitio', 'Health_Status': 'Health_Status', 'LMP': 'LMP', 'EDD': 'LMP', 'PWD_Type': 'PWD_Type'}
+
+def _facet_values(p):
+    """(Sitios, illnesses, PWD types) a resident is filed under; Health_Status can list several illnesses."""
+    return (p.Sitio,), [status for status in p.Health_Status.split(', ') if status], (p.PWD_Type,)
+
+class ListIndex:
+    """Sort orders and per-value ID sets over the registry, for sorting and filtering the list views.
+
+    ID, Name and Age order come from indexes the registry keeps anyway (the name index and the
+    birth-date index). The other columns get a sorted list of (key, ID) built on the first sort by
+    that column; a facet maps each Sitio / illness / PWD type to the set of IDs filed under it,
+    built on the first filter. Both are then updated per change event, and date keys come from the
+    date cache, so no query re-parses a date.
+    """
+    def __init__(self, registry, age_index):
+        self.registry = registry
+        self.age_index = age_index
+        self._reset()
+        registry.subscribe(self.on_change)
+
+    def _reset(self):
+        self._orders = {} # column -> [(key, ID)], sorted unless the column is in _unsorted
+        self._keys = {} # column -> {ID: key} currently in its order
+        self._unsorted = set()
+        self._facets = None # facet -> value -> set of IDs
+
+    def on_change(self, event, patients, changes):
+        if event == 'clear': self._reset(); return
+        today = date.today()
+        for column in self._orders:
+            if event == 'update' and changes is not None and SORT_SOURCES[column] not in changes: continue
+            for p in patients: self._rekey(column, p, SORT_KEYS[column](p, derived_cache.get(p, today)), bulk=event != 'update')
+        if self._facets is not None and (event != 'update' or changes is None or not changes.keys().isdisjoint(FACETS)):
+            for p in patients: self._file(p, unfile=event == 'update')
+
+    def _rekey(self, column, p, key, bulk=False):
+        order, keys = self._orders[column], self._keys[column]
+        old = keys.get(p.ID)
+        if old == key: return
+        if bulk and old is None: # Adds/loads: append now, sort once on the next query
+            order.append((key, p.ID)); self._unsorted.add(column)
+        else:
+            order = self._order(column)
+            if old is not None: del order[bisect.bisect_left(order, (old, p.ID))]
+            bisect.insort(order, (key, p.ID))
+        keys[p.ID] = key
+
+    def _order(self, column):
+        if column not in self._orders:
+            today, key_of = date.today(), SORT_KEYS[column]
+            keys = self._keys[column] = {p.ID: key_of(p, derived_cache.get(p, today)) for p in self.registry}
+            self._orders[column] = sorted(zip(keys.values(), keys))
+        elif column in self._unsorted:
+            self._orders[column].sort(); self._unsorted.discard(column)
+        return self._orders[column]
+
+    def _ordered_ids(self, column):
+        """Every resident ID in ascending column order."""
+        if column == 'ID': return sorted(p.ID for p in self.registry)
+        if column == 'Name': return self.registry.ids_by_name()
+        if column == 'Age': # Youngest first, then residents without a valid birth date; ties by ID as in the (key, ID) orders
+            ids = self.age_index.ids_youngest_first()
+            if len(ids) < len(self.registry):
+                dated = set(ids); ids.extend(sorted(p.ID for p in self.registry if p.ID not in dated))
+            return ids
+        return [patient_id for _, patient_id in self._order(column)]
+
+    def _file(self, p, unfile=False):
+        # An edited resident is first dropped from every value of each facet; there are only a few dozen values
+        for facet, values in zip(FACETS, _facet_values(p)):
+            index = self._facets[facet]
+            if unfile:
+                for ids in index.values(): ids.discard(p.ID)
+            for value in values: index[value].add(p.ID)
+
+    def _facet_sets(self):
+        if self._facets is None:
+            sitios, illnesses, pwd_types = defaultdict(set), defaultdict(set), defaultdict(set)
+            for p in self.registry: # Same filing as _file(), inlined: this pass touches every resident
+                patient_id = p.ID
+                sitios[p.Sitio].add(patient_id); pwd_types[p.PWD_Type].add(patient_id)
+                for status in p.Health_Status.split(', '):
+                    if status: illnesses[status].add(patient_id)
+            self._facets = dict(zip(FACETS, (sitios, illnesses, pwd_types)))
+        return self._facets
+
+    def select(self, ids=None, filters=None, sort=None, descending=False):
+        """Residents to list: `ids` (everyone if None) narrowed by filters, ordered by the sort column (ID by default).
+
+        filters maps a facet to the values to keep: values of one facet are OR-ed, facets are AND-ed.
+        """
+        selected = None
+        for facet, values in (filters or {}).items():
+            if not values: continue
+            if facet == 'Sitio' and storage.sqlite_store is not None: # Indexed Sitio query on the SQLite backend
+                matches = {p.ID for value in values for p in storage.registry_subset('sitio_ids', None, value)}
+            else:
+                index = self._facet_sets()[facet]
+                matches = set().union(*(index.get(value, ()) for value in values))
+            selected = matches if selected is None else selected & matches
+        if ids is not None: selected = set(ids) if selected is None else selected.intersection(ids)
+
+        sort, get_many = sort or 'ID', self.registry.get_many
+        if selected is None: rows = get_many(self._ordered_ids(sort))
+        elif len(selected) * 8 < len(self.registry): # A small subset is cheaper to sort by its own keys than to pick out of the order
+            today, key_of = date.today(), SORT_KEYS[sort]
+            rows = sorted(get_many(selected), key=lambda p: (key_of(p, derived_cache.get(p, today)), p.ID))
+        else: rows = get_many(patient_id for patient_id in self._ordered_ids(sort) if patient_id in selected)
+        if descending: rows.reverse()
+        return rows
+
+list_index = ListIndex(patient_registry, age_index)
@@ -0,0 +1,85 @@
+"""Opt-in instrumentation: per-function call counts and latency percentiles (BHW_PROFILE=1, or --profile on Bhw.py / the CLI)."""
+import atexit
+import json
+import math
+import os
+import sys
+import time
+from array import array
+from datetime import datetime
+from functools import wraps
+
+PROFILE_REPORT_BASENAME = os.environ.get('BHW_PROFILE_FILE', 'bhw_profile') # Reports go to <basename>.txt / .json
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+class Profiler:
+    """Per-function call durations (seconds), collected only while profiling is enabled."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.samples = {} # name -> array('d') of durations
+
+    def series(self, name):
+        return self.samples.setdefault(name, array('d'))
+
+    def reset(self):
+        for durations in self.samples.values(): del durations[:]
+
+    def summary(self):
+        """name -> calls, total and p50/p95/p99/max latency in milliseconds, slowest total first."""
+        rows = {}
+        for name, durations in self.samples.items():
+            if not durations: continue
+            ordered = sorted(durations)
+            rows[name] = {'calls': len(ordered), 'total_ms': sum(ordered) * 1000, 'p50_ms': _percentile(ordered, 0.50) * 1000,
+                          'p95_ms': _percentile(ordered, 0.95) * 1000, 'p99_ms': _percentile(ordered, 0.99) * 1000, 'max_ms': ordered[-1] * 1000}
+        return dict(sorted(rows.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def report_text(self, summary=None):
+        summary = self.summary() if summary is None else summary
+        lines = [f"{'FUNCTION':<45}{'CALLS':>9}{'TOTAL ms':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'MAX ms':>10}"]
+        for name, row in summary.items():
+            lines.append(f"{name:<45}{row['calls']:>9}{row['total_ms']:>12.1f}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}")
+        return "\n".join(lines) if summary else "No instrumented calls recorded."
+
+    def dump(self, basename=PROFILE_REPORT_BASENAME):
+        """Writes the text and JSON reports; returns their paths."""
+        summary = self.summary()
+        with open(basename + '.txt', 'w', encoding='utf-8') as f: f.write(self.report_text(summary) + "\n")
+        with open(basename + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'generated': datetime.now().isoformat(timespec='seconds'), 'functions': summary}, f, indent=2)
+        return basename + '.txt', basename + '.json'
+
+profiler = Profiler()
+
+def instrumented(func):
+    """Times every call of `func` while profiling is enabled; otherwise a call costs one flag check.
+    
+    Only coarse functions (views, loads, reports) are instrumented, so the check is never on a per-row path.
+    """
+    durations = profiler.series(func.__qualname__)
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled: return func(*args, **kwargs)
+        start = time.perf_counter()
+        try: return func(*args, **kwargs)
+        finally: durations.append(time.perf_counter() - start)
+    return wrapper
+
+def _dump_profile_at_exit():
+    try: txt_path, _ = profiler.dump()
+    except OSError as e: print(f"Could not write profile report: {e}", file=sys.stderr); return
+    print(profiler.report_text(), file=sys.stderr)
+    print(f"Profile report written to {txt_path} (+ .json)", file=sys.stderr)
+
+def enable_profiling():
+    """Starts recording instrumented calls; the report is written (and printed to stderr) at exit."""
+    if profiler.enabled: return
+    profiler.enabled = True
+    atexit.register(_dump_profile_at_exit)
+
+if os.environ.get('BHW_PROFILE') == '1': enable_profiling()
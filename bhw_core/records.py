@@ -0,0 +1,106 @@
+"""The compact PatientRecord row type and the streaming CSV reader/writer for the registry file."""
+import csv
+import os
+from sys import intern
+
+from .config import FIELDNAMES
+
+DATA_FILE = 'bhw_patient_registry_auto.csv'
+LOAD_CHUNK_SIZE = 2000
+
+class PatientRecord:
+    """Compact resident record: one __slots__ attribute per FIELDNAMES column, no per-row dict.
+    
+    Supports the dict-style access the GUI uses (p['Name'], p.get(...), p.update(...)). The visit
+    history is kept as the raw ';'-joined CSV string and only split into a list the first time
+    Records is read (profile/update views), so loading never touches it.
+    """
+    __slots__ = ('ID', 'Name', 'Birthday', 'LMP', 'Sitio', 'Health_Status', 'PWD_Type', '_records', '_records_raw')
+    FIELDS = frozenset(FIELDNAMES)
+
+    def __init__(self, ID, Name, Birthday='N/A', LMP='N/A', Sitio='N/A', Health_Status='N/A', Records=None, PWD_Type='NOT PWD', records_raw=''):
+        self.ID = ID; self.Name = Name; self.Birthday = Birthday; self.LMP = LMP
+        self.Sitio = Sitio; self.Health_Status = Health_Status; self.PWD_Type = PWD_Type
+        self._records = Records; self._records_raw = records_raw
+
+    @property
+    def Records(self):
+        if self._records is None:
+            self._records = self._records_raw.split(';') if self._records_raw else []
+            self._records_raw = None
+        return self._records
+
+    @Records.setter
+    def Records(self, value):
+        self._records = value; self._records_raw = None
+
+    def records_text(self):
+        """The ';'-joined history as stored on disk, without parsing it if it was never opened."""
+        raw, records = self._records_raw, self._records # Read raw first: Records clears it only after setting the list
+        return raw if records is None else ';'.join(records)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS: raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS: raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key): return key in self.FIELDS
+    def get(self, key, default=None): return getattr(self, key) if key in self.FIELDS else default
+    def keys(self): return list(FIELDNAMES)
+
+    def update(self, fields):
+        for key, value in fields.items(): self[key] = value
+
+    def to_row(self):
+        """Flat dict of strings for csv.DictWriter."""
+        return {'ID': self.ID, 'Name': self.Name, 'Birthday': self.Birthday, 'LMP': self.LMP, 'Sitio': self.Sitio, 
+                'Health_Status': self.Health_Status, 'Records': self.records_text(), 'PWD_Type': self.PWD_Type}
+
+    def row(self):
+        """Tuple of the stored values in FIELDNAMES order; a detached copy that later edits do not reach."""
+        return (self.ID, self.Name, self.Birthday, self.LMP, self.Sitio, self.Health_Status, self.records_text(), self.PWD_Type)
+
+    def __repr__(self): return f"PatientRecord(ID={self.ID!r}, Name={self.Name!r})"
+
+def _parse_registry_row(row):
+    """Builds a PatientRecord from a csv.reader row laid out in FIELDNAMES order."""
+    if len(row) < len(FIELDNAMES): row = row + [''] * (len(FIELDNAMES) - len(row)) # Older files have no PWD_Type column
+    record_id, name, bday, lmp, sitio, health, records, pwd_type = row[:len(FIELDNAMES)]
+    
+    # Data cleanup/migration for older entries; low-cardinality columns are interned so rows share one string
+    return PatientRecord(int(record_id), name, bday, lmp or 'N/A', intern(sitio), intern(health), 
+                         PWD_Type=intern(pwd_type) if pwd_type else 'NOT PWD', records_raw=records)
+
+def iter_registry_chunks(path=DATA_FILE, chunk_size=LOAD_CHUNK_SIZE):
+    """Streams (list of PatientRecord, fraction_read) chunks; safe to run on a worker thread."""
+    file_size = os.path.getsize(path) or 1
+    chars_read = 0
+    
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        def counted_lines():
+            nonlocal chars_read
+            for line in file:
+                chars_read += len(line)
+                yield line
+        
+        reader = csv.reader(counted_lines())
+        next(reader, None) # Skip the header row
+        chunk = []
+        for row in reader:
+            if not row: continue
+            chunk.append(_parse_registry_row(row))
+            if len(chunk) >= chunk_size:
+                yield chunk, min(chars_read / file_size, 1.0)
+                chunk = []
+        if chunk: yield chunk, 1.0
+
+def write_registry_csv(path, patients):
+    write_registry_rows(path, (patient.row() for patient in patients))
+
+def write_registry_rows(path, rows):
+    """Writes PatientRecord.row() tuples as a registry CSV."""
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file); writer.writerow(FIELDNAMES); writer.writerows(rows)
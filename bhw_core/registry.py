@@ -0,0 +1,117 @@
+"""The in-memory resident registry: ID and name indexes plus the change-event bus every other index listens to."""
+import bisect
+
+class PatientRegistry:
+    """Resident list with an ID index (dict) and a sorted (NAME, ID) index for prefix search.
+    
+    All adds and edits must go through add()/extend()/update() so both indexes stay in sync.
+    """
+    def __init__(self):
+        self._patients = []
+        self._by_id = {}
+        self._name_index = [] # Sorted list of (UPPERCASE NAME, ID)
+        self._name_index_sorted = True
+        self._listeners = []
+        self.version = 0 # Bumped on every change event, so views can tell whether what they show is stale
+        self.id_floor = 1 # Lowest ID to hand out; the sharded backend raises it to the barangay's ID range
+        self.next_id = 1 # Next unused resident ID; kept above every ID added so far
+        self.id_allocator = None # Optional callable handing out IDs instead (e.g. a sync server's leased ID blocks)
+
+    def subscribe(self, listener):
+        """Registers listener(event, patients, changes) for 'add', 'load', 'update' and 'clear' events.
+        
+        'load' is a bulk extend() from storage; persistence listeners ignore it, counters treat it like 'add'.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """Detaches a listener, e.g. an index a batch job never queries."""
+        if listener in self._listeners: self._listeners.remove(listener)
+
+    def _notify(self, event, patients=(), changes=None):
+        self.version += 1
+        for listener in self._listeners: listener(event, patients, changes)
+
+    def __iter__(self): return iter(self._patients)
+    def __len__(self): return len(self._patients)
+    def __getitem__(self, index): return self._patients[index] # Index/slice in insertion order
+    def __bool__(self): return bool(self._patients)
+
+    def clear(self):
+        self._patients = []; self._by_id = {}; self._name_index = []; self._name_index_sorted = True
+        self.next_id = self.id_floor
+        self._notify('clear')
+
+    def _sorted_name_index(self):
+        # Chunked loads only append; sorting once on first use avoids re-sorting the whole index per chunk
+        if not self._name_index_sorted: self._name_index.sort(); self._name_index_sorted = True
+        return self._name_index
+
+    def get(self, patient_id):
+        return self._by_id.get(patient_id)
+
+    def get_many(self, patient_ids):
+        """Residents for known IDs, in the given order (one C-level dict lookup each)."""
+        return list(map(self._by_id.__getitem__, patient_ids))
+
+    def allocate_id(self):
+        """Reserves and returns the next resident ID."""
+        if self.id_allocator is not None: return self.id_allocator()
+        patient_id = self.next_id
+        self.next_id += 1
+        return patient_id
+
+    def add(self, patient):
+        self._patients.append(patient)
+        self.next_id = max(self.next_id, patient['ID'] + 1)
+        self._by_id[patient['ID']] = patient
+        bisect.insort(self._sorted_name_index(), (patient['Name'].upper(), patient['ID']))
+        self._notify('add', [patient])
+
+    def extend(self, patients, event='load'):
+        # Bulk append; the name index is re-sorted lazily on the next lookup instead of insort per row.
+        # 'load' marks rows that came from storage; bulk imports of new residents pass event='add'.
+        for p in patients:
+            self._patients.append(p)
+            self._by_id[p['ID']] = p
+            self._name_index.append((p['Name'].upper(), p['ID']))
+        if patients: self._name_index_sorted = False; self.next_id = max(self.next_id, max(p['ID'] for p in patients) + 1)
+        self._notify(event, patients)
+
+    def update(self, patient, record=None, **fields):
+        """Applies field changes (and an optional new Records entry, newest first) to a patient.
+
+        Fields already holding the given value are dropped, so listeners (the journal, sync) only see real
+        changes; an update that changes nothing sends no event.
+        """
+        fields = {field: value for field, value in fields.items() if patient[field] != value}
+        if not fields and not record: return
+        if 'Name' in fields:
+            name_index = self._sorted_name_index()
+            del name_index[bisect.bisect_left(name_index, (patient['Name'].upper(), patient['ID']))]
+            bisect.insort(name_index, (fields['Name'].upper(), patient['ID']))
+        patient.update(fields)
+        if record: patient['Records'].insert(0, record)
+        self._notify('update', [patient], dict(fields, Records=record) if record else fields)
+
+    def ensure_indexes(self):
+        """Finishes any deferred index work on the calling thread, so worker-thread searches only read."""
+        self._sorted_name_index()
+
+    def ids_by_name(self):
+        """Every resident ID in A-Z name order (ties by ID)."""
+        return [patient_id for _, patient_id in self._sorted_name_index()]
+
+    def find_by_name_prefix(self, prefix, limit=None):
+        """Returns residents whose name starts with prefix (case-insensitive), A-Z, in O(log n + k)."""
+        prefix = prefix.upper()
+        if not prefix: return []
+        name_index = self._sorted_name_index()
+        matches = []
+        i = bisect.bisect_left(name_index, (prefix,))
+        while i < len(name_index) and name_index[i][0].startswith(prefix) and (limit is None or len(matches) < limit):
+            matches.append(self._by_id[name_index[i][1]])
+            i += 1
+        return matches
+
+patient_registry = PatientRegistry()
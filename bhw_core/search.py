@@ -0,0 +1,127 @@
+"""Resident search: exact ID, name prefix and ranked fuzzy (trigram) name matching."""
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from .profiling import instrumented
+from .registry import patient_registry
+
+def search_patients(search_term, limit=None):
+    """Returns every match (or the first limit) for an ID or name prefix: the ID hit first, then name matches A-Z."""
+    search_term = search_term.strip()
+    if not search_term: return []
+    
+    by_id = None
+    try: by_id = patient_registry.get(int(search_term))
+    except ValueError: pass
+    
+    matches = [by_id] if by_id else []
+    matches.extend(p for p in patient_registry.find_by_name_prefix(search_term, limit) if p is not by_id)
+    return matches[:limit]
+
+@instrumented
+def find_patient_by_id_or_name(search_term):
+    matches = search_patients(search_term)
+    return matches[0] if matches else None
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word):
+    padded = f"  {word} "
+    return tuple(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _name_trigrams(name):
+    """Padded per-word trigrams, so word order (surname first or last) does not matter."""
+    grams = set()
+    for word in name.upper().replace(',', ' ').replace('.', ' ').split(): grams.update(_word_trigrams(word)) # Names share words heavily
+    return grams
+
+class TrigramIndex:
+    """Inverted index from name trigrams to resident IDs for typo-tolerant, ranked name search.
+    
+    Postings are compact int arrays. A query counts shared trigrams over the rarest query trigrams
+    first, stopping at a posting budget, then ranks the candidates by exact trigram overlap.
+    """
+    SCAN_BUDGET = 200000 # Max posting entries read per query; keeps very common trigrams from dominating
+    MIN_COVERAGE = 0.34 # Fraction of the query's trigrams a name must share to be listed
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._postings = defaultdict(lambda: array('q')) # 64-bit on every platform: barangay ID ranges go past 2**31
+        self._names = {} # ID -> name as indexed (to find stale postings on rename)
+        registry.subscribe(self.on_change)
+
+    def on_change(self, event, patients, changes):
+        if event == 'clear': self._postings.clear(); self._names = {}; return
+        if event == 'update' and 'Name' not in changes: return
+        self.index(patients)
+
+    def index(self, patients):
+        """(Re)indexes residents whose name changed. The background loader calls this on its worker
+        thread before handing a chunk over, so the owning thread's 'load' event finds them already indexed."""
+        postings, names = self._postings, self._names
+        for p in patients:
+            old_name = names.get(p['ID'])
+            if old_name == p['Name']: continue
+            # The name goes in before the postings: a search on another thread may see an ID as soon as it is posted
+            names[p['ID']] = p['Name']
+            if old_name is not None:
+                for gram in _name_trigrams(old_name): postings[gram].remove(p['ID'])
+            for gram in _name_trigrams(p['Name']): postings[gram].append(p['ID'])
+
+    def search(self, query, limit=20, cancelled=None):
+        """Returns [(score, patient)] best first; score is the share of query trigrams found in the name.
+        
+        cancelled() is polled between steps; the search returns None as soon as it reports True. Safe to
+        run on a worker thread while the owning thread edits the registry: residents gone by then are skipped.
+        """
+        query_grams = _name_trigrams(query)
+        if not query_grams: return []
+        
+        hits = Counter(); scanned = 0
+        for gram in sorted(query_grams, key=lambda g: len(self._postings.get(g, ()))):
+            if cancelled and cancelled(): return None
+            postings = self._postings.get(gram)
+            if not postings: continue
+            if scanned and scanned + len(postings) > self.SCAN_BUDGET: break
+            hits.update(postings); scanned += len(postings)
+        
+        # Re-score the best candidates exactly: coverage of the query, then Dice similarity as tie-break
+        ranked = []
+        for i, (patient_id, _) in enumerate(hits.most_common(limit * 20)):
+            if cancelled and i % 256 == 0 and cancelled(): return None
+            name = self._names.get(patient_id)
+            if name is None: continue # Dropped by a concurrent 'clear'
+            name_grams = _name_trigrams(name)
+            shared = len(query_grams & name_grams)
+            coverage = shared / len(query_grams)
+            if coverage >= self.MIN_COVERAGE:
+                ranked.append((coverage, 2 * shared / (len(query_grams) + len(name_grams)), patient_id))
+        ranked.sort(reverse=True)
+        matches = ((coverage, self.registry.get(patient_id)) for coverage, _, patient_id in ranked)
+        return [match for match in matches if match[1] is not None][:limit] # Indexed by the loader, not yet in the registry
+
+name_trigram_index = TrigramIndex(patient_registry)
+
+def iter_search_candidates(search_term, limit=20, cancelled=None):
+    """Yields the growing ranked candidate list: exact ID and name-prefix matches first, then with fuzzy matches added.
+    
+    Stops early (without a final yield) once cancelled() reports True; safe to run on a worker thread.
+    """
+    candidates = search_patients(search_term, limit)
+    yield list(candidates)
+    if len(candidates) >= limit: return
+    
+    fuzzy = name_trigram_index.search(search_term, limit, cancelled)
+    if fuzzy is None: return
+    seen = {p['ID'] for p in candidates}
+    for _, p in fuzzy:
+        if len(candidates) >= limit: break
+        if p['ID'] not in seen: candidates.append(p); seen.add(p['ID'])
+    yield candidates
+
+@instrumented
+def search_candidates(search_term, limit=20):
+    """Ranked candidate list for the search boxes: exact ID, then name-prefix matches, then fuzzy trigram matches."""
+    candidates = []
+    for candidates in iter_search_candidates(search_term, limit): pass
+    return candidates
@@ -0,0 +1,181 @@
+"""Registry sharded by barangay and Sitio: one CSV per (barangay, Sitio), with per-shard parallel I/O and aggregation.
+
+Layout under the shard root:
+    shards.json                      barangay -> shard number (fixes the barangay's ID range)
+    <NNN>_<barangay>/<sitio>.csv     residents of one Sitio, same columns as the single registry file
+    <NNN>_<barangay>/changes.journal edits not yet written to the shards (sharded storage backend)
+
+Resident IDs are unique across all barangays without the barangays coordinating: barangay number k
+hands out IDs from [k * BARANGAY_ID_SPAN, (k + 1) * BARANGAY_ID_SPAN). Range 0 belongs to registries
+created before sharding, whose residents keep their IDs when split into shards.
+"""
+import csv
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from .config import FIELDNAMES
+from .derived import DerivedCache
+from .indexes import DATE_KEY_ID_BITS
+from .journal import iter_journaled_chunks
+from .profiling import instrumented
+from .records import LOAD_CHUNK_SIZE, _parse_registry_row, iter_registry_chunks
+from .stats import _empty_stats, build_crosstab_report, compute_stats_full_scan, merge_stats
+
+SHARD_ROOT = os.environ.get('BHW_SHARD_ROOT', 'bhw_registry_shards')
+SHARD_BARANGAY = os.environ.get('BHW_BARANGAY', '') # Barangay this station edits; defaults to the first one registered
+DEFAULT_BARANGAY = 'DEFAULT'
+MANIFEST_FILE = 'shards.json'
+SHARD_JOURNAL_FILE = 'changes.journal'
+BARANGAY_ID_SPAN = 10_000_000 # IDs per barangay
+MAX_BARANGAYS = (1 << DATE_KEY_ID_BITS) // BARANGAY_ID_SPAN - 1 # IDs must fit the 32-bit ID part of the date index keys
+
+def _safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('._') or 'N_A'
+
+def _worker_count(tasks, max_workers=None):
+    return max(1, min(tasks, max_workers or os.cpu_count() or 1))
+
+def _map_shards(func, tasks, max_workers=None):
+    """func over tasks (one per shard) in a process pool, results in task order; runs in-process when one worker is enough."""
+    if _worker_count(len(tasks), max_workers) == 1:
+        yield from map(func, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=_worker_count(len(tasks), max_workers)) as executor:
+        yield from executor.map(func, tasks)
+
+class ShardSet:
+    """The shard root: barangay numbering (and so ID ranges) plus the per-Sitio shard files of each barangay."""
+    def __init__(self, root=SHARD_ROOT):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self.numbers = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, mode='r', encoding='utf-8') as file: self.numbers = json.load(file)['barangays']
+
+    def barangays(self):
+        """Registered barangays in registration order."""
+        return sorted(self.numbers, key=self.numbers.get)
+
+    def register(self, barangay):
+        """Returns the barangay's shard number, assigning the next free one (and with it an ID range) on first use."""
+        if barangay not in self.numbers:
+            if not barangay.strip(): raise ValueError("A barangay name is required.")
+            number = max(self.numbers.values(), default=0) + 1
+            if number > MAX_BARANGAYS: raise ValueError(f"Cannot register more than {MAX_BARANGAYS} barangays.")
+            self.numbers[barangay] = number
+            os.makedirs(self.barangay_dir(barangay), exist_ok=True)
+            self._save_manifest()
+        return self.numbers[barangay]
+
+    def _save_manifest(self):
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, mode='w', encoding='utf-8') as file: json.dump({'barangays': self.numbers}, file, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def active_barangay(self):
+        """The barangay this station edits: BHW_BARANGAY, else the first registered one."""
+        return SHARD_BARANGAY or next(iter(self.barangays()), DEFAULT_BARANGAY)
+
+    def id_range(self, barangay):
+        number = self.numbers[barangay]
+        return number * BARANGAY_ID_SPAN, (number + 1) * BARANGAY_ID_SPAN
+
+    def barangay_dir(self, barangay):
+        # The number prefix keeps directories distinct even if two names reduce to the same safe name
+        return os.path.join(self.root, f"{self.numbers[barangay]:03d}_{_safe_name(barangay)}")
+
+    def shard_path(self, barangay, sitio):
+        return os.path.join(self.barangay_dir(barangay), _safe_name(sitio) + '.csv')
+
+    def journal_path(self, barangay):
+        return os.path.join(self.barangay_dir(barangay), SHARD_JOURNAL_FILE)
+
+    def shard_paths(self, barangay):
+        """The barangay's shard files (none if it has not been saved yet)."""
+        if barangay not in self.numbers or not os.path.isdir(self.barangay_dir(barangay)): return []
+        directory = self.barangay_dir(barangay)
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.csv'))
+
+def _read_shard_rows(path):
+    """Worker: the shard's csv rows as plain lists, which pickle back to the parent much faster than records."""
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        return [row for row in reader if row]
+
+def _write_shard(task):
+    """Worker: writes one shard file (header plus rows in FIELDNAMES order) atomically; returns its path."""
+    path, rows = task
+    temp_path = path + '.tmp'
+    with open(temp_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file); writer.writerow(FIELDNAMES); writer.writerows(rows)
+        file.flush(); os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    return path
+
+def _aggregate_barangay(task):
+    """Worker: dashboard counters and cross-tabs for one barangay (its shards with its journal replayed), with a private date cache."""
+    shard_set, barangay, today = task
+    chunks = iter_journaled_chunks(None, shard_set.journal_path(barangay), snapshot_chunks=iter_shard_chunks(shard_set, [barangay], max_workers=1))
+    cache, patients = DerivedCache(), [p for chunk, _ in chunks for p in chunk]
+    return compute_stats_full_scan(patients, today, cache), build_crosstab_report(patients, today, cache)
+
+def iter_shard_chunks(shard_set, barangays=None, chunk_size=LOAD_CHUNK_SIZE, max_workers=None):
+    """Streams (chunk, fraction) for the given barangays' shards (all by default), reading the files in parallel.
+
+    Workers read and tokenize the shard files; records are built by the consuming (loader) thread.
+    """
+    paths = [path for barangay in (barangays or shard_set.barangays()) for path in shard_set.shard_paths(barangay)]
+    for done, rows in enumerate(_map_shards(_read_shard_rows, paths, max_workers)):
+        for start in range(0, len(rows), chunk_size):
+            end = min(start + chunk_size, len(rows))
+            yield [_parse_registry_row(row) for row in rows[start:end]], (done + end / len(rows)) / len(paths)
+
+@instrumented
+def save_shards(shard_set, barangay, patients, max_workers=None):
+    """Writes a barangay's residents as one shard per Sitio, in parallel; removes shards of Sitios left empty.
+
+    Returns the number of shard files written.
+    """
+    return save_shard_rows(shard_set, barangay, (p.row() for p in patients), max_workers)
+
+def save_shard_rows(shard_set, barangay, rows, max_workers=None):
+    """save_shards() for PatientRecord.row() tuples, e.g. a journal compaction snapshot."""
+    shard_set.register(barangay)
+    shard_rows, paths = defaultdict(list), {}
+    for row in rows:
+        sitio = row[4]
+        path = paths.get(sitio) or paths.setdefault(sitio, shard_set.shard_path(barangay, sitio))
+        shard_rows[path].append(row)
+    written = set(_map_shards(_write_shard, list(shard_rows.items()), max_workers))
+    for path in shard_set.shard_paths(barangay):
+        if path not in written: os.remove(path)
+    return len(written)
+
+def migrate_csv_to_shards(csv_path, shard_set, barangay, max_workers=None):
+    """Splits a single registry CSV into the barangay's Sitio shards; residents keep their IDs. Returns the count."""
+    patients = [p for chunk, _ in iter_registry_chunks(csv_path) for p in chunk]
+    save_shards(shard_set, barangay, patients, max_workers)
+    return len(patients)
+
+@instrumented
+def aggregate_shards(shard_set, barangays=None, today=None, max_workers=None):
+    """Dashboard counters and cross-tabs over many barangays, counted per barangay in worker processes and then merged.
+
+    Each barangay's pending journal edits are replayed over its shards first, so the counts match what
+    its station shows. Only the small counters cross process boundaries. Returns (stats, crosstabs,
+    stats by barangay).
+    """
+    today = today or date.today()
+    barangays = [barangay for barangay in (barangays or shard_set.barangays()) if barangay in shard_set.numbers]
+    stats, crosstabs, by_barangay = _empty_stats(), build_crosstab_report((), today), {}
+    results = _map_shards(_aggregate_barangay, [(shard_set, barangay, today) for barangay in barangays], max_workers)
+    for barangay, (barangay_stats, barangay_crosstabs) in zip(barangays, results):
+        merge_stats(stats, barangay_stats)
+        merge_stats(by_barangay.setdefault(barangay, _empty_stats()), barangay_stats)
+        for tab, barangay_tab in zip(crosstabs, barangay_crosstabs): tab.merge(barangay_tab)
+    return stats, crosstabs, by_barangay
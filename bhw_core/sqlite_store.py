@@ -0,0 +1,98 @@
+"""Optional SQLite backend (BHW_STORAGE=sqlite): write-through mirror of the registry with indexed list queries."""
+import os
+import sqlite3
+from datetime import date, timedelta
+from sys import intern
+
+from .records import LOAD_CHUNK_SIZE, PatientRecord, iter_registry_chunks
+
+DB_FILE = os.environ.get('BHW_DB_FILE', 'bhw_patient_registry.db')
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS residents (
+    ID INTEGER PRIMARY KEY, Name TEXT NOT NULL, Birthday TEXT, LMP TEXT, Sitio TEXT,
+    Health_Status TEXT, Records TEXT, PWD_Type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_residents_sitio ON residents(Sitio);
+CREATE INDEX IF NOT EXISTS idx_residents_birthday ON residents(Birthday);
+CREATE INDEX IF NOT EXISTS idx_residents_lmp ON residents(LMP);
+CREATE INDEX IF NOT EXISTS idx_residents_pwd_type ON residents(PWD_Type);
+"""
+ISO_DATE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' # Only zero-padded ISO dates compare correctly as text
+
+def _connect_sqlite(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL") # Durable across app crashes; WAL keeps commits cheap
+    conn.executescript(SQLITE_SCHEMA)
+    return conn
+
+def migrate_csv_to_sqlite(csv_path, db_path):
+    """One-shot import of the CSV registry into a new/empty SQLite database. Returns rows copied."""
+    conn = _connect_sqlite(db_path)
+    copied = 0
+    try:
+        with conn:
+            for chunk, _ in iter_registry_chunks(csv_path):
+                conn.executemany("INSERT OR REPLACE INTO residents VALUES (?, ?, ?, ?, ?, ?, ?, ?)", 
+                                 [(p.ID, p.Name, p.Birthday, p.LMP, p.Sitio, p.Health_Status, p.records_text(), p.PWD_Type) for p in chunk])
+                copied += len(chunk)
+            conn.execute("PRAGMA user_version = 1") # Marks the migration as done
+    finally: conn.close()
+    return copied
+
+def iter_sqlite_chunks(db_path, chunk_size=LOAD_CHUNK_SIZE, migrate_from=None):
+    """Same (chunk, fraction) stream as iter_registry_chunks, read from SQLite on its own connection."""
+    conn = _connect_sqlite(db_path)
+    try:
+        if migrate_from and conn.execute("PRAGMA user_version").fetchone()[0] == 0 and os.path.exists(migrate_from):
+            migrate_csv_to_sqlite(migrate_from, db_path)
+        
+        total = conn.execute("SELECT COUNT(*) FROM residents").fetchone()[0] or 1
+        cursor = conn.execute("SELECT ID, Name, Birthday, LMP, Sitio, Health_Status, Records, PWD_Type FROM residents ORDER BY ID")
+        read = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows: break
+            read += len(rows)
+            yield [PatientRecord(ID, Name, Birthday or 'N/A', LMP or 'N/A', intern(Sitio or 'N/A'), intern(Health_Status or 'N/A'), 
+                                 PWD_Type=intern(PWD_Type or 'NOT PWD'), records_raw=Records or '')
+                   for ID, Name, Birthday, LMP, Sitio, Health_Status, Records, PWD_Type in rows], read / total
+    finally: conn.close()
+
+class SQLiteStore:
+    """Write-through SQLite mirror of the registry plus indexed queries for the list views.
+    
+    Subscribed to patient_registry: every add/update is written as its own single-row transaction.
+    Used only from the thread that owns the registry (the Tk thread in the GUI); loaders open their own connections.
+    """
+    def __init__(self, db_path=DB_FILE):
+        self.conn = _connect_sqlite(db_path)
+
+    def on_change(self, event, patients, changes):
+        if event not in ('add', 'update'): return # 'load' rows came from this database
+        with self.conn: # One transaction per event: a single row for GUI adds/updates
+            self.conn.executemany("INSERT OR REPLACE INTO residents VALUES (?, ?, ?, ?, ?, ?, ?, ?)", 
+                                  [(p.ID, p.Name, p.Birthday, p.LMP, p.Sitio, p.Health_Status, p.records_text(), p.PWD_Type) for p in patients])
+
+    def close(self): self.conn.close()
+
+    def _ids(self, sql, params=()):
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def senior_ids(self, today=None, min_age=60):
+        today = today or date.today()
+        cutoff = f"{today.year - min_age:04d}-{today.month:02d}-{today.day:02d}" # Born on/before this date => age >= min_age
+        return self._ids("SELECT ID FROM residents WHERE Birthday <= ? AND Birthday GLOB ? ORDER BY ID", (cutoff, ISO_DATE_GLOB))
+
+    def pregnant_ids(self, today=None):
+        # Active pregnancy: LMP at least 4 weeks ago and EDD (LMP + 280 days) not yet passed
+        today = today or date.today()
+        earliest, latest = (today - timedelta(days=280)).isoformat(), (today - timedelta(weeks=4)).isoformat()
+        return self._ids("SELECT ID FROM residents WHERE LMP BETWEEN ? AND ? AND LMP GLOB ? ORDER BY ID", (earliest, latest, ISO_DATE_GLOB))
+
+    def pwd_ids(self):
+        # Two ranges instead of != (and no ORDER BY, which SQLite would serve with a table scan) so the PWD_Type index is used
+        return sorted(self._ids("SELECT ID FROM residents WHERE PWD_Type < 'NOT PWD' OR PWD_Type > 'NOT PWD'"))
+
+    def sitio_ids(self, sitio):
+        return self._ids("SELECT ID FROM residents WHERE Sitio = ? ORDER BY ID", (sitio,))
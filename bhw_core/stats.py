@@ -0,0 +1,171 @@
+"""Dashboard counters (kept current from registry events) and the single-pass cross-tab report engine."""
+import csv
+import os
+from collections import Counter
+from datetime import date
+
+from .config import SITIO_CHOICES, DISEASE_CHOICES, PWD_CHOICES
+from .derived import derived_cache
+from .profiling import instrumented
+from .registry import patient_registry
+
+STATS_CHECK_MODE = os.environ.get('BHW_STATS_CHECK') == '1' # Verify every snapshot against a full scan
+
+def _stats_contribution(patient, derived):
+    """What a single resident adds to each dashboard/report counter."""
+    illnesses = tuple(s for s in patient['Health_Status'].split(', ') if s and s != 'N/A')
+    return (derived.age >= 60, derived.is_pregnant, patient.get('PWD_Type', 'NOT PWD'), patient.get('Sitio', 'N/A'), illnesses)
+
+def _empty_stats():
+    return {'total': 0, 'senior': 0, 'pregnant': 0, 'pwd': 0, 'sitio': Counter(), 'illness': Counter(), 'pwd_types': Counter()}
+
+def _apply_contribution(stats, contribution, sign):
+    is_senior, is_pregnant, pwd_type, sitio, illnesses = contribution
+    stats['total'] += sign
+    stats['senior'] += sign * is_senior
+    stats['pregnant'] += sign * is_pregnant
+    stats['pwd'] += sign * (pwd_type != 'NOT PWD')
+    stats['sitio'][sitio] += sign
+    stats['pwd_types'][pwd_type] += sign
+    for illness in illnesses: stats['illness'][illness] += sign
+
+def compute_stats_full_scan(patients, today=None, cache=derived_cache):
+    """Reference implementation: recounts every statistic over the whole registry."""
+    today = today or date.today()
+    stats = _empty_stats()
+    for p in patients: _apply_contribution(stats, _stats_contribution(p, cache.get(p, today)), 1)
+    return stats
+
+def merge_stats(stats, other):
+    """Adds the counters of `other` (e.g. one shard's full scan) into `stats`; returns `stats`."""
+    for key, value in other.items():
+        if isinstance(value, Counter): stats[key].update(value)
+        else: stats[key] += value
+    return stats
+
+class RegistryStats:
+    """Keeps the dashboard and report counters current as deltas on registry add/update events.
+    
+    Senior and pregnancy status depend on today's date, so counters are rebuilt once when the day rolls over.
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self._contributions = {} # ID -> last contribution applied to the counters
+        self._stats = _empty_stats()
+        self._day = date.today()
+        registry.subscribe(self.on_change)
+
+    def on_change(self, event, patients, changes):
+        if event == 'clear':
+            self._contributions = {}; self._stats = _empty_stats()
+            return
+        for p in patients:
+            old = self._contributions.get(p['ID'])
+            if old: _apply_contribution(self._stats, old, -1)
+            new = _stats_contribution(p, derived_cache.get(p, self._day))
+            _apply_contribution(self._stats, new, 1)
+            self._contributions[p['ID']] = new
+
+    def _rebuild(self, today):
+        self._day = today
+        derived_cache.fill(self.registry, today)
+        self._contributions = {}; self._stats = _empty_stats()
+        self.on_change('add', self.registry, None)
+
+    def snapshot(self):
+        """Current counters; O(1) except for the first call after midnight."""
+        today = date.today()
+        if today != self._day: self._rebuild(today)
+        if STATS_CHECK_MODE: self.verify()
+        return self._stats
+
+    def verify(self):
+        """Raises AssertionError if the incremental counters differ from a full recount."""
+        normalized = lambda value: +value if isinstance(value, Counter) else value # +Counter drops zero entries
+        expected = compute_stats_full_scan(self.registry, self._day)
+        mismatches = {key: (normalized(self._stats[key]), normalized(value)) for key, value in expected.items()
+                      if normalized(self._stats[key]) != normalized(value)}
+        if mismatches: raise AssertionError(f"Registry statistics out of sync (incremental, full scan): {mismatches}")
+
+registry_stats = RegistryStats(patient_registry)
+
+# --- Cross-tabulated reports (DOH submission tables) ---
+AGE_BANDS = (('0-5', 0, 5), ('6-17', 6, 17), ('18-59', 18, 59), ('60+', 60, None)) # (label, min age, max age)
+TRIMESTERS = (('1st Trimester', 0, 13), ('2nd Trimester', 13, 28), ('3rd Trimester', 28, None)) # (label, from week, before week)
+UNKNOWN_LABEL = 'Unknown'
+
+def age_band(age):
+    for label, low, high in AGE_BANDS:
+        if age >= low and (high is None or age <= high): return label
+    return UNKNOWN_LABEL # calculate_age() returns -1 for a missing/invalid birthday
+
+def trimester(lmp, today):
+    weeks = (today - lmp).days // 7
+    for label, start, end in TRIMESTERS:
+        if weeks >= start and (end is None or weeks < end): return label
+    return UNKNOWN_LABEL
+
+class CrossTab:
+    """Counts for a row dimension x column dimension, with the known choices listed first."""
+    def __init__(self, title, row_label, rows, columns):
+        self.title, self.row_label = title, row_label
+        self.rows, self.columns = list(rows), list(columns)
+        self.counts = Counter() # (row, column) -> residents
+
+    def add(self, row, column):
+        self.counts[row, column] += 1
+
+    def merge(self, other):
+        """Adds another table of the same kind (e.g. from another shard), keeping any extra categories it found."""
+        self.counts.update(other.counts)
+        return self.finalize()
+
+    def finalize(self):
+        """Appends any values seen in the data that are not among the predefined choices."""
+        seen_rows, seen_columns = set(self.rows), set(self.columns)
+        for row, column in self.counts:
+            if row not in seen_rows: self.rows.append(row); seen_rows.add(row)
+            if column not in seen_columns: self.columns.append(column); seen_columns.add(column)
+        return self
+
+    def table(self):
+        """Header row followed by one row per category, with row and column totals."""
+        rows = [[self.row_label] + self.columns + ['Total']]
+        column_totals = [0] * len(self.columns)
+        for row in self.rows:
+            values = [self.counts[row, column] for column in self.columns]
+            column_totals = [total + value for total, value in zip(column_totals, values)]
+            rows.append([row] + values + [sum(values)])
+        rows.append(['Total'] + column_totals + [sum(column_totals)])
+        return rows
+
+def empty_crosstabs():
+    """The four report tables (illness x Sitio, illness x age band, trimester x Sitio, PWD type x Sitio), not yet counted."""
+    sitios, bands = SITIO_CHOICES, [label for label, _, _ in AGE_BANDS] + [UNKNOWN_LABEL]
+    return [CrossTab("Illness by Sitio", "Illness", DISEASE_CHOICES, sitios), CrossTab("Illness by Age Band", "Illness", DISEASE_CHOICES, bands),
+            CrossTab("Pregnancy Trimester by Sitio", "Trimester", [label for label, _, _ in TRIMESTERS], sitios),
+            CrossTab("PWD Type by Sitio", "PWD Type", PWD_CHOICES, sitios)]
+
+@instrumented
+def build_crosstab_report(patients, today=None, cache=derived_cache):
+    """Builds every cross-tab table in a single pass over the registry."""
+    today = today or date.today()
+    illness_by_sitio, illness_by_age, trimester_by_sitio, pwd_by_sitio = empty_crosstabs()
+    for p in patients:
+        derived = cache.get(p, today)
+        sitio, band = p.get('Sitio', 'N/A'), age_band(derived.age)
+        for illness in p['Health_Status'].split(', '):
+            if not illness or illness == 'N/A': continue
+            illness_by_sitio.add(illness, sitio); illness_by_age.add(illness, band)
+        if derived.is_pregnant: trimester_by_sitio.add(trimester(derived.lmp, today), sitio)
+        pwd_by_sitio.add(p.get('PWD_Type', 'NOT PWD'), sitio)
+    return [tab.finalize() for tab in (illness_by_sitio, illness_by_age, trimester_by_sitio, pwd_by_sitio)]
+
+def write_crosstabs_csv(path, crosstabs, today=None):
+    """Writes the tables one after another into a single CSV (title row, table, blank line)."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["BHW Connect Health Report", (today or date.today()).isoformat()])
+        for tab in crosstabs:
+            writer.writerow([]); writer.writerow([tab.title])
+            writer.writerows(tab.table())
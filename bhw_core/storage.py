@@ -0,0 +1,134 @@
+"""Storage backend selection, registry loading (sync or on a worker thread) and saving."""
+import os
+import queue
+import threading
+from datetime import datetime
+
+from .derived import derived_cache
+from .journal import JOURNAL_FILE, ChangeJournal, iter_journaled_chunks
+from .profiling import instrumented
+from .records import DATA_FILE, write_registry_csv
+from .registry import patient_registry
+from .search import name_trigram_index
+from .sqlite_store import DB_FILE, SQLiteStore, iter_sqlite_chunks
+
+STORAGE_BACKEND = os.environ.get('BHW_STORAGE', 'csv').lower() # 'csv' (default), 'sqlite' or 'sharded'
+
+change_journal = None # Set by init_storage() for the CSV and sharded backends
+sqlite_store = None # Set by init_storage() for the SQLite backend
+
+def init_storage():
+    """Attaches the write-through persistence for the configured backend on the calling (GUI/main) thread, once.
+    
+    SQLite persists each change itself; the CSV backend uses the change journal, and the sharded
+    backend a per-barangay journal whose compaction rewrites that barangay's Sitio shards.
+    """
+    global sqlite_store, change_journal
+    if sqlite_store is not None or change_journal is not None: return
+    if STORAGE_BACKEND == 'sqlite':
+        sqlite_store = SQLiteStore(DB_FILE)
+        patient_registry.subscribe(sqlite_store.on_change)
+    elif STORAGE_BACKEND == 'sharded':
+        from .shards import SHARD_ROOT, ShardSet, save_shard_rows # Process-pool machinery, only for this backend
+        shard_set = ShardSet(SHARD_ROOT)
+        barangay = shard_set.active_barangay()
+        shard_set.register(barangay)
+        # New residents get IDs from this barangay's range, so they never collide with another barangay's
+        patient_registry.id_floor = shard_set.id_range(barangay)[0]
+        patient_registry.next_id = max(patient_registry.next_id, patient_registry.id_floor)
+        change_journal = ChangeJournal(shard_set.journal_path(barangay), None, write_snapshot=lambda rows: save_shard_rows(shard_set, barangay, rows))
+        patient_registry.subscribe(change_journal.on_change)
+    else:
+        change_journal = ChangeJournal(JOURNAL_FILE, DATA_FILE)
+        patient_registry.subscribe(change_journal.on_change)
+
+def detach_storage():
+    """Stops writing registry changes to disk, e.g. after a failed load left only part of the registry in memory.
+    
+    Nothing is compacted or saved, so the files on disk keep every resident; init_storage() attaches again.
+    """
+    global sqlite_store, change_journal
+    if change_journal is not None:
+        patient_registry.unsubscribe(change_journal.on_change)
+        change_journal.close(); change_journal = None
+    if sqlite_store is not None:
+        patient_registry.unsubscribe(sqlite_store.on_change)
+        sqlite_store.close(); sqlite_store = None
+
+def registry_subset(query_name, fallback, *args):
+    """Residents for a list view or export: an indexed SQLite query (called with args) when that backend is on, else the in-memory filter."""
+    if sqlite_store is None: return [p for p in patient_registry if fallback(p)]
+    return patient_registry.get_many(getattr(sqlite_store, query_name)(*args))
+
+def open_registry_chunks():
+    """Chunk stream for the configured storage backend (empty if there is nothing saved yet)."""
+    if STORAGE_BACKEND == 'sqlite': return iter_sqlite_chunks(DB_FILE, migrate_from=DATA_FILE)
+    if STORAGE_BACKEND == 'sharded': return _iter_active_barangay_chunks()
+    return iter_journaled_chunks(DATA_FILE, JOURNAL_FILE)
+
+def _iter_active_barangay_chunks():
+    from .shards import SHARD_ROOT, ShardSet, iter_shard_chunks, migrate_csv_to_shards
+    shard_set = ShardSet(SHARD_ROOT)
+    barangay = shard_set.active_barangay()
+    journaled = lambda name: os.path.exists(shard_set.journal_path(name)) and os.path.getsize(shard_set.journal_path(name)) > 0
+    first_start = not any(shard_set.shard_paths(name) or journaled(name) for name in shard_set.numbers)
+    if first_start and os.path.exists(DATA_FILE): migrate_csv_to_shards(DATA_FILE, shard_set, barangay) # Residents keep their IDs
+    if barangay not in shard_set.numbers: return # Nothing saved for this barangay yet
+    yield from iter_journaled_chunks(None, shard_set.journal_path(barangay), snapshot_chunks=iter_shard_chunks(shard_set, [barangay]))
+
+@instrumented
+def load_data(open_chunks=None, attach_storage=True):
+    """Loads the whole registry synchronously (batch jobs, tests); returns the resident count. Errors propagate.
+    
+    With attach_storage=False nothing is written back (no journal, no compaction), for read-only reporting.
+    A failed load detaches storage, so the partial registry is never compacted over the saved one.
+    """
+    patient_registry.clear(); derived_cache.clear()
+    if attach_storage: init_storage()
+    try:
+        for chunk, _ in (open_chunks or open_registry_chunks)(): apply_loaded_chunk(chunk)
+    except Exception: detach_storage(); raise
+    if change_journal is not None: change_journal.compact_if_needed()
+    return len(patient_registry)
+
+def prepare_loaded_chunk(chunk):
+    """Worker-thread warm-up: date parsing and name indexing, so applying the chunk on the owning thread is cheap."""
+    derived_cache.fill(chunk)
+    name_trigram_index.index(chunk)
+
+def apply_loaded_chunk(chunk):
+    """Adds a loaded chunk to the registry (the registry advances next_id past the chunk's IDs)."""
+    patient_registry.extend(chunk)
+
+class BackgroundLoader:
+    """Parses the registry file on a worker thread and hands finished chunks to the owning (GUI) thread.
+    
+    The worker never touches the registry: it puts ('chunk'|'done'|'error', payload, fraction)
+    messages on a queue that the owner drains (the GUI with after() polling) and passes to apply_loaded_chunk().
+    """
+    def __init__(self, open_chunks=open_registry_chunks):
+        self.open_chunks = open_chunks
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="registry-loader", daemon=True)
+
+    def start(self): self.thread.start()
+    def cancel(self): self.cancelled.set()
+
+    def _run(self):
+        try:
+            for chunk, fraction in self.open_chunks():
+                if self.cancelled.is_set(): return
+                prepare_loaded_chunk(chunk)
+                self.messages.put(('chunk', chunk, fraction))
+            self.messages.put(('done', None, 1.0))
+        except Exception as e: 
+            self.messages.put(('error', e, 1.0))
+
+def default_export_filename(extension='.csv'):
+    return f"BHW_Patient_Registry_{datetime.now().strftime('%Y%m%d')}{extension}"
+
+@instrumented
+def save_data(path, patients=None):
+    """Writes the registry (or the given residents) to a CSV file at path. Errors propagate."""
+    write_registry_csv(path, patient_registry if patients is None else patients)
@@ -0,0 +1,289 @@
+"""Delta replication between BHW terminals: a small asyncio sync server and the client each BHWApp runs.
+
+Terminals push their own edits as change entries (the change journal's format plus a stamp) and pull
+the other terminals' entries since a version cursor, so a sync moves only what changed.
+
+Conflicts resolve the same way on every replica: each field keeps the value written with the highest
+(stamp, terminal) pair, where stamps come from a hybrid logical clock (wall-clock milliseconds that
+never fall behind a stamp already seen). Visit records are merged, never overwritten. New residents
+take IDs from blocks leased by the server, so two terminals never hand out the same ID.
+
+Protocol: one JSON object per line over TCP. The only request,
+    {"op": "sync", "terminal": T, "since": cursor, "changes": [...], "id_floor": n, "lease": bool}
+is answered with
+    {"version": v, "changes": [...], "more": bool, "lease": [start, end] or null}
+"""
+import asyncio
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from .records import PatientRecord
+from .registry import patient_registry
+
+SYNC_SERVER = os.environ.get('BHW_SYNC_SERVER', '') # host:port of the sync server; empty disables syncing
+SYNC_TERMINAL = os.environ.get('BHW_TERMINAL', '') or socket.gethostname()
+SYNC_HOST, SYNC_PORT = '127.0.0.1', 8765
+SYNC_LOG_FILE = 'bhw_sync_log.jsonl'
+SYNC_STATE_FILE = 'bhw_sync_state.json'
+SYNC_TIMEOUT_S = 15
+SYNC_INTERVAL_S = 30 # How often the GUI starts an exchange
+PULL_BATCH = 2000 # Changes per response; the client keeps pulling while 'more' is set
+ID_BLOCK_SIZE = 1000
+ID_BLOCK_REFILL = 100 # Lease another block when fewer IDs than this are left
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024 # Stream line limit; a first push after a bulk import can be large
+SYNC_FIELDS = ('Name', 'Birthday', 'LMP', 'Sitio', 'Health_Status', 'PWD_Type') # Last writer wins; Records are merged
+
+def _claim_fields(winners, patient_id, fields, key):
+    """The fields this edit wins by (stamp, terminal); records the wins in `winners` ((ID, field) -> key)."""
+    won = {}
+    for field, value in fields.items():
+        current = winners.get((patient_id, field))
+        if current is None or key > current: winners[patient_id, field] = key; won[field] = value
+    return won
+
+class SyncServer:
+    """Keeps the change log every terminal pulls from, trims edits that lost a conflict and leases ID blocks.
+
+    Requests are handled without awaiting in between, so each one is applied atomically in arrival
+    order. The log is an fsynced JSON-lines file replayed on startup.
+    """
+    def __init__(self, log_path=SYNC_LOG_FILE):
+        self.log_path = log_path
+        self.changes = [] # Position + 1 is the version a client has seen after pulling that change
+        self.winners = {}
+        self.last_seq = {} # terminal -> highest change seq applied, so a retried push is not applied twice
+        self.next_block = 1
+        if os.path.exists(log_path):
+            with open(log_path, mode='r', encoding='utf-8') as file:
+                for line in file:
+                    try: entry = json.loads(line)
+                    except ValueError: break # Torn final write
+                    if entry['op'] == 'lease': self.next_block = max(self.next_block, entry['block'][1])
+                    else: self.last_seq[entry['terminal']] = entry['seq']; self.changes.append(self._accept(entry) or entry)
+        self.file = open(log_path, mode='a', encoding='utf-8')
+
+    def _accept(self, change):
+        """The change trimmed to the fields it wins (None if nothing is left); this is what gets logged and relayed."""
+        key = (change['stamp'], change['terminal'])
+        if change['op'] == 'add':
+            row = change['row']
+            self.next_block = max(self.next_block, row['ID'] + 1)
+            _claim_fields(self.winners, row['ID'], {field: row[field] for field in SYNC_FIELDS}, key)
+            return change
+        fields = _claim_fields(self.winners, change['id'], change['fields'], key)
+        if not fields and not change.get('record'): return None
+        return dict(change, fields=fields)
+
+    def handle_sync(self, request):
+        terminal, accepted = request['terminal'], []
+        for change in request.get('changes', ()):
+            if change['seq'] <= self.last_seq.get(terminal, 0): continue
+            self.last_seq[terminal] = change['seq']
+            change = self._accept(dict(change, terminal=terminal))
+            if change is not None: accepted.append(change)
+        lease = None
+        if request.get('lease'):
+            start = max(self.next_block, request.get('id_floor', 1))
+            lease = [start, start + ID_BLOCK_SIZE]; self.next_block = lease[1]
+        entries = accepted + ([{'op': 'lease', 'terminal': terminal, 'block': lease}] if lease else [])
+        if entries:
+            self.file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            self.file.flush(); os.fsync(self.file.fileno())
+        self.changes.extend(accepted)
+
+        # Everyone else's changes since the cursor; the terminal's own are skipped but still advance it
+        version, pulled = request.get('since', 0), []
+        while version < len(self.changes) and len(pulled) < PULL_BATCH:
+            change = self.changes[version]; version += 1
+            if change['terminal'] != terminal: pulled.append(change)
+        return {'version': version, 'changes': pulled, 'more': version < len(self.changes), 'lease': lease}
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try: response = self.handle_sync(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e: response = {'error': f"bad request: {e}"}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError): pass # Dropped connection or a line over the size limit
+        finally: writer.close()
+
+    async def serve(self, host=SYNC_HOST, port=SYNC_PORT):
+        server = await asyncio.start_server(self._serve_client, host, port, limit=MAX_MESSAGE_BYTES)
+        async with server: await server.serve_forever()
+
+class SyncClient:
+    """One terminal's side of syncing: queues local edits, exchanges them on a worker thread, applies pulled changes.
+
+    on_change(), start_sync() and apply_pending() run on the thread that owns the registry (the GUI
+    thread); only the network round trips run on the worker. Unpushed edits are kept in an outbox
+    file next to the state file, so they survive a restart while the server is unreachable.
+    """
+    def __init__(self, registry, address=SYNC_SERVER, terminal=SYNC_TERMINAL, state_path=SYNC_STATE_FILE):
+        host, _, port = address.rpartition(':')
+        self.host, self.port = host or SYNC_HOST, int(port or SYNC_PORT)
+        self.registry, self.terminal, self.state_path = registry, terminal, state_path
+        self.cursor, self.clock, self.seq, self.id_blocks, self.winners = 0, 0, 0, [], {}
+        if os.path.exists(state_path):
+            with open(state_path, mode='r', encoding='utf-8') as file: state = json.load(file)
+            self.cursor, self.clock, self.seq, self.id_blocks = state['cursor'], state['clock'], state['seq'], state['id_blocks']
+        self.outbox_path = state_path + '.outbox'
+        self.outbox = []
+        if os.path.exists(self.outbox_path):
+            with open(self.outbox_path, mode='r', encoding='utf-8') as file:
+                for line in file:
+                    try: self.outbox.append(json.loads(line))
+                    except ValueError: break
+        # Edits queued after the state was last saved carry newer seq/stamp values; never reuse them
+        self.seq = max([self.seq] + [entry['seq'] for entry in self.outbox])
+        self.clock = max([self.clock] + [entry['stamp'] for entry in self.outbox])
+        self._claim_unacknowledged()
+        self.outbox_file = open(self.outbox_path, mode='a', encoding='utf-8')
+        self.messages = queue.Queue()
+        self.worker = None
+        self._applying = False # Set while pulled changes are applied, so they are not queued to be pushed back
+        registry.subscribe(self.on_change)
+        registry.id_allocator = self.allocate_id
+
+    def _stamp(self):
+        self.clock = max(int(time.time() * 1000), self.clock + 1)
+        return self.clock
+
+    def _claim_unacknowledged(self):
+        # Only edits the server has not acknowledged need guarding: once pushed, the server trims whatever
+        # they beat, so every change pulled after that exchange is already the winner
+        self.winners = {}
+        for entry in self.outbox:
+            fields = {field: entry['row'][field] for field in SYNC_FIELDS} if entry['op'] == 'add' else entry['fields']
+            _claim_fields(self.winners, entry['row']['ID'] if entry['op'] == 'add' else entry['id'], fields, (entry['stamp'], entry['terminal']))
+
+    def _save_state(self):
+        state = {'cursor': self.cursor, 'clock': self.clock, 'seq': self.seq, 'id_blocks': self.id_blocks}
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, mode='w', encoding='utf-8') as file: json.dump(state, file)
+        os.replace(temp_path, self.state_path)
+
+    def ids_left(self):
+        return sum(end - start for start, end in self.id_blocks)
+
+    def allocate_id(self):
+        """Next ID from this terminal's leased blocks (the registry's id_allocator)."""
+        while self.id_blocks:
+            start, end = self.id_blocks[0]
+            if start >= end: self.id_blocks.pop(0); continue
+            self.id_blocks[0][0] += 1
+            if self.registry.get(start) is None: return start # Skips IDs used before a crash lost the saved state
+        raise RuntimeError("No resident IDs left on this terminal. Sync with the server to get more.")
+
+    def on_change(self, event, patients, changes):
+        if self._applying or event not in ('add', 'update'): return
+        entries = []
+        for p in patients:
+            if event == 'add':
+                entry = {'op': 'add', 'row': dict(p.to_row(), Records=list(p['Records']))}
+                fields = {field: p[field] for field in SYNC_FIELDS}
+            else:
+                fields = {key: value for key, value in changes.items() if key != 'Records'}
+                entry = {'op': 'update', 'id': p['ID'], 'fields': fields, 'record': changes.get('Records')}
+            self.seq += 1
+            entry.update(seq=self.seq, stamp=self._stamp(), terminal=self.terminal)
+            _claim_fields(self.winners, p['ID'], fields, (entry['stamp'], self.terminal))
+            entries.append(entry)
+        self.outbox.extend(entries)
+        self.outbox_file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        self.outbox_file.flush(); os.fsync(self.outbox_file.fileno())
+
+    def start_sync(self):
+        """Starts one push/pull exchange on a worker thread; returns False if one is still running."""
+        if self.worker is not None and self.worker.is_alive(): return False
+        request = {'op': 'sync', 'terminal': self.terminal, 'since': self.cursor, 'changes': list(self.outbox),
+                   'id_floor': self.registry.next_id, 'lease': self.ids_left() < ID_BLOCK_REFILL}
+        self.worker = threading.Thread(target=self._exchange, args=(request,), name="registry-sync", daemon=True)
+        self.worker.start()
+        return True
+
+    def _exchange(self, request):
+        try: self.messages.put(('synced', asyncio.run(self._round_trips(request)), len(request['changes'])))
+        except (OSError, ValueError, asyncio.TimeoutError) as e: self.messages.put(('error', e, 0))
+
+    async def _round_trips(self, request):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE_BYTES), SYNC_TIMEOUT_S)
+        responses = []
+        try:
+            while True:
+                writer.write(json.dumps(request).encode('utf-8') + b'\n')
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), SYNC_TIMEOUT_S)
+                if not line: raise ConnectionError("The sync server closed the connection.")
+                response = json.loads(line)
+                if 'error' in response: raise ValueError(response['error'])
+                responses.append(response)
+                if not response['more']: return responses
+                request = {'op': 'sync', 'terminal': self.terminal, 'since': response['version'], 'changes': []}
+        finally: writer.close()
+
+    def apply_pending(self):
+        """Applies a finished exchange to the registry; returns (changes applied, error) or None if none finished."""
+        try: kind, payload, pushed = self.messages.get_nowait()
+        except queue.Empty: return None
+        if kind == 'error': return 0, payload
+
+        del self.outbox[:pushed] # Edits made during the exchange stay queued for the next one
+        with open(self.outbox_path + '.tmp', mode='w', encoding='utf-8') as file: file.write(''.join(json.dumps(entry) + '\n' for entry in self.outbox))
+        self.outbox_file.close(); os.replace(self.outbox_path + '.tmp', self.outbox_path)
+        self.outbox_file = open(self.outbox_path, mode='a', encoding='utf-8')
+
+        applied = 0
+        for response in payload:
+            for change in response['changes']: applied += self._apply_remote(change)
+            self.cursor = response['version']
+            if response.get('lease'): self.id_blocks.append(list(response['lease']))
+        self._claim_unacknowledged() # After applying: pulled changes older than the pushed edits must still lose to them
+        self._save_state()
+        return applied, None
+
+    def sync_now(self):
+        """Blocking exchange for batch jobs; returns (changes applied, error)."""
+        self.start_sync(); self.worker.join()
+        return self.apply_pending()
+
+    def _apply_remote(self, change):
+        key = (change['stamp'], change['terminal'])
+        self.clock = max(self.clock, change['stamp'])
+        if change['op'] == 'add':
+            row = change['row']
+            patient_id, fields, records = row['ID'], {field: row[field] for field in SYNC_FIELDS}, row['Records']
+        else: patient_id, fields, records = change['id'], change['fields'], [change['record']] if change.get('record') else []
+        patient = self.registry.get(patient_id)
+        if patient is None and change['op'] != 'add': return 0 # Edit of a resident this terminal never had
+        fields = _claim_fields(self.winners, patient_id, fields, key)
+
+        self._applying = True
+        try:
+            if patient is None:
+                self.registry.add(PatientRecord(ID=patient_id, **{field: row[field] for field in SYNC_FIELDS}, Records=list(records)))
+                return 1
+            fields = {field: value for field, value in fields.items() if patient[field] != value}
+            new_records = [record for record in records if record and record not in patient['Records']]
+            if fields: self.registry.update(patient, **fields)
+            for record in reversed(new_records): self.registry.update(patient, record=record) # Oldest first, so the newest ends on top
+            return 1 if fields or new_records else 0
+        finally: self._applying = False
+
+    def close(self):
+        if self.worker is not None: self.worker.join()
+        self.outbox_file.close()
+
+sync_client = None # Set by init_sync() when BHW_SYNC_SERVER is configured
+
+def init_sync():
+    """Attaches the sync client to the registry on the owning (GUI) thread, once; returns it, or None if syncing is off."""
+    global sync_client
+    if sync_client is None and SYNC_SERVER: sync_client = SyncClient(patient_registry)
+    return sync_client
@@ -0,0 +1,32 @@
+"""Display values for resident tables, shared by the GUI and headless exports."""
+from .derived import get_derived
+
+RESIDENT_COLUMNS = ('ID', 'Name', 'Age', 'Sitio', 'Health_Status', 'LMP', 'EDD', 'PWD_Type') 
+PREGNANT_COLUMNS = ('ID', 'Name', 'LMP', 'EDD', 'Sitio', 'Next_Checkup')
+
+def format_resident_row(p):
+    """Table values for one resident in RESIDENT_COLUMNS order."""
+    derived = get_derived(p)
+    age, edd = derived.age, derived.edd
+    
+    # Display logic for LMP too recent
+    edd_display = edd
+    if edd == "LMP too recent (Not Pregnant)":
+        edd_display = "N/A (LMP too recent)"
+    
+    return (
+        p['ID'], 
+        p['Name'], 
+        age if age != -1 else 'N/A', 
+        p['Sitio'], 
+        p['Health_Status'], 
+        p.get('LMP', 'N/A'), 
+        edd_display, 
+        p.get('PWD_Type', 'NOT PWD')
+    )
+
+def format_pregnant_row(p):
+    """Scheduler values for one pregnant resident in PREGNANT_COLUMNS order."""
+    derived = get_derived(p)
+    next_checkup_display = derived.schedule[0] if derived.schedule else "No upcoming checkups."
+    return (p['ID'], p['Name'], p['LMP'], derived.edd, p['Sitio'], next_checkup_display)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bhw_core import derived_cache, patient_registry, storage
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Empty registry and no attached storage, in an empty working directory (the data files are cwd-relative)."""
+    monkeypatch.chdir(tmp_path)
+    patient_registry.clear(); derived_cache.clear()
+    yield tmp_path
+    storage.detach_storage()
+    patient_registry.clear(); derived_cache.clear()
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from bhw_core import PatientRecord, age_index, checkup_calendar, patient_registry
+
+def test_checkup_calendar_due_dates(workdir):
+    today = date.today()
+    lmp = lambda weeks: (today - timedelta(weeks=weeks)).isoformat()
+    patient_registry.extend([PatientRecord(1, "ANA REYES", LMP=lmp(10)), PatientRecord(2, "BEN CRUZ", LMP=lmp(2)), # Too recent to confirm
+                             PatientRecord(3, "CARLA LIM", LMP=lmp(45)), PatientRecord(4, "DINA SY")]) # Past the EDD; no LMP
+    due = checkup_calendar.due_between(today, today + timedelta(weeks=3))
+    assert [(day, p.ID, week) for day, p, week in due] == [(today + timedelta(weeks=2), 1, 12)]
+
+    patient_registry.update(patient_registry.get(4), LMP=lmp(15)) # Re-indexed on edit
+    due = checkup_calendar.due_between(today, today + timedelta(weeks=3))
+    assert [(p.ID, week) for _, p, week in due] == [(4, 16), (1, 12)]
+    assert checkup_calendar.due_between_by_sitio(today, today + timedelta(weeks=3)) == {'N/A': due}
+
+def test_age_cohorts_and_birthdays(workdir):
+    today = date(2026, 3, 15)
+    birthdays = {1: '1966-03-15', 2: '1966-03-16', 3: '1950-07-01', 4: '2020-01-01', 5: 'N/A', 6: '1966-03-31'}
+    patient_registry.extend([PatientRecord(patient_id, f"RESIDENT {patient_id}", birthday) for patient_id, birthday in birthdays.items()])
+    assert age_index.cohort_ids(60, today=today) == [3, 1] # Oldest first; 2 turns 60 tomorrow
+    assert age_index.cohort_ids(0, 59, today=today) == [2, 6, 4]
+    assert age_index.turning_ids(60, date(2026, 3, 1), date(2026, 3, 31)) == [1, 2, 6]
+
+    patient_registry.update(patient_registry.get(4), Birthday='1940-01-01') # Re-indexed on edit
+    assert age_index.cohort_ids(60, today=today) == [4, 3, 1]
+    assert age_index.ids_youngest_first() == [6, 2, 1, 3, 4]
@@ -0,0 +1,50 @@
+import json
+import threading
+
+import pytest
+
+from bhw_core import PatientRecord, patient_registry, storage
+from bhw_core.journal import ChangeJournal, iter_journaled_chunks
+from bhw_core.records import DATA_FILE, write_registry_csv
+
+def _replayed(snapshot_path, journal_path):
+    return {p.ID: p for chunk, _ in iter_journaled_chunks(snapshot_path, journal_path) for p in chunk}
+
+def test_replay_after_concurrent_compaction(workdir):
+    patient_registry.extend([PatientRecord(1, "JUAN CRUZ", Records=["reg"])])
+    release = threading.Event()
+    def slow_snapshot(rows): release.wait(); journal._write_csv_snapshot(rows)
+    journal = ChangeJournal('test.journal', 'test.csv', write_snapshot=slow_snapshot)
+    patient_registry.subscribe(journal.on_change)
+    try:
+        journal.compact() # Snapshot is taken, but written only after the visits below
+        p = patient_registry.get(1)
+        patient_registry.update(p, record="visit A"); patient_registry.update(p, record="visit B", Sitio="IBABA")
+        release.set()
+        journal.close()
+    finally: patient_registry.unsubscribe(journal.on_change)
+    
+    restarted = _replayed('test.csv', 'test.journal')[1]
+    assert restarted.Records == ["visit B", "visit A", "reg"] and restarted.Sitio == "IBABA"
+    
+    # A second compaction of the replayed registry keeps the history as it is
+    journal = ChangeJournal('test.journal', 'test.csv')
+    journal.compact([restarted]); journal.close()
+    assert _replayed('test.csv', 'test.journal')[1].Records == ["visit B", "visit A", "reg"]
+
+def test_failed_load_does_not_compact(workdir):
+    write_registry_csv(DATA_FILE, [PatientRecord(i, f"RESIDENT {i}") for i in range(1, 11)])
+    with open(DATA_FILE, encoding='utf-8') as f: lines = f.read().splitlines()
+    lines.insert(5, "not-an-id,BROKEN ROW,N/A,N/A,N/A,N/A,,NOT PWD")
+    with open(DATA_FILE, 'w', encoding='utf-8') as f: f.write("\n".join(lines) + "\n")
+    with open('bhw_patient_registry_auto.journal', 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'update', 'id': 2, 'fields': {'Sitio': 'IBABA'}, 'record': None}) + "\n")
+    with open(DATA_FILE, 'rb') as f: saved = f.read()
+    
+    with pytest.raises(ValueError): storage.load_data(lambda: iter_journaled_chunks(DATA_FILE, 'bhw_patient_registry_auto.journal', chunk_size=3))
+    assert 0 < len(patient_registry) < 10
+    assert storage.change_journal is None
+    
+    patient_registry.update(patient_registry.get(1), Sitio="IBABA") # Not persisted: storage is detached
+    with open(DATA_FILE, 'rb') as f: assert f.read() == saved
+    with open('bhw_patient_registry_auto.journal', encoding='utf-8') as f: assert len(f.readlines()) == 1
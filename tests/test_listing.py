@@ -0,0 +1,12 @@
+from bhw_core import PatientRecord, list_index, patient_registry
+
+def test_age_sort_breaks_ties_by_id_on_both_paths(workdir):
+    birthdays = ['1990-05-05', 'N/A', '1990-05-05', '2001-01-01', '1990-05-05', 'N/A', '1950-02-02', '1990-05-05']
+    patient_registry.extend([PatientRecord(patient_id, f"RESIDENT {patient_id}", birthday) for patient_id, birthday in zip((8, 3, 5, 1, 2, 7, 4, 6), birthdays)])
+    patient_registry.extend([PatientRecord(100 + n, f"FILLER {n}", 'N/A') for n in range(40)]) # Keeps the subset below small enough to sort by its own keys
+
+    ordered = [p.ID for p in list_index.select(sort='Age')] # Whole registry: from the birth-date index
+    assert ordered[:8] == [1, 2, 5, 6, 8, 4, 3, 7] and ordered[8:] == list(range(100, 140))
+    subset = [p.ID for p in list_index.select(ids=range(1, 9), sort='Age')] # Small subset: sorted by (key, ID)
+    assert subset == ordered[:8]
+    assert [p.ID for p in list_index.select(ids=range(1, 9), sort='Age', descending=True)] == subset[::-1]
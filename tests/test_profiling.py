@@ -0,0 +1,17 @@
+from datetime import date
+
+from bhw_core import DerivedCache, PatientRecord, profiler
+from bhw_core.profiling import _percentile
+
+def test_nearest_rank_percentiles():
+    assert _percentile(list(range(1, 11)), 0.50) == 5
+    assert _percentile(list(range(1, 21)), 0.95) == 19
+    assert _percentile(list(range(1, 101)), 0.99) == 99
+    assert _percentile([7.0], 0.50) == 7.0 and _percentile([], 0.95) == 0.0
+
+def test_cache_fill_is_profiled(monkeypatch):
+    monkeypatch.setattr(profiler, 'enabled', True)
+    durations = profiler.series('DerivedCache.fill'); del durations[:]
+    cache = DerivedCache()
+    cache.fill([PatientRecord(1, "ANA REYES", '1950-01-01'), PatientRecord(2, "BEN CRUZ", 'N/A')], date(2026, 1, 1))
+    assert len(durations) == 1 and cache.get(PatientRecord(1, "ANA REYES", '1950-01-01'), date(2026, 1, 1)).age == 76
@@ -0,0 +1,14 @@
+from bhw_core import PatientRecord, name_trigram_index, patient_registry, search_candidates
+
+def test_fuzzy_name_search_ranks_typos_and_follows_renames(workdir):
+    big_id = 300 * 10_000_000 + 5 # Barangay 300's ID range is past 2**31; postings must still hold it
+    patient_registry.extend([PatientRecord(1, "JUAN DELA CRUZ"), PatientRecord(2, "JUANA DE LEON"), PatientRecord(big_id, "PEDRO SANTOS"),
+                             PatientRecord(4, "MARIA CLARA")])
+    results = name_trigram_index.search("DELA CRUZ JAUN")
+    assert results[0][1].ID == 1 and all(score <= results[0][0] for score, _ in results)
+    assert [p.ID for _, p in name_trigram_index.search("PEDRO SANTSO")][:1] == [big_id]
+    assert name_trigram_index.search("XYZ QWV") == []
+
+    patient_registry.update(patient_registry.get(4), Name="MARIA SANTOS")
+    assert 4 not in [p.ID for _, p in name_trigram_index.search("CLARA")]
+    assert [p.ID for p in search_candidates("MARIA SANTOS")][:1] == [4]
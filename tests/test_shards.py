@@ -0,0 +1,24 @@
+from datetime import date
+
+from bhw_core import PatientRecord
+from bhw_core.journal import ChangeJournal
+from bhw_core.shards import BARANGAY_ID_SPAN, ShardSet, aggregate_shards, save_shards
+
+def test_aggregation_replays_each_barangays_journal(workdir):
+    shard_set = ShardSet(str(workdir / 'shards'))
+    alpha, beta = shard_set.register('ALPHA'), shard_set.register('BETA')
+    assert shard_set.id_range('BETA') == (beta * BARANGAY_ID_SPAN, (beta + 1) * BARANGAY_ID_SPAN) and alpha != beta
+    start = shard_set.id_range('ALPHA')[0]
+    residents = [PatientRecord(start, "ANA REYES", '1950-01-01', Sitio='IBABA'), PatientRecord(start + 1, "BEN CRUZ", '1990-01-01', Sitio='SILANGAN')]
+    save_shards(shard_set, 'ALPHA', residents, max_workers=1)
+    save_shards(shard_set, 'BETA', [PatientRecord(shard_set.id_range('BETA')[0], "CARLA LIM", '2000-01-01', Sitio='IBABA')], max_workers=1)
+
+    journal = ChangeJournal(shard_set.journal_path('ALPHA'), None) # Edits the ALPHA station has not compacted yet
+    journal.on_change('update', [residents[1]], {'PWD_Type': 'Visual'})
+    journal.on_change('add', [PatientRecord(start + 2, "DINA SY", '1940-01-01', Sitio='IBABA')], None)
+    journal.close()
+
+    stats, _, by_barangay = aggregate_shards(shard_set, today=date(2026, 1, 1), max_workers=2) # One worker process per barangay
+    assert (stats['total'], stats['senior'], stats['pwd']) == (4, 2, 1)
+    assert by_barangay['ALPHA']['total'] == 3 and by_barangay['BETA']['total'] == 1
+    assert stats['pwd_types']['Visual'] == 1 and stats['sitio']['IBABA'] == 3
@@ -0,0 +1,38 @@
+from datetime import date
+
+from bhw_core import PatientRecord, list_index, patient_registry, storage
+from bhw_core.export import export_source
+
+def _load_sqlite_registry(monkeypatch):
+    monkeypatch.setattr(storage, 'STORAGE_BACKEND', 'sqlite')
+    storage.load_data()
+    for patient_id, (sitio, pwd_type, birthday) in enumerate((('IBABA', 'NOT PWD', '1950-01-01'), ('IBABA', 'Visual', '2000-01-01'),
+                                                              ('SILANGAN', 'NOT PWD', '1940-06-30'), ('SILANGAN', 'Hearing', '1990-01-01')), start=1):
+        patient_registry.add(PatientRecord(patient_id, f"RESIDENT {patient_id}", birthday, Sitio=sitio, PWD_Type=pwd_type))
+
+def test_indexed_queries_match_the_registry(workdir, monkeypatch):
+    _load_sqlite_registry(monkeypatch)
+    store = storage.sqlite_store
+    assert store.sitio_ids('IBABA') == [1, 2]
+    assert store.pwd_ids() == [2, 4]
+    assert store.senior_ids(date(2026, 1, 1)) == [1, 3]
+    
+    patient_registry.update(patient_registry.get(1), PWD_Type='Physical', Sitio='SILANGAN') # Write-through
+    assert store.pwd_ids() == [1, 2, 4] and store.sitio_ids('SILANGAN') == [1, 3, 4]
+
+def test_pwd_and_sitio_queries_use_their_indexes(workdir, monkeypatch):
+    _load_sqlite_registry(monkeypatch)
+    plan = lambda sql, *params: " ".join(row[-1] for row in storage.sqlite_store.conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert 'idx_residents_pwd_type' in plan("SELECT ID FROM residents WHERE PWD_Type < 'NOT PWD' OR PWD_Type > 'NOT PWD'")
+    assert 'idx_residents_sitio' in plan("SELECT ID FROM residents WHERE Sitio = ? ORDER BY ID", 'IBABA')
+
+def test_sitio_filter_and_export_go_through_sqlite(workdir, monkeypatch):
+    _load_sqlite_registry(monkeypatch)
+    queried = []
+    sitio_ids = storage.sqlite_store.sitio_ids
+    monkeypatch.setattr(storage.sqlite_store, 'sitio_ids', lambda sitio: queried.append(sitio) or sitio_ids(sitio))
+    
+    assert [p.ID for p in list_index.select(filters={'Sitio': {'SILANGAN'}})] == [3, 4]
+    candidates, keep = export_source('pwd', 'IBABA')
+    assert [p.ID for p in candidates if keep(p)] == [2]
+    assert queried == ['SILANGAN', 'IBABA']
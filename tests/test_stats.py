@@ -0,0 +1,28 @@
+import random
+from datetime import date, timedelta
+
+from bhw_core import DISEASE_CHOICES, PWD_CHOICES, SITIO_CHOICES, PatientRecord, compute_stats_full_scan, patient_registry, registry_stats
+from benchmarks.synthetic import generate_registry
+
+def test_registry_stats_match_full_scan(workdir):
+    rng = random.Random(7)
+    patient_registry.extend(list(generate_registry(2000, seed=7)))
+    registry_stats.verify()
+    
+    for _ in range(300):
+        p = patient_registry[rng.randrange(len(patient_registry))]
+        edit = rng.choice(({'Health_Status': ", ".join(rng.sample(DISEASE_CHOICES, rng.randint(1, 2)))}, {'PWD_Type': rng.choice(PWD_CHOICES)},
+                           {'Sitio': rng.choice(SITIO_CHOICES)}, {'LMP': rng.choice(('N/A', '2026-01-05', 'not a date'))}, {'Birthday': '1950-03-01'}))
+        patient_registry.update(p, **edit)
+    for _ in range(50):
+        patient_registry.add(PatientRecord(patient_registry.allocate_id(), "NEW RESIDENT", '2000-01-01', Sitio=rng.choice(SITIO_CHOICES), Health_Status='Asthma'))
+    registry_stats.verify()
+    
+    stats = registry_stats.snapshot()
+    assert stats['total'] == len(patient_registry) == compute_stats_full_scan(patient_registry)['total']
+
+def test_registry_stats_rebuild_after_midnight(workdir):
+    patient_registry.extend(list(generate_registry(500, seed=3)))
+    registry_stats._day = date.today() - timedelta(days=1) # As if the counters were last built yesterday
+    assert registry_stats.snapshot() == compute_stats_full_scan(patient_registry)
+    assert registry_stats._day == date.today()
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from bhw_core import PatientRecord
+from bhw_core.registry import PatientRegistry
+from bhw_core.sync import SyncClient, SyncServer
+
+@pytest.fixture
+def server(workdir, monkeypatch):
+    """A sync server the clients reach in-process (handle_sync directly) instead of over TCP."""
+    server = SyncServer(str(workdir / 'sync_log.jsonl'))
+    async def round_trips(client, request):
+        responses = [server.handle_sync(request)]
+        while responses[-1]['more']: responses.append(server.handle_sync({'op': 'sync', 'terminal': client.terminal, 'since': responses[-1]['version'], 'changes': []}))
+        return responses
+    monkeypatch.setattr(SyncClient, '_round_trips', round_trips)
+    yield server
+    server.file.close()
+
+def _client(workdir, terminal):
+    client = SyncClient(PatientRegistry(), terminal=terminal, state_path=str(workdir / f'{terminal}_state.json'))
+    applied, error = client.sync_now() # Leases the first ID block
+    assert error is None
+    return client
+
+def test_visit_does_not_overwrite_another_terminals_edit(server, workdir):
+    a, b = _client(workdir, 'A'), _client(workdir, 'B')
+    a.registry.add(PatientRecord(a.registry.allocate_id(), "JUAN DELA CRUZ", '1980-01-01', Health_Status='Healthy'))
+    a.sync_now(); b.sync_now()
+    patient_id = a.registry[0]['ID']
+
+    b.registry.update(b.registry.get(patient_id), PWD_Type='Visual')
+    b.sync_now()
+    time.sleep(0.01) # The visit is stamped later than the PWD edit
+    resident = a.registry.get(patient_id) # A has not pulled the edit; the visit form resends every field as shown
+    a.registry.update(resident, record="2026-01-05: Checkup", Health_Status=resident['Health_Status'], PWD_Type=resident['PWD_Type'], LMP=resident['LMP'])
+    assert a.outbox[-1]['fields'] == {}
+    a.sync_now(); b.sync_now()
+
+    for client in (a, b):
+        resident = client.registry.get(patient_id)
+        assert resident['PWD_Type'] == 'Visual' and resident['Records'] == ["2026-01-05: Checkup"]
+    for client in (a, b): client.close()
+
+def test_state_keeps_only_unacknowledged_claims(server, workdir):
+    a, b = _client(workdir, 'A'), _client(workdir, 'B')
+    a.registry.add(PatientRecord(a.registry.allocate_id(), "MARIA SANTOS", '1990-01-01'))
+    a.sync_now(); b.sync_now()
+    patient_id = a.registry[0]['ID']
+    assert a.winners == {} and b.winners == {}
+
+    a.registry.update(a.registry.get(patient_id), Health_Status='Hypertensive')
+    a.sync_now()
+    time.sleep(0.01)
+    b.registry.update(b.registry.get(patient_id), Health_Status='Diabetic') # Newer, and not pushed before the restart
+    b.close(); b.registry.unsubscribe(b.on_change)
+    with open(b.state_path, encoding='utf-8') as file: assert 'winners' not in file.read()
+    b = SyncClient(b.registry, terminal='B', state_path=b.state_path)
+    assert set(b.winners) == {(patient_id, 'Health_Status')}
+
+    b.sync_now(); a.sync_now() # B pulls A's older edit, which must not overwrite its own
+    assert b.winners == {}
+    for client in (a, b): assert client.registry.get(patient_id)['Health_Status'] == 'Diabetic'
+    for client in (a, b): client.close()